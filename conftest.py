@@ -0,0 +1,13 @@
+import sys
+
+collect_ignore = []
+
+try:
+    import sphinx
+except ImportError:
+    # The extension module can't be imported for doctests without Sphinx.
+    collect_ignore.append('genuuml/sphinxext.py')
+
+if sys.version_info < (3, 9):
+    # Stubs are formatted by `ast.unparse`, new in Python 3.9.
+    collect_ignore += ['genuuml/stubs.py', 'genuuml/tests/test_stubs.py']
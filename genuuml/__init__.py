@@ -1,9 +1,11 @@
-from .genuuml import in_plant_uml, in_ascii_tree
+from .genuuml import in_plant_uml, in_dot, in_mermaid, in_ascii_tree
 
 from .version import __version__
 
 
 __all__ = [
     'in_plant_uml',
+    'in_dot',
+    'in_mermaid',
     'in_ascii_tree',
 ]
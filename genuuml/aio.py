@@ -0,0 +1,150 @@
+"""
+Asyncio API
+
+Counterparts of the functions in `genuuml.genuuml` for asyncio applications.
+Blocking imports, inspection and rendering run in an executor, so the event
+loop is not blocked.  Concurrent calls with identical arguments share one
+execution.
+"""
+
+import asyncio
+import weakref
+from concurrent.futures import Executor
+from typing import AsyncIterator, Callable, Dict, Hashable, List, Optional
+
+from . import genuuml
+from .builders import Builder
+
+
+# `asyncio.get_running_loop` is new in Python 3.7.  Called in a coroutine,
+# `asyncio.get_event_loop` returns the running loop as well.
+_running_loop = getattr(asyncio, 'get_running_loop', asyncio.get_event_loop)
+
+# In-flight executions per event loop.
+# Each value consists with the task and the number of waiters.
+_in_flights: 'weakref.WeakKeyDictionary' = weakref.WeakKeyDictionary()
+
+
+async def _coalesce(key: Hashable, executor: Optional[Executor],
+                    func: Callable, *args) -> List:
+    """
+    Run `func(*args)` in `executor`, or wait for the execution already
+    in flight for the same `key`.
+
+    Cancelling a caller cancels the execution only when no other caller is
+    waiting for it.
+    """
+    loop = _running_loop()
+    in_flight: Dict = _in_flights.setdefault(loop, {})
+
+    entry = in_flight.get(key)
+    if entry is None:
+        task = asyncio.ensure_future(
+            loop.run_in_executor(executor, func, *args))
+        entry = in_flight[key] = [task, 0]
+
+        def discard(_, entry=entry):
+            if in_flight.get(key) is entry:
+                del in_flight[key]
+
+        task.add_done_callback(discard)
+
+    task = entry[0]
+    entry[1] += 1
+    try:
+        source, not_founds = await asyncio.shield(task)
+    except asyncio.CancelledError:
+        if entry[1] == 1 and not task.done():
+            task.cancel()
+        raise
+    finally:
+        entry[1] -= 1
+
+    # Callers must not share the mutable result.
+    return [source, list(not_founds)]
+
+
+async def in_plant_uml(class_paths: List[str],
+                       indent: int,
+                       print_typehint: bool,
+                       print_default_value: bool,
+                       print_full_arguments: bool,
+                       max_arguments_width: int,
+                       print_builtins_members: int,
+                       transitive_reduction: bool = False,
+                       collapse_object: bool = False,
+                       executor: Optional[Executor] = None,
+                       ) -> List:
+    """
+    Asyncio counterpart of `genuuml.in_plant_uml`.
+
+    :param executor: Executor to run in.  Default executor of the event loop
+                     is used if None.
+    """
+    args = (tuple(class_paths), indent, print_typehint, print_default_value,
+            print_full_arguments, max_arguments_width,
+            print_builtins_members, transitive_reduction, collapse_object)
+
+    return await _coalesce(('in_plant_uml', ) + args, executor,
+                           genuuml.in_plant_uml, *args)
+
+
+async def in_ascii_tree(class_paths: List[str],
+                        executor: Optional[Executor] = None) -> List:
+    """
+    Asyncio counterpart of `genuuml.in_ascii_tree`.
+
+    :param executor: Executor to run in.  Default executor of the event loop
+                     is used if None.
+    """
+    args = (tuple(class_paths), )
+
+    return await _coalesce(('in_ascii_tree', ) + args, executor,
+                           genuuml.in_ascii_tree, *args)
+
+
+async def in_filepath_list(class_paths: List[str],
+                           executor: Optional[Executor] = None) -> List:
+    """
+    Asyncio counterpart of `genuuml.in_filepath_list`.
+
+    :param executor: Executor to run in.  Default executor of the event loop
+                     is used if None.
+    """
+    args = (tuple(class_paths), )
+
+    return await _coalesce(('in_filepath_list', ) + args, executor,
+                           genuuml.in_filepath_list, *args)
+
+
+async def build(builder: Builder, class_paths: List[str],
+                executor: Optional[Executor] = None) -> List:
+    """
+    Asyncio counterpart of `genuuml.build`.
+
+    The registry is built in `executor`, and each source chunk is built in
+    `executor` as the returned asynchronous iterator is consumed, so rendered
+    output can be streamed to the caller.
+
+    :param builder: Builder object
+    :param class_paths: List of class paths and module paths
+    :param executor: Executor to run in.  Default executor of the event loop
+                     is used if None.
+    :return: Asynchronous iterator of source chunks and not found path list
+    """
+    loop = _running_loop()
+    chunks, not_founds = await loop.run_in_executor(
+        executor, genuuml.build, builder, list(class_paths))
+
+    return [_iter_chunks(chunks, executor), not_founds]
+
+
+async def _iter_chunks(chunks, executor: Optional[Executor]
+                       ) -> AsyncIterator[str]:
+    loop = _running_loop()
+    end = object()
+    while True:
+        chunk = await loop.run_in_executor(executor, next, chunks, end)
+        if chunk is end:
+            break
+        yield chunk
@@ -0,0 +1,255 @@
+"""
+Load-test benchmarks
+
+Drive the public API or the CLI repeatedly with a set of classes, and
+report latency percentiles, throughput, and growth of RSS and
+`sys.modules` over the iterations::
+
+    python -m genuuml.benchmark --scenario api --class-set stdlib -n 500
+
+Installed versions are compared by running the same benchmark in other
+interpreters, e.g. of virtualenvs having other versions installed::
+
+    python -m genuuml.benchmark --compare ../old-venv/bin/python
+
+The benchmark runs in those interpreters as a worker script, so it uses
+only the API and the CLI every version provides.
+"""
+
+import io
+import json
+import os
+import subprocess
+import sys
+import time
+from contextlib import redirect_stderr, redirect_stdout
+from typing import Callable, List, Optional, Sequence
+
+import click
+
+
+# Classes typical of the applications, from the standard library so every
+# interpreter has them.
+CLASS_SETS = {
+    'small': [
+        'json.decoder.JSONDecoder',
+        'collections.OrderedDict',
+    ],
+    'stdlib': [
+        'http.client',
+        'email.message',
+        'logging',
+        'argparse',
+        'json.decoder',
+    ],
+    'large': [
+        'http.client',
+        'email.message',
+        'email.policy',
+        'logging',
+        'logging.handlers',
+        'argparse',
+        'json.decoder',
+        'unittest.case',
+        'xml.dom.minidom',
+        'asyncio.events',
+        'concurrent.futures',
+    ],
+}
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """
+    Return the q-th percentile of `values` by linear interpolation.
+
+    >>> percentile([1, 2, 3, 4], 50)
+    2.5
+    >>> percentile([5, 1, 3], 100)
+    5.0
+    """
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def current_rss() -> Optional[int]:
+    """
+    Return resident set size of the process in bytes, or peak resident set
+    size where the current size is not available.
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return rss if sys.platform == 'darwin' else rss * 1024
+
+
+def _api_call(class_paths: List[str]) -> Callable[[], None]:
+    import genuuml
+
+    def call():
+        genuuml.in_plant_uml(class_paths, 2, False, False, False, 25, False)
+
+    return call
+
+
+def _cli_call(class_paths: List[str]) -> Callable[[], None]:
+    from genuuml.cli import main
+
+    def call():
+        with redirect_stdout(io.StringIO()), redirect_stderr(io.StringIO()):
+            main.main(['in-plant-uml'] + class_paths, standalone_mode=False)
+
+    return call
+
+
+SCENARIOS = {
+    'api': _api_call,
+    'cli': _cli_call,
+}
+
+
+def run(scenario: str, class_paths: List[str], iterations: int,
+        warmup: int = 1) -> dict:
+    """
+    Call the scenario repeatedly and return the statistics.
+
+    Warmup calls import and inspect the classes for the first time, and are
+    excluded from latencies.  RSS and `sys.modules` are measured after
+    those, so the growth shows what repeated calls keep.
+
+    :param scenario: Name in `SCENARIOS`
+    :param class_paths: Class paths and module paths given to each call
+    :param iterations: Number of measured calls
+    :param warmup: Number of calls before measuring
+    """
+    import genuuml
+
+    call = SCENARIOS[scenario](class_paths)
+    for _ in range(warmup):
+        call()
+
+    rss_start = current_rss()
+    modules_start = len(sys.modules)
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        t = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - t)
+    elapsed = time.perf_counter() - started
+    rss_end = current_rss()
+
+    return {
+        'genuuml': genuuml.__version__,
+        'python': sys.version.split()[0],
+        'executable': sys.executable,
+        'scenario': scenario,
+        'class_paths': class_paths,
+        'iterations': iterations,
+        'p50': percentile(latencies, 50),
+        'p99': percentile(latencies, 99),
+        'mean': sum(latencies) / len(latencies),
+        'throughput': iterations / elapsed,
+        'rss_start': rss_start,
+        'rss_end': rss_end,
+        'rss_growth': None if rss_start is None or rss_end is None
+        else rss_end - rss_start,
+        'modules_growth': len(sys.modules) - modules_start,
+    }
+
+
+def run_in(python: str, scenario: str, class_paths: List[str],
+           iterations: int, warmup: int) -> dict:
+    """
+    Run the benchmark in the interpreter `python` against the version
+    installed there, and return the statistics.
+    """
+    # The script is run by path without the current directory on
+    # `sys.path`, so a checkout in it doesn't shadow the installed version.
+    code = (
+        "import runpy, sys\n"
+        "del sys.path[0]\n"
+        "sys.argv = sys.argv[:1] + {!r}\n"
+        "runpy.run_path({!r}, run_name='__main__')\n"
+    ).format(['--worker', '--scenario', scenario, '-n', str(iterations),
+              '--warmup', str(warmup)] + class_paths,
+             os.path.abspath(__file__))
+    completed = subprocess.run([python, '-c', code], check=True,
+                               stdout=subprocess.PIPE)
+
+    return json.loads(completed.stdout.decode('utf-8'))
+
+
+def _format_size(size: Optional[int]) -> str:
+    return "-" if size is None else "{:+.1f} MiB".format(size / 2 ** 20)
+
+
+def format_results(results: List[dict]) -> str:
+    """
+    Return results as a table with a column per result.
+    """
+    rows = [
+        ("genuuml", lambda r: r['genuuml']),
+        ("python", lambda r: r['python']),
+        ("scenario", lambda r: r['scenario']),
+        ("iterations", lambda r: str(r['iterations'])),
+        ("p50", lambda r: "{:.2f} ms".format(r['p50'] * 1000)),
+        ("p99", lambda r: "{:.2f} ms".format(r['p99'] * 1000)),
+        ("throughput", lambda r: "{:.1f} calls/s".format(r['throughput'])),
+        ("rss growth", lambda r: _format_size(r['rss_growth'])),
+        ("sys.modules growth", lambda r: "{:+d}".format(r['modules_growth'])),
+    ]
+    cells = [[label] + [value(result) for result in results]
+             for label, value in rows]
+    widths = [max(len(row[i]) for row in cells) for i in range(len(cells[0]))]
+
+    return "".join("  ".join(cell.ljust(width) for cell, width
+                             in zip(row, widths)).rstrip() + "\n"
+                   for row in cells)
+
+
+@click.command()
+@click.argument('class_paths', nargs=-1)
+@click.option('--scenario', default='api', type=click.Choice(list(SCENARIOS)), help="Entry point to drive")
+@click.option('--class-set', default='stdlib', type=click.Choice(list(CLASS_SETS)), help="Classes given to each call, unless CLASS_PATHS are given")
+@click.option('-n', '--iterations', default=100, type=click.IntRange(min=1), help="Number of measured calls")
+@click.option('--warmup', default=1, type=click.IntRange(min=0), help="Number of calls before measuring")
+@click.option('--compare', 'pythons', multiple=True, type=click.Path(exists=True, dir_okay=False), help="Run the benchmark in the interpreter too, to compare with the version installed there.  Can be given more than once")
+@click.option('--json', 'json_path', default=None, type=click.Path(dir_okay=False, writable=True), help="Write the results into the file in JSON")
+@click.option('--worker', is_flag=True, hidden=True)
+def main(class_paths, scenario, class_set, iterations, warmup, pythons,
+         json_path, worker):
+    """
+    Benchmark repeated calls of genuuml.
+    """
+    class_paths = list(class_paths) or CLASS_SETS[class_set]
+    if worker:
+        click.echo(json.dumps(run(scenario, class_paths, iterations, warmup)))
+        return
+
+    results = [run(scenario, class_paths, iterations, warmup)]
+    for python in pythons:
+        results.append(run_in(python, scenario, class_paths, iterations,
+                              warmup))
+
+    click.echo(format_results(results), nl=False)
+    if json_path is not None:
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""
+Inspection budgets
+
+With a budget, `build_registry` inspects classes breadth first in priority
+order: given classes first, then their parents, grandparents and so on.
+It stops when the budget is exhausted, so the registry holds the classes
+nearest to the given ones, and relations to classes not inspected are left
+out.
+"""
+
+import time
+from collections import deque
+from typing import Deque, List, Optional, Tuple, Union
+
+from .inspectors import (
+    ClassInspector,
+    ClassNotFoundError,
+    ClassRegistry,
+    resolve_type,
+)
+
+
+class Budget:
+    """
+    Limits of the classes inspected by `build_registry`.
+
+    :param max_classes: Maximum number of classes to be registered
+    :param time_budget: Seconds to inspect classes in.  A class being
+                        inspected is completed even if the time is up.
+    """
+
+    def __init__(self, max_classes: Optional[int] = None,
+                 time_budget: Optional[float] = None):
+        self.max_classes = max_classes
+        self.time_budget = time_budget
+        # Class paths not inspected because the budget was exhausted
+        self.truncated: List[str] = []
+        self._started: Optional[float] = None
+
+    def start(self):
+        self._started = time.monotonic()
+
+    def exhausted(self, count: int) -> bool:
+        """
+        Return True if no more class can be inspected.
+
+        :param count: Number of classes registered so far
+        """
+        if self.max_classes is not None and count >= self.max_classes:
+            return True
+        if self.time_budget is not None and self._started is not None:
+            return time.monotonic() - self._started >= self.time_budget
+
+        return False
+
+
+def _class_path(klass: type) -> str:
+    return klass.__module__ + '.' + klass.__name__
+
+
+def inspect_breadth_first(registry: ClassRegistry, class_paths: List[str],
+                          budget: Budget, not_founds: List[str]):
+    """
+    Inspect given classes and their ancestors into `registry` breadth first
+    until `budget` is exhausted.  Class paths left are recorded in
+    `budget.truncated`.
+
+    The registry is reordered at the end so parents precede their children
+    as usual.
+
+    :param registry: ClassRegistry object
+    :param class_paths: Given class paths in priority order
+    :param budget: Budget object
+    :param not_founds: List to append not found paths to
+    """
+    queue: Deque[Union[str, type]] = deque(class_paths)
+    queued = set()
+    inspected: List[ClassInspector] = []
+
+    while queue:
+        if budget.exhausted(len(registry)):
+            break
+
+        item = queue.popleft()
+        try:
+            klass = resolve_type(item)
+        except ClassNotFoundError as e:
+            not_founds.append(e.args[1])
+            continue
+
+        class_path = _class_path(klass)
+        if class_path in registry:
+            continue
+
+        inspector = ClassInspector(klass, registry, shallow=True)
+        registry[class_path] = inspector
+        inspected.append(inspector)
+
+        for parent in klass.__bases__:
+            parent_path = _class_path(parent)
+            if parent_path not in registry and parent_path not in queued:
+                queued.add(parent_path)
+                queue.append(parent)
+
+    for item in queue:
+        class_path = item if isinstance(item, str) else _class_path(item)
+        if class_path not in registry and class_path not in budget.truncated:
+            budget.truncated.append(class_path)
+
+    for inspector in inspected:
+        inspector.link_parents()
+
+    _reorder(registry)
+
+
+def _reorder(registry: ClassRegistry):
+    """
+    Reorder `registry` in place so parents precede their children.
+    """
+    ordered: List[Tuple[str, ClassInspector]] = []
+    visited = set()
+
+    def visit(klass: ClassInspector):
+        if klass.class_path in visited:
+            return
+        visited.add(klass.class_path)
+        for parent in klass.parents:
+            visit(parent)
+        ordered.append((klass.class_path, klass))
+
+    for klass in list(registry.values()):
+        visit(klass)
+
+    registry.clear()
+    registry.update(ordered)
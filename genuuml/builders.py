@@ -4,13 +4,19 @@ Source builders
 
 import re
 import textwrap
-from inspect import signature
 from operator import itemgetter
-from typing import Callable, Set, Dict
+from typing import (
+    TYPE_CHECKING, Set, Dict, Iterator, List, Optional, Sequence, Tuple)
 
 from tree_format import format_tree
 
 from .inspectors import ClassRegistry, ClassInspector
+from .graphs import InheritanceGraph
+from .fragments import FragmentCache
+from .imports import ModuleGraph
+
+if TYPE_CHECKING:
+    from .stubs import StubIndex
 
 
 class Builder:
@@ -27,6 +33,16 @@ class Builder:
         """
         raise NotImplementedError("Call after implemented")
 
+    def iter_build(self, registry: ClassRegistry) -> Iterator[str]:
+        """
+        Build the source and yield it chunk by chunk.
+        Builders that can emit their source incrementally override this,
+        others yield the whole source at once.
+
+        :param registry: ClassRegistry object to be built.
+        """
+        yield self.build(registry)
+
     def line(self, line: str, indent_level:int =0):
         """
         Return a line concated with indent, given line and linebreak.
@@ -49,7 +65,11 @@ class Builder:
         self.__indent = val
 
 
-class PlantUMLBuilder(Builder):
+class ClassDiagramBuilder(Builder):
+    """
+    Base of builders which print members of each class.
+    """
+
     def __init__(self,
                  indent: int = 2,
                  print_typehint: bool = False,
@@ -57,12 +77,10 @@ class PlantUMLBuilder(Builder):
                  print_full_arguments: bool = False,
                  max_arguments_width: int = 25,
                  print_builtins_members: bool = False,
-                 pre_script: str = (
-                         "@startuml\n"
-                         "\n"
-                         "hide empty members\n"
-                         "\n"),
-                 post_script: str = "@enduml\n"
+                 transitive_reduction: bool = False,
+                 collapse_object: bool = False,
+                 stub_index: Optional['StubIndex'] = None,
+                 fragment_cache: Optional[FragmentCache] = None,
                  ):
         super().__init__(indent)
         self.print_typehint = print_typehint
@@ -70,8 +88,10 @@ class PlantUMLBuilder(Builder):
         self.print_full_arguments = print_full_arguments
         self.max_arguments_width = max_arguments_width
         self.print_builtins_members = print_builtins_members
-        self.pre_script = pre_script
-        self.post_script = post_script
+        self.transitive_reduction = transitive_reduction
+        self.collapse_object = collapse_object
+        self.stub_index = stub_index
+        self.fragment_cache = fragment_cache
 
     @property
     def print_typehint(self) -> bool:
@@ -128,6 +148,182 @@ class PlantUMLBuilder(Builder):
     def print_builtins_members(self, val: bool):
         self._print_builtins_members = val
 
+    @property
+    def transitive_reduction(self) -> bool:
+        """
+        Switch for omitting relations implied by other relations.
+        """
+        return self._transitive_reduction
+
+    @transitive_reduction.setter
+    def transitive_reduction(self, val: bool):
+        self._transitive_reduction = val
+
+    @property
+    def collapse_object(self) -> bool:
+        """
+        Switch for omitting relations to builtins.object.
+        """
+        return self._collapse_object
+
+    @collapse_object.setter
+    def collapse_object(self, val: bool):
+        self._collapse_object = val
+
+    @property
+    def stub_index(self) -> Optional['StubIndex']:
+        """
+        StubIndex object to look signatures of builtin methods up
+        """
+        return self._stub_index
+
+    @stub_index.setter
+    def stub_index(self, val: Optional['StubIndex']):
+        self._stub_index = val
+
+    @property
+    def fragment_cache(self) -> Optional[FragmentCache]:
+        """
+        FragmentCache object to reuse rendered classes
+        """
+        return self._fragment_cache
+
+    @fragment_cache.setter
+    def fragment_cache(self, val: Optional[FragmentCache]):
+        self._fragment_cache = val
+
+    def _fragment_options(self) -> list:
+        """
+        Return the options rendered classes depend on.
+        """
+        return [self.indent, self.print_typehint, self.print_default_value,
+                self.print_full_arguments, self.max_arguments_width,
+                self.print_builtins_members]
+
+    def _cached_class(self, klass: ClassInspector, *args) -> str:
+        """
+        Return `_build_class(klass, *args)`, reusing the fragment in
+        `fragment_cache` if the class and the options are unchanged.
+        """
+        if self.fragment_cache is None:
+            return self._build_class(klass, *args)
+
+        key = self.fragment_cache.key(type(self).__name__,
+                                      self._fragment_options() + list(args),
+                                      klass, self.stub_index)
+        fragment = self.fragment_cache.get(key)
+        if fragment is None:
+            fragment = self._build_class(klass, *args)
+            self.fragment_cache.put(key, fragment)
+
+        return fragment
+
+    def _build_signature(self, source: str) -> str:
+        # Fixme: 変数名に使える値でちゃんと切ったほうがいい
+        if not self.print_typehint:
+            source = re.sub(r'\s*:\s*[^,)=]*', '', source)
+            source = re.sub(r'\s*->\s*[^,)=]*$', '', source)
+
+        # Fixme: 変数名に使える値でちゃんと切ったほうがいい
+        if not self.print_default_value:
+            source = re.sub(r'\s*=\s*[^.,)]*', '', source)
+
+        if not self.print_full_arguments:
+            mx = self.max_arguments_width
+            source = (source[:mx] + ' ... )') if len(source) > mx else source
+
+        return source
+
+
+    def _iter_members(self, klass: ClassInspector) -> Iterator:
+        """
+        Yield members of `klass` to be printed.
+
+        :param klass: ClassInspector object
+        :return: Tuples consisting with name, signature and static flag.
+                 Signature is None if the member is not a method.
+        """
+        if klass.module_path == object.__module__ and \
+                not self.print_builtins_members:
+            return
+
+        props = klass.data + klass.data_descriptors + klass.properties
+        methods = klass.static_methods + klass.class_methods + klass.methods
+        props.sort()
+        methods.sort()
+
+        # Fields keep their declaration order.
+        for field in klass.fields:
+            type_name = klass.field_type(field)
+            if self.print_typehint and type_name:
+                field += ": " + type_name
+            yield field, None, False
+        if klass.omitted_fields:
+            yield "... {} more".format(klass.omitted_fields), None, False
+
+        for member in props:
+            yield member, None, False
+
+        static_like_methods = klass.static_methods + klass.class_methods
+        for method in methods:
+            signature = self._build_signature(
+                klass.signature(method, self.stub_index))
+            yield method, signature, method in static_like_methods
+
+    def _build_relations(self, registry: ClassRegistry) -> Dict[str, List[str]]:
+        """
+        Return parent class paths of each class path.
+        Duplicated relations are removed, and relations are reduced
+        according to `transitive_reduction` and `collapse_object`.
+
+        :param registry: ClassRegistry object
+        :return: Dict consisting with class path and list of parent paths
+        """
+        relations = {class_path: [] for class_path in registry.keys()}
+        graph = InheritanceGraph(registry)
+        for child, parent in graph.edges(self.transitive_reduction,
+                                         self.collapse_object):
+            relations[child].append(parent)
+
+        return relations
+
+
+class PlantUMLBuilder(ClassDiagramBuilder):
+    def __init__(self,
+                 indent: int = 2,
+                 print_typehint: bool = False,
+                 print_default_value: bool = False,
+                 print_full_arguments: bool = False,
+                 max_arguments_width: int = 25,
+                 print_builtins_members: bool = False,
+                 transitive_reduction: bool = False,
+                 collapse_object: bool = False,
+                 stub_index: Optional['StubIndex'] = None,
+                 fragment_cache: Optional[FragmentCache] = None,
+                 pre_script: str = (
+                         "@startuml\n"
+                         "\n"
+                         "hide empty members\n"
+                         "\n"),
+                 post_script: str = "@enduml\n",
+                 group_by_package: bool = False,
+                 focus: Sequence[str] = (),
+                 ):
+        super().__init__(indent,
+                         print_typehint,
+                         print_default_value,
+                         print_full_arguments,
+                         max_arguments_width,
+                         print_builtins_members,
+                         transitive_reduction,
+                         collapse_object,
+                         stub_index,
+                         fragment_cache)
+        self.pre_script = pre_script
+        self.post_script = post_script
+        self.group_by_package = group_by_package
+        self.focus = focus
+
     @property
     def pre_script(self) -> str:
         """
@@ -152,36 +348,135 @@ class PlantUMLBuilder(Builder):
     def post_script(self, val: str):
         self._post_script = val
 
-    def build(self, registry: ClassRegistry) -> str:
-        source = self.pre_script
-        source += self._build_all_classes(registry)
-        source += self._build_all_relations(registry)
-        source += self.post_script
-
-        return source
+    @property
+    def group_by_package(self) -> bool:
+        """
+        Switch for nesting classes in package blocks by module path
+        """
+        return self._group_by_package
 
-    def _build_signature(self, method: Callable) -> str:
-        source = ""
-        try:
-            source = str(signature(method))
-        except ValueError:
-            source = "(...)"
+    @group_by_package.setter
+    def group_by_package(self, val: bool):
+        self._group_by_package = val
 
-        # Fixme: 変数名に使える値でちゃんと切ったほうがいい
-        if not self.print_typehint:
-            source = re.sub(r'\s*:\s*[^,)=]*', '', source)
-            source = re.sub(r'\s*->\s*[^,)=]*$', '', source)
+    @property
+    def focus(self) -> Sequence[str]:
+        """
+        Packages whose classes are printed.  Classes in other packages are
+        collapsed into a placeholder per package.  All classes are printed
+        if empty.
+        """
+        return self._focus
 
-        # Fixme: 変数名に使える値でちゃんと切ったほうがいい
-        if not self.print_default_value:
-            source = re.sub(r'\s*=\s*[^.,)]*', '', source)
+    @focus.setter
+    def focus(self, val: Sequence[str]):
+        self._focus = tuple(val)
 
-        if not self.print_full_arguments:
-            mx = self.max_arguments_width
-            source = (source[:mx] + ' ... )') if len(source) > mx else source
+    def build(self, registry: ClassRegistry) -> str:
+        return "".join(self.iter_build(registry))
+
+    def iter_build(self, registry: ClassRegistry) -> Iterator[str]:
+        yield self.pre_script
+        if self.group_by_package or self.focus:
+            yield from self._iter_grouped(registry)
+        else:
+            yield from self._iter_all_classes(registry)
+            yield self._build_all_relations(registry)
+        yield self.post_script
+
+    def _collapsed_package(self, class_path: str) -> Optional[str]:
+        """
+        Return the package the class is collapsed into, which is the
+        shortest package out of `focus`, or None if the class is in focus.
+
+        >>> builder = PlantUMLBuilder(focus=['app.models'])
+        >>> builder._collapsed_package('app.models.user.User') is None
+        True
+        >>> builder._collapsed_package('app.views.UserView')
+        'app.views'
+        >>> builder._collapsed_package('builtins.object')
+        'builtins'
+        """
+        if not self.focus:
+            return None
+
+        names = class_path.split('.')[:-1]
+        for depth in range(1, len(names) + 1):
+            package = '.'.join(names[:depth])
+            if any(package == focus or package.startswith(focus + '.')
+                   for focus in self.focus):
+                return None
+            if not any(focus.startswith(package + '.')
+                       for focus in self.focus):
+                return package
+
+        return None
+
+    def _iter_grouped(self, registry: ClassRegistry) -> Iterator[str]:
+        """
+        Yield classes in topological order, nested in package blocks if
+        `group_by_package` and with classes out of `focus` collapsed,
+        followed by the relations between those.
+        """
+        graph = InheritanceGraph(registry)
+        nodes: Dict[str, str] = {}
+        collapsed: Dict[str, int] = {}
+        # Package tree node: list of class paths and placeholders, and
+        # subpackage nodes by name.
+        root: Tuple[List[str], Dict] = ([], {})
+
+        def package_node(path: str) -> Tuple[List[str], Dict]:
+            node = root
+            if self.group_by_package:
+                for name in path.split('.')[:-1]:
+                    node = node[1].setdefault(name, ([], {}))
+            return node
+
+        for i in graph.topological_order():
+            class_path = graph.class_paths[i]
+            package = self._collapsed_package(class_path)
+            if package is None:
+                nodes[class_path] = class_path
+                if class_path in registry:
+                    package_node(class_path)[0].append(class_path)
+            else:
+                nodes[class_path] = package
+                if package not in collapsed:
+                    collapsed[package] = 0
+                    package_node(package)[0].append(package)
+                collapsed[package] += 1
+
+        def iter_package(node: Tuple[List[str], Dict],
+                         indent_level: int) -> Iterator[str]:
+            for path in node[0]:
+                if path in collapsed:
+                    count = collapsed[path]
+                    fragment = 'class "{} ({} class{})" as {} <<package>>\n\n'.format(
+                        path, count, "" if count == 1 else "es", path)
+                else:
+                    fragment = self._cached_class(registry[path])
+                yield textwrap.indent(fragment,
+                                      " " * self.indent * indent_level)
+            for name, subnode in node[1].items():
+                yield self.line("package {} {{".format(name), indent_level)
+                yield from iter_package(subnode, indent_level + 1)
+                yield self.line("}", indent_level) + "\n"
+
+        # Classes are grouped by the blocks, not by dots in their names.
+        yield "set namespaceSeparator none\n\n"
+        yield from iter_package(root, 0)
 
-        return source
+        source = ""
+        relations = set()
+        for child, parent in graph.edges(self.transitive_reduction,
+                                         self.collapse_object):
+            relation = (nodes[child], nodes[parent])
+            if relation[0] != relation[1] and relation not in relations:
+                relations.add(relation)
+                source += "{} -up-|> {}\n".format(*relation)
+        source += "\n"
 
+        yield source
 
     def _build_class(self, klass: ClassInspector) -> str:
         source = 'class {} as "{}"'.format(
@@ -190,48 +485,193 @@ class PlantUMLBuilder(Builder):
         )
         source += '{\n'
 
-        if not klass.module_path == object.__module__ or self.print_builtins_members:
-            props = klass.data + klass.data_descriptors + klass.properties
-            methods = klass.static_methods + klass.class_methods + klass.methods
-            props.sort()
-            methods.sort()
+        for member, signature, is_static in self._iter_members(klass):
+            line = "+" + member
+            if signature is not None:
+                line += signature
+            if is_static:
+                line = "{static}" + line
 
-            for member in props:
-                line = "+" + member
-                source += self.line(line, 1)
-
-            static_like_methods = klass.static_methods + klass.class_methods
-            for method in methods:
-                line = "+" + method + self._build_signature(getattr(klass.klass, method))
-                if method in static_like_methods:
-                    line = "{static}" + line
-
-                source += self.line(line, 1)
+            source += self.line(line, 1)
 
         source += "}\n\n"
 
         return source
 
+    def _iter_all_classes(self, registry: ClassRegistry) -> Iterator[str]:
+        for class_path in registry.keys():
+            klass = registry.get(class_path)
+            yield self._cached_class(klass)
+
     def _build_all_classes(self, registry: ClassRegistry) -> str:
+        return "".join(self._iter_all_classes(registry))
+
+    def _build_all_relations(self, registry: ClassRegistry) -> str:
         source = ""
 
+        for class_path, parents in self._build_relations(registry).items():
+            for parent_path in parents:
+                source += "{} -up-|> {}\n".format(class_path, parent_path)
+
+        source += "\n"
+
+        return source
+
+
+class DotBuilder(ClassDiagramBuilder):
+    """
+    Build class diagram in Graphviz DOT format.
+
+    Each class is emitted as a record node followed by the edges to its
+    parents, so the source can be streamed class by class.
+    """
+
+    def __init__(self,
+                 indent: int = 2,
+                 print_typehint: bool = False,
+                 print_default_value: bool = False,
+                 print_full_arguments: bool = False,
+                 max_arguments_width: int = 25,
+                 print_builtins_members: bool = False,
+                 transitive_reduction: bool = False,
+                 collapse_object: bool = False,
+                 stub_index: Optional['StubIndex'] = None,
+                 fragment_cache: Optional[FragmentCache] = None,
+                 graph_name: str = "genuuml",
+                 ):
+        super().__init__(indent,
+                         print_typehint,
+                         print_default_value,
+                         print_full_arguments,
+                         max_arguments_width,
+                         print_builtins_members,
+                         transitive_reduction,
+                         collapse_object,
+                         stub_index,
+                         fragment_cache)
+        self.graph_name = graph_name
+
+    @property
+    def graph_name(self) -> str:
+        """
+        Name of the digraph
+        """
+        return self._graph_name
+
+    @graph_name.setter
+    def graph_name(self, val: str):
+        self._graph_name = val
+
+    def build(self, registry: ClassRegistry) -> str:
+        return "".join(self.iter_build(registry))
+
+    def iter_build(self, registry: ClassRegistry) -> Iterator[str]:
+        yield "digraph {} {{\n".format(self._quote(self.graph_name))
+        yield self.line("rankdir=BT;", 1)
+        yield self.line("node [shape=record];", 1)
+        yield self.line("edge [arrowhead=empty];", 1)
+        yield "\n"
+
+        relations = self._build_relations(registry)
         for class_path in registry.keys():
-            klass = registry.get(class_path)
-            source += self._build_class(klass)
+            yield self._cached_class(registry.get(class_path),
+                                     relations[class_path])
+
+        yield "}\n"
+
+    @classmethod
+    def _quote(cls, val: str) -> str:
+        """
+        Return `val` as a quoted DOT ID.
+
+        >>> print(DotBuilder._quote('builtins.object'))
+        "builtins.object"
+        """
+        return '"' + val.replace('"', '\\"') + '"'
+
+    @classmethod
+    def _escape_record(cls, val: str) -> str:
+        r"""
+        Escape characters having special meaning in record labels.
+
+        >>> print(DotBuilder._escape_record('f(a={})'))
+        f(a=\{\})
+        """
+        return re.sub(r'([\\{}|<>])', r'\\\1', val)
+
+    def _build_class(self, klass: ClassInspector, parents: List[str]) -> str:
+        props = ""
+        methods = ""
+        for member, signature, is_static in self._iter_members(klass):
+            if signature is None:
+                props += self._escape_record("+" + member) + "\\l"
+            else:
+                line = "+" + member + signature
+                if is_static:
+                    line = "static " + line
+                methods += self._escape_record(line) + "\\l"
+
+        label = "{" + self._escape_record(klass.name)
+        if props or methods:
+            label += "|" + props + "|" + methods
+        label += "}"
+
+        source = self.line("{} [label={}];".format(
+            self._quote(klass.class_path), self._quote(label)), 1)
+
+        for parent_path in parents:
+            source += self.line("{} -> {};".format(
+                self._quote(klass.class_path),
+                self._quote(parent_path)), 1)
 
         return source
 
-    def _build_all_relations(self, registry: ClassRegistry) -> str:
-        source = ""
 
+class MermaidBuilder(ClassDiagramBuilder):
+    """
+    Build class diagram in Mermaid format.
+
+    Each class is emitted with the relations to its parents, so the source
+    can be streamed class by class.
+    """
+
+    def build(self, registry: ClassRegistry) -> str:
+        return "".join(self.iter_build(registry))
+
+    def iter_build(self, registry: ClassRegistry) -> Iterator[str]:
+        yield "classDiagram\n"
+
+        relations = self._build_relations(registry)
         for class_path in registry.keys():
-            klass = registry.get(class_path)
+            yield self._cached_class(registry.get(class_path),
+                                     relations[class_path])
 
-            for parent in klass.parents:
-                source += "{} -up-|> {}\n".format(
-                    klass.class_path, parent.class_path)
+    @classmethod
+    def _identifier(cls, class_path: str) -> str:
+        """
+        Return `class_path` converted into Mermaid class identifier.
 
-        source += "\n"
+        >>> MermaidBuilder._identifier('builtins.object')
+        'builtins_object'
+        """
+        return re.sub(r'\W', '_', class_path)
+
+    def _build_class(self, klass: ClassInspector, parents: List[str]) -> str:
+        identifier = self._identifier(klass.class_path)
+        source = self.line('class {}["{}"]'.format(identifier, klass.name), 1)
+
+        for member, signature, is_static in self._iter_members(klass):
+            line = "+" + member
+            if signature is not None:
+                line += signature
+            if is_static:
+                line += "$"
+
+            source += self.line("{} : {}".format(identifier, line), 1)
+
+        for parent_path in parents:
+            source += self.line("{} <|-- {}".format(
+                self._identifier(parent_path), identifier), 1)
 
         return source
 
@@ -283,12 +723,129 @@ class FilepathListBuilder(Builder):
 
         :param registry: ClassRegistry object to be built.
         """
-        source = ""
+        return "".join(self.iter_build(registry))
+
+    def iter_build(self, registry: ClassRegistry) -> Iterator[str]:
         for class_path, klass in registry.items():
-            if not getattr(klass.module, "__file__", None):
-                source += class_path + ": (no filepath)\n"
+            if not klass.file_path:
+                yield class_path + ": (no filepath)\n"
             else:
-                source += class_path + ":\n" + \
-                    self.line(klass.module.__file__, 1)
+                yield class_path + ":\n" + self.line(klass.file_path, 1)
 
-        return source
+
+class ComponentBuilder(Builder):
+    """
+    Build module import graph in PlantUML component diagram format.
+    """
+
+    def __init__(self,
+                 indent: int = 2,
+                 pre_script: str = "@startuml\n\n",
+                 post_script: str = "@enduml\n"):
+        super().__init__(indent)
+        self.pre_script = pre_script
+        self.post_script = post_script
+
+    @property
+    def pre_script(self) -> str:
+        """
+        Script that is printed before component definisions.
+        ex: @startuml
+        """
+        return self._pre_script
+
+    @pre_script.setter
+    def pre_script(self, val: str):
+        self._pre_script = val
+
+    @property
+    def post_script(self) -> str:
+        """
+        Script that is printed after component definisions.
+        ex: @enduml
+        """
+        return self._post_script
+
+    @post_script.setter
+    def post_script(self, val: str):
+        self._post_script = val
+
+    def build(self, graph: ModuleGraph) -> str:
+        """
+        Build the source and return.
+
+        :param graph: ModuleGraph object to be built.
+        """
+        return "".join(self.iter_build(graph))
+
+    def iter_build(self, graph: ModuleGraph) -> Iterator[str]:
+        yield self.pre_script
+
+        modules = list(graph.imports)
+        for imported in graph.imports.values():
+            modules.extend(module for module in imported
+                           if module not in graph.imports)
+        for module_path in dict.fromkeys(modules):
+            yield self.line("[{}]".format(module_path))
+        yield "\n"
+
+        for module_path, imported in graph.imports.items():
+            for target in imported:
+                yield self.line("[{}] --> [{}]".format(module_path, target))
+
+        yield "\n"
+        yield self.post_script
+
+
+class ImportTreeBuilder(Builder):
+    """
+    Build module import graph in Ascii Tree format.
+
+    Each tree starts from a module imported by no other module.  Modules
+    already printed are not expanded again, and marked with `...`.
+    """
+
+    def build(self, graph: ModuleGraph) -> str:
+        """
+        Build the source and return.
+
+        :param graph: ModuleGraph object to be built.
+        """
+        imported = {target for targets in graph.imports.values()
+                    for target in targets}
+        roots = [module_path for module_path in graph.imports
+                 if module_path not in imported] or list(graph.imports)[:1]
+
+        expanded: Set[str] = set()
+        sources = []
+        for root in roots:
+            tree = self._build_tree(root, graph, expanded)
+            sources.append(format_tree(
+                tree,
+                format_node=itemgetter(0),
+                get_children=itemgetter(1)
+            ))
+
+        # Modules only in import cycles are not reachable from roots.
+        for module_path in graph.imports:
+            if module_path not in expanded:
+                tree = self._build_tree(module_path, graph, expanded)
+                sources.append(format_tree(
+                    tree,
+                    format_node=itemgetter(0),
+                    get_children=itemgetter(1)
+                ))
+
+        return "\n".join(sources)
+
+    def _build_tree(self, root: str, graph: ModuleGraph,
+                    expanded: Set[str]) -> List:
+        targets = graph.imports.get(root, [])
+        if root in expanded and targets:
+            return [root + " ...", []]
+        expanded.add(root)
+
+        children = []
+        for target in targets:
+            children.append(self._build_tree(target, graph, expanded))
+        return [root, children]
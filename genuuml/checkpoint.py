@@ -0,0 +1,148 @@
+"""
+Checkpoints of registry builds
+
+A checkpoint directory holds a snapshot of the classes inspected so far and
+the state of the run::
+
+    registry.N.snapshot snapshot of the registry (see `genuuml.snapshot`)
+    state.json          given paths completed, paths not found and the
+                        name of the snapshot
+
+Each save writes the snapshot into a new file and then switches the state
+to it, since the snapshot loaded is kept mapped by the classes registered
+from it, and a mapped file can't be replaced on Windows.  Snapshots of
+earlier saves are removed once not mapped anymore.
+
+An interrupted `build_registry` run resumes from the checkpoint of the run
+with the same paths: classes in the snapshot are registered without being
+imported again, and completed paths are skipped.  Remove the directory to
+start over, e.g. after the sources changed.
+"""
+
+import json
+import os
+import re
+import time
+from typing import Any, List, Mapping, Set
+
+from .inspectors import ClassInspector, ClassRegistry
+from .outputs import write_if_changed
+from .snapshot import SnapshotError, SnapshotRegistry, iter_snapshot
+
+
+STATE_VERSION = 2
+
+SNAPSHOT_FILENAME = 'registry.{}.snapshot'
+SNAPSHOT_FILENAME_PATTERN = re.compile(r'registry\.\d+\.snapshot\Z')
+STATE_FILENAME = 'state.json'
+
+
+class Checkpoint:
+    """
+    Checkpoint directory of a registry build.
+
+    :param directory: Checkpoint directory.  Created if not exists.
+    :param interval: Minimum seconds between saves by `save_periodically`
+    :param key: JSON serializable value identifying the run, e.g. given
+                paths.  A checkpoint of other run is ignored.
+    """
+
+    def __init__(self, directory: str, interval: float = 60.0,
+                 key: Any = None):
+        self.directory = directory
+        self.interval = interval
+        self.key = key
+        self.completed: Set[str] = set()
+        self.not_founds: List[str] = []
+        # Number of the snapshot file the state refers to
+        self.generation = 0
+        self._saved_at = time.monotonic()
+
+        os.makedirs(directory, exist_ok=True)
+
+    @property
+    def snapshot_path(self) -> str:
+        return os.path.join(self.directory,
+                            SNAPSHOT_FILENAME.format(self.generation))
+
+    @property
+    def state_path(self) -> str:
+        return os.path.join(self.directory, STATE_FILENAME)
+
+    def load(self, registry: ClassRegistry) -> bool:
+        """
+        Register the classes in the checkpoint into `registry`, and restore
+        completed paths and not found paths.
+
+        :param registry: Empty ClassRegistry object
+        :return: False if there is no checkpoint of this run
+        """
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if state.get('version') != STATE_VERSION or \
+                state.get('key') != self.key:
+            return False
+
+        self.generation = state['generation']
+        try:
+            # Not closed, registered classes read it lazily.
+            snapshot = SnapshotRegistry(self.snapshot_path)
+        except (OSError, SnapshotError):
+            return False
+
+        # Snapshot records are in registry order, so parents precede their
+        # children.
+        registry.update(snapshot.items())
+        self.completed = set(state['completed'])
+        self.not_founds = state['not_founds']
+
+        return True
+
+    def complete(self, path: str, not_founds: List[str]):
+        """
+        Record that all classes of given `path` were inspected.
+        """
+        self.completed.add(path)
+        self.not_founds = not_founds
+
+    def save(self, registry: Mapping[str, ClassInspector]):
+        """
+        Save `registry` and the state.  The snapshot is written into a new
+        file before the state is switched to it, so the state never refers
+        to classes not saved, and the snapshot loaded is never replaced.
+        """
+        self.generation += 1
+        write_if_changed(self.snapshot_path, iter_snapshot(registry))
+        write_if_changed(self.state_path, json.dumps({
+            'version': STATE_VERSION,
+            'key': self.key,
+            'generation': self.generation,
+            'completed': sorted(self.completed),
+            'not_founds': self.not_founds,
+        }, indent=2))
+        self._saved_at = time.monotonic()
+        self._remove_snapshots()
+
+    def _remove_snapshots(self):
+        """
+        Remove snapshots other than the one the state refers to.  Those
+        still mapped can't be removed on Windows, and are left to later
+        saves.
+        """
+        current = os.path.basename(self.snapshot_path)
+        for name in os.listdir(self.directory):
+            if name != current and SNAPSHOT_FILENAME_PATTERN.match(name):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+
+    def save_periodically(self, registry: Mapping[str, ClassInspector]):
+        """
+        Save if `interval` seconds passed since the last save.
+        """
+        if time.monotonic() - self._saved_at >= self.interval:
+            self.save(registry)
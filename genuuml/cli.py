@@ -1,10 +1,33 @@
-from typing import List
+from contextlib import contextmanager
+from itertools import chain
+from typing import TYPE_CHECKING, IO, List, Iterable, Iterator, Optional
 from textwrap import indent
 
 import click
 
 from . import __version__
 from . import genuuml
+from .builders import (
+    Builder,
+    PlantUMLBuilder,
+    DotBuilder,
+    MermaidBuilder,
+    AsciiTreeBuilder,
+    FilepathListBuilder,
+    ComponentBuilder,
+    ImportTreeBuilder,
+)
+from .outputs import OutputSummary
+from .snapshot import SnapshotError, iter_snapshot
+from .metrics import METRICS, MetricsBuilder
+from .sources import GitError
+from .query import QueryError
+from .budget import Budget
+from .fragments import FragmentCache
+from .memory import MemoryReport, phase
+
+if TYPE_CHECKING:
+    from .stubs import StubIndex
 
 
 class AliasedGroup(click.Group):
@@ -87,6 +110,16 @@ def main():
         `in-` A part of command name matching more than one command is NG
 
     All subcommands receive CLASS_PATHS arguments.  CLASS_PATHS can be accepted that are class or module path, and those can be mixed.  When module path was given, it would be replaced into class paths defined in the module.
+
+    CLASS_PATHS can also be read line by line from a file or stdin by `--from-file FILE` or `--from-file -`.  Those are inspected as they are read, and classes are printed as soon as they are inspected where the format allows.
+
+    Paths of wheel, zip or tar archives are also accepted.  Classes defined in the archive are inspected by importing pure Python sources from the archive directly, without installing or extracting it.
+
+    Classes to be printed can be narrowed by `--query`, e.g. `--query 'subclass_of:Base and package:app.* and not has_method:save'`.  Predicates are subclass_of, package, name, has_method and has_attr, which accept glob patterns except subclass_of.
+
+    Classes can also be selected from a snapshot written by `in-snapshot` by `--snapshot FILE`, instead of importing and inspecting those, e.g. to query them repeatedly.  Module paths select the classes of the module recorded in the snapshot.
+
+    Large inspections can be bounded by `--max-classes` and `--time-budget`.  Given classes are inspected first and then their nearest ancestors, and classes left are listed on stderr.  Relations to those classes are left out of the diagram.
     """
     # Placeholder for subcommands
     pass
@@ -102,54 +135,470 @@ def _print_not_founds(not_founds: List[str]):
         click.echo("")
 
 
+def _print_output_summary(summary: OutputSummary):
+    for path in summary.changed:
+        click.secho("Changed: " + path, fg='green', err=True)
+    for path in summary.unchanged:
+        click.secho("Unchanged: " + path, fg='yellow', err=True)
+
+
+def _output(chunks: Iterable[str], output: Optional[str]):
+    """
+    Print source chunks, or write them into `output` if given.
+    """
+    if output is None:
+        for chunk in chunks:
+            click.echo(chunk, nl=False)
+        click.echo("")
+        return
+
+    summary = OutputSummary()
+    summary.write(output, chunks)
+    _print_output_summary(summary)
+
+
+@contextmanager
+def _handle_errors():
+    """
+    Report expected errors as usage errors instead of tracebacks.
+    """
+    try:
+        yield
+    except (GitError, QueryError, SnapshotError) as e:
+        raise click.ClickException(e.args[0])
+
+
+def _class_paths(class_paths: List[str],
+                 from_file: Optional[IO]) -> Iterable[str]:
+    """
+    Return given class paths followed by those read lazily from `from_file`
+    line by line.  Blank lines and lines starting with "#" are skipped.
+    """
+    if not class_paths and from_file is None:
+        raise click.UsageError("Missing argument 'CLASS_PATHS...' or option '--from-file'.")
+    if from_file is None:
+        return class_paths
+
+    paths = (line.strip() for line in from_file)
+
+    return chain(class_paths,
+                 (path for path in paths if path and not path.startswith('#')))
+
+
+def _print_truncated(budget: Optional[Budget]):
+    if budget is not None and budget.truncated:
+        click.secho("Budget exhausted, {} classes not inspected.".format(
+            len(budget.truncated)), fg='yellow', err=True)
+        for class_path in budget.truncated:
+            msg = indent("- " + class_path, "  ")
+            click.secho(msg, fg='yellow', err=True)
+        click.secho("=" * 60, fg='yellow', err=True)
+
+
+def _budget(kwargs: dict) -> Optional[Budget]:
+    """
+    Pop the budget options out of `kwargs`, and return Budget object if
+    those are given.  Registry options which can't be combined are reported
+    as usage errors.
+    """
+    max_classes = kwargs.pop('max_classes')
+    time_budget = kwargs.pop('time_budget')
+    if kwargs.get('snapshot') is not None and (
+            kwargs.get('rev') is not None or
+            kwargs.get('checkpoint') is not None or
+            max_classes is not None or time_budget is not None):
+        raise click.UsageError("--snapshot can't be combined with --rev, --checkpoint, --max-classes or --time-budget.")
+    if max_classes is None and time_budget is None:
+        return None
+    if kwargs.get('checkpoint') is not None:
+        raise click.UsageError("--checkpoint can't be combined with --max-classes or --time-budget.")
+
+    return Budget(max_classes, time_budget)
+
+
+@contextmanager
+def _memory_report(path: Optional[str]) -> Iterator[Optional[MemoryReport]]:
+    """
+    Yield MemoryReport object if `path` is given, and write the report into
+    `path` after the block.
+    """
+    if path is None:
+        yield None
+        return
+
+    report = MemoryReport()
+    try:
+        yield report
+    finally:
+        report.stop()
+    report.write(path)
+
+
+def _run(builder: Builder, class_paths: List[str], output: Optional[str],
+         from_file: Optional[IO] = None, memory_report: Optional[str] = None,
+         **kwargs):
+    """
+    Build source by `builder` and output it.
+
+    Paths given by `from_file` are inspected while outputting, so not found
+    paths are printed after the output.  With a budget or a memory report,
+    all paths are read first to inspect them at once.
+    """
+    class_paths = _class_paths(class_paths, from_file)
+    budget = _budget(kwargs)
+    if from_file is not None and budget is None and memory_report is None:
+        with _handle_errors():
+            chunks, not_founds = genuuml.build(builder, class_paths,
+                                               stream=True, **kwargs)
+            _output(chunks, output)
+
+        _print_not_founds(not_founds)
+        return
+
+    with _memory_report(memory_report) as report:
+        with _handle_errors():
+            chunks, not_founds = genuuml.build(builder, class_paths,
+                                               budget=budget,
+                                               memory_report=report,
+                                               **kwargs)
+
+        _print_not_founds(not_founds)
+        _print_truncated(budget)
+
+        # Chunks are built while being output.
+        with phase(report, 'build ' + type(builder).__name__):
+            _output(chunks, output)
+
+
+REGISTRY_OPTIONS = ('from_file', 'rev', 'repo', 'query', 'checkpoint',
+                    'checkpoint_interval', 'max_classes', 'time_budget',
+                    'memory_report', 'snapshot')
+
+
+def _pop_registry_options(kwargs: dict) -> dict:
+    """
+    Pop the options passed to `_run` to build registry out of `kwargs`.
+    """
+    return {name: kwargs.pop(name) for name in REGISTRY_OPTIONS}
+
+
+def _source_options(func):
+    """
+    Decorate a subcommand with the options selecting where modules are read
+    from.
+    """
+    options = [
+        click.option('--rev', default=None, help="Inspect modules of the git revision in the repository"),
+        click.option('--repo', default='.', type=click.Path(exists=True, file_okay=False), help="Local git repository for --rev"),
+    ]
+    for option in reversed(options):
+        func = option(func)
+
+    return func
+
+
+def _registry_options(func):
+    """
+    Decorate a subcommand with the options passed to `build_registry`.
+    Their names are listed in `REGISTRY_OPTIONS`.
+    """
+    options = [
+        click.option('--from-file', default=None, type=click.File('r'), help="Read class paths line by line from the file, or stdin if '-', in addition to CLASS_PATHS"),
+        click.option('-q', '--query', default=None, help="Select classes matching the query and their ancestors, e.g. 'subclass_of:Base and package:app.*'"),
+        click.option('--checkpoint', default=None, type=click.Path(file_okay=False, writable=True), help="Save progress into the directory periodically, and resume from it"),
+        click.option('--checkpoint-interval', default=60.0, type=float, help="Seconds between saves of --checkpoint"),
+        click.option('--max-classes', default=None, type=click.IntRange(min=1), help="Inspect at most the number of classes, given classes first and then their nearest ancestors"),
+        click.option('--time-budget', default=None, type=click.FloatRange(min=0), help="Stop inspecting classes after the seconds, given classes first and then their nearest ancestors"),
+        click.option('--memory-report', default=None, type=click.Path(dir_okay=False, writable=True), help="Trace memory allocations of each phase and write the report into the file in JSON"),
+        click.option('--snapshot', default=None, type=click.Path(exists=True, dir_okay=False), help="Select classes from the snapshot written by in-snapshot instead of importing and inspecting those"),
+    ]
+    for option in reversed(options):
+        func = option(func)
+
+    return _source_options(func)
+
+
+def _common_options(func):
+    """
+    Decorate a subcommand with the arguments and options shared by all
+    subcommands.
+    """
+    options = [
+        click.argument('class_paths', nargs=-1),
+        click.option('-o', '--output', default=None, type=click.Path(dir_okay=False, writable=True), help="Write into the file only when the content changed"),
+    ]
+    for option in reversed(options):
+        func = option(func)
+
+    return _registry_options(func)
+
+
+def _stub_options(func):
+    """
+    Decorate a subcommand with the options to look signatures up in stubs.
+    """
+    options = [
+        click.option('--stubs/--no-stubs', default=False, help="Toggle looking signatures of builtin methods up in installed stubs on/off"),
+        click.option('--stub-dir', 'stub_dirs', multiple=True, type=click.Path(exists=True, file_okay=False), help="Look signatures of builtin methods up in the stub directory"),
+    ]
+    for option in reversed(options):
+        func = option(func)
+
+    return func
+
+
+def _stub_index(stubs: bool, stub_dirs: List[str]) -> Optional['StubIndex']:
+    if not stubs and not stub_dirs:
+        return None
+
+    try:
+        from .stubs import StubIndex
+    except ImportError as e:
+        raise click.UsageError(e.args[0])
+
+    return StubIndex(stub_dirs, search_installed=stubs)
+
+
+def _fragment_cache(path: Optional[str]) -> Optional[FragmentCache]:
+    if path is None:
+        return None
+
+    cache = FragmentCache(path=path)
+    # Saved after the source is output.
+    click.get_current_context().call_on_close(cache.save)
+
+    return cache
+
+
+def _class_diagram_builder(builder_class, stubs: bool, stub_dirs: List[str],
+                           fragment_cache: Optional[str],
+                           **kwargs) -> Builder:
+    return builder_class(stub_index=_stub_index(stubs, stub_dirs),
+                         fragment_cache=_fragment_cache(fragment_cache),
+                         **kwargs)
+
+
+def _class_diagram_options(func):
+    """
+    Decorate a subcommand with the options shared by class diagram formats.
+    """
+    options = [
+        click.option('-i', '--indent', default=2, type=int, help="Set indent level"),
+        click.option('--print-typehint/--no-print-typehint', default=False, help="Toggle typehint on/off"),
+        click.option('--print-default-value/--no-print-default-value', default=False, help="Toggle default value in method's arguments on/off"),
+        click.option('--print-full-arguments/--no-print-full-arguments', default=False, help="Toggle full method's arguments on/off"),
+        click.option('--max-arguments-width', default=25, type=int, help="Method's arguments width"),
+        click.option('--print-builtins-members/--no-print-builtins-members', default=False, help="Toggle print members of builtin classes on/off"),
+        click.option('--transitive-reduction/--no-transitive-reduction', default=False, help="Toggle omitting relations implied by other relations on/off"),
+        click.option('--collapse-object/--no-collapse-object', default=False, help="Toggle omitting relations to builtins.object on/off"),
+        click.option('--fragment-cache', default=None, type=click.Path(dir_okay=False, writable=True), help="Reuse rendered classes cached in the file, and save them into it"),
+    ]
+    for option in reversed(options):
+        func = option(func)
+
+    return _stub_options(func)
+
+
 @main.command()
-@click.argument('class_paths', nargs=-1, required=True)
-@click.option('-i', '--indent', default=2, type=int, help="Set indent level")
-@click.option('--print-typehint/--no-print-typehint', default=False, help="Toggle typehint on/off")
-@click.option('--print-default-value/--no-print-default-value', default=False, help="Toggle default value in method's arguments on/off")
-@click.option('--print-full-arguments/--no-print-full-arguments', default=False, help="Toggle full method's arguments on/off")
-@click.option('--max-arguments-width', default=25, type=int, help="Method's arguments width")
-@click.option('--print-builtins-members/--no-print-builtins-members', default=False, help="Toggle print members of builtin classes on/off")
-def in_plant_uml(class_paths, indent, print_typehint, print_default_value,
-                 print_full_arguments, max_arguments_width, print_builtins_members):
+@_common_options
+@_class_diagram_options
+@click.option('--group-by-package/--no-group-by-package', default=False, help="Toggle nesting classes in package blocks by module path on/off")
+@click.option('--focus', multiple=True, help="Print classes of the package only, and collapse other packages into placeholders.  Can be given more than once")
+def in_plant_uml(class_paths, output, **kwargs):
     """
     Print in PlantUML format.
     """
-    source, not_founds = genuuml.in_plant_uml(class_paths, indent,
-                                              print_typehint, print_default_value,
-                                              print_full_arguments, max_arguments_width,
-                                              print_builtins_members
-                                              )
+    registry_options = _pop_registry_options(kwargs)
+    _run(_class_diagram_builder(PlantUMLBuilder, **kwargs), class_paths, output,
+         **registry_options)
 
-    _print_not_founds(not_founds)
 
-    click.echo(source)
+@main.command()
+@_common_options
+@_class_diagram_options
+def in_dot(class_paths, output, **kwargs):
+    """
+    Print in Graphviz DOT format.
+    """
+    registry_options = _pop_registry_options(kwargs)
+    _run(_class_diagram_builder(DotBuilder, **kwargs), class_paths, output,
+         **registry_options)
 
 
 @main.command()
-@click.argument('class_paths', nargs=-1, required=True)
-def in_ascii_tree(class_paths):
+@_common_options
+@_class_diagram_options
+def in_mermaid(class_paths, output, **kwargs):
+    """
+    Print in Mermaid format.
+    """
+    registry_options = _pop_registry_options(kwargs)
+    _run(_class_diagram_builder(MermaidBuilder, **kwargs), class_paths, output,
+         **registry_options)
+
+
+@main.command()
+@_common_options
+def in_ascii_tree(class_paths, output, **kwargs):
     """
     Print in Ascii Tree format.
     """
-    source, not_founds = genuuml.in_ascii_tree(class_paths)
+    _run(AsciiTreeBuilder(), class_paths, output, **kwargs)
+
+
+@main.command()
+@_common_options
+def in_filepath_list(class_paths, output, **kwargs):
+    """
+    Print in Filepath list format.
+    """
+    _run(FilepathListBuilder(), class_paths, output, **kwargs)
+
+
+@main.command()
+@click.argument('module_paths', nargs=-1, required=True)
+@click.option('-o', '--output', default=None, type=click.Path(dir_okay=False, writable=True), help="Write into the file only when the content changed")
+@_source_options
+@click.option('-f', '--format', 'output_format', default='plantuml', type=click.Choice(['plantuml', 'tree']), help="Output format")
+@click.option('--external/--no-external', 'include_external', default=False, help="Toggle imports of modules not given on/off")
+@click.option('-j', '--jobs', default=None, type=int, help="Number of processes to scan sources.  Number of CPUs by default")
+def in_import_graph(module_paths, output, output_format, **kwargs):
+    """
+    Print module import graph of given modules and their submodules.
+    """
+    builder = ComponentBuilder() if output_format == 'plantuml' \
+        else ImportTreeBuilder()
+
+    with _handle_errors():
+        graph, not_founds = genuuml.build_import_graph(module_paths, **kwargs)
 
     _print_not_founds(not_founds)
 
-    click.echo(source)
+    _output(builder.iter_build(graph), output)
 
 
 @main.command()
-@click.argument('class_paths', nargs=-1, required=True)
-def in_filepath_list(class_paths):
+@_common_options
+@click.option('-f', '--format', 'output_format', default='csv', type=click.Choice(['csv', 'json']), help="Output format")
+@click.option('--sort-by', default=None, type=click.Choice(METRICS), help="Sort rows by the metric in descending order")
+def in_metrics(class_paths, output, output_format, sort_by, **kwargs):
     """
-    Print in Filepath list format.
+    Print inheritance metrics of each class in CSV or JSON format.
+    """
+    _run(MetricsBuilder(output_format, sort_by), class_paths, output, **kwargs)
+
+
+CLASS_DIAGRAM_FORMATS = {
+    'plantuml': PlantUMLBuilder,
+    'dot': DotBuilder,
+    'mermaid': MermaidBuilder,
+}
+
+OTHER_FORMATS = {
+    'ascii-tree': AsciiTreeBuilder,
+    'filepath-list': FilepathListBuilder,
+    'metrics-csv': lambda: MetricsBuilder('csv'),
+    'metrics-json': lambda: MetricsBuilder('json'),
+}
+
+FORMAT_ALIASES = {
+    'puml': 'plantuml',
+    'tree': 'ascii-tree',
+    'files': 'filepath-list',
+    'metrics': 'metrics-csv',
+}
+
+
+def _parse_formats(ctx, param, values) -> List:
+    """
+    Parse `NAME=PATH` values of `--format` into (format, path) pairs.
+    """
+    formats = []
+    for value in values:
+        name, sep, path = value.partition('=')
+        name = FORMAT_ALIASES.get(name, name)
+        if not sep or not path:
+            raise click.BadParameter("Expected NAME=PATH: " + value)
+        if name not in CLASS_DIAGRAM_FORMATS and name not in OTHER_FORMATS:
+            raise click.BadParameter("Unknown format '{}', choose from {}".format(
+                name, ", ".join(list(CLASS_DIAGRAM_FORMATS) + list(OTHER_FORMATS))))
+        if path in (p for _, p in formats):
+            raise click.BadParameter("Path given twice: " + path)
+        formats.append((name, path))
+
+    return formats
+
+
+@main.command()
+@click.argument('class_paths', nargs=-1)
+@click.option('-f', '--format', 'formats', multiple=True, required=True, callback=_parse_formats, metavar='NAME=PATH', help="Write the format into the path, e.g. plantuml=out.puml.  Can be given more than once.  Formats are plantuml, dot, mermaid, ascii-tree (tree), filepath-list (files), metrics-csv (metrics) and metrics-json")
+@click.option('--concurrent/--no-concurrent', default=False, help="Toggle building the formats concurrently in threads on/off")
+@_registry_options
+@_class_diagram_options
+def in_formats(class_paths, formats, concurrent, **kwargs):
     """
-    source, not_founds = genuuml.in_filepath_list(class_paths)
+    Write several formats at once from one registry build.
+
+    Given classes are inspected once, and the formats are built from the
+    same registry.
+    """
+    registry_options = _pop_registry_options(kwargs)
+    from_file = registry_options.pop('from_file')
+    stub_index = _stub_index(kwargs.pop('stubs'), kwargs.pop('stub_dirs'))
+    fragment_cache = _fragment_cache(kwargs.pop('fragment_cache'))
+
+    builders = {}
+    for name, _ in formats:
+        if name in CLASS_DIAGRAM_FORMATS:
+            builders[name] = CLASS_DIAGRAM_FORMATS[name](
+                stub_index=stub_index, fragment_cache=fragment_cache,
+                **kwargs)
+        else:
+            builders[name] = OTHER_FORMATS[name]()
+
+    budget = _budget(registry_options)
+    with _memory_report(registry_options.pop('memory_report')) as report:
+        with _handle_errors():
+            sources, not_founds = genuuml.build_many(
+                builders, _class_paths(class_paths, from_file),
+                max_workers=len(builders) if concurrent else 1,
+                budget=budget, memory_report=report, **registry_options)
 
     _print_not_founds(not_founds)
+    _print_truncated(budget)
+
+    summary = OutputSummary()
+    for name, path in formats:
+        summary.write(path, sources[name])
+    _print_output_summary(summary)
 
-    click.echo(source)
+
+@main.command()
+@click.argument('class_paths', nargs=-1)
+@click.option('-o', '--output', required=True, type=click.Path(dir_okay=False, writable=True), help="Write into the file only when the content changed")
+@_registry_options
+@_stub_options
+def in_snapshot(class_paths, output, from_file, stubs, stub_dirs, **kwargs):
+    """
+    Write registry snapshot in binary format.
+
+    The snapshot can be memory-mapped by `genuuml.snapshot.SnapshotRegistry`.
+    """
+    budget = _budget(kwargs)
+    with _memory_report(kwargs.pop('memory_report')) as report:
+        with _handle_errors():
+            registry, not_founds = genuuml.build_registry(
+                _class_paths(class_paths, from_file), budget=budget,
+                memory_report=report, **kwargs)
+
+        _print_not_founds(not_founds)
+        _print_truncated(budget)
+
+        summary = OutputSummary()
+        with phase(report, 'write snapshot'):
+            summary.write(output, iter_snapshot(registry,
+                                                _stub_index(stubs, stub_dirs)))
+        _print_output_summary(summary)
 
 
 if __name__=='__main__':
@@ -0,0 +1,314 @@
+"""
+Member extractors
+
+Extractors recognise kinds of classes which keep their fields in
+precomputed metadata, such as dataclasses, and read the fields from it
+directly.  Members of those classes are classified from their own
+`__dict__` without the generic `pydoc.classify_class_attrs`, and the members
+generated from the fields are skipped.
+
+`ClassInspector` uses the first extractor in `EXTRACTORS` matching the class.
+Custom extractors can be inserted into the list.
+"""
+
+import enum
+import inspect
+import os
+import sys
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+try:
+    import dataclasses
+except ImportError:
+    # New in Python 3.7.  Dataclasses can't be defined without the module
+    # on older versions, unless by the backport providing it.
+    dataclasses = None
+
+
+# Members generated by dataclasses and attrs, unless written by the user
+GENERATED_METHODS = {
+    '__init__', '__repr__', '__eq__', '__ne__', '__hash__',
+    '__lt__', '__le__', '__gt__', '__ge__',
+    '__setattr__', '__delattr__', '__getstate__', '__setstate__',
+    '__match_args__', '__slots__',
+}
+
+
+def type_name(annotation: Any) -> str:
+    """
+    Return readable name of type annotation.
+
+    >>> type_name(int)
+    'int'
+    >>> from typing import List
+    >>> type_name(List[int])
+    'List[int]'
+    >>> type_name('Foo')
+    'Foo'
+    """
+    if annotation is None or annotation is inspect.Parameter.empty:
+        return ""
+    if isinstance(annotation, str):
+        return annotation
+    if isinstance(annotation, type) and \
+            not getattr(annotation, '__args__', None):
+        return annotation.__qualname__
+
+    return repr(annotation).replace('typing.', '')
+
+
+def classify_own_attrs(klass: type, skip: Set[str]) -> List:
+    """
+    Classify attributes defined by `klass` itself like
+    `classify_class_public_attrs`, except for the names in `skip`.
+
+    :param klass: Class object
+    :param skip: Names not to be classified
+    :return: List of attributes consisting with name, kind and value
+    """
+    # Imported here as inspectors import this module.
+    from .inspectors import visiblename
+
+    attrs = []
+    for name, value in klass.__dict__.items():
+        if name in skip or not visiblename(name, obj=klass):
+            continue
+
+        if isinstance(value, staticmethod):
+            kind = 'static method'
+        elif isinstance(value, classmethod):
+            kind = 'class method'
+        elif isinstance(value, property):
+            kind = 'property'
+        elif inspect.isroutine(value):
+            kind = 'method'
+        elif inspect.isdatadescriptor(value):
+            kind = 'data descriptor'
+        else:
+            kind = 'data'
+        attrs.append((name, kind, value))
+
+    return attrs
+
+
+def is_generated(klass: type, value: Any) -> bool:
+    """
+    Return True unless `value` is a function written in the module of
+    `klass`.  Functions generated by dataclasses and attrs are compiled from
+    strings, and helpers of other libraries live in their own modules.
+
+    :param klass: Class object
+    :param value: Value in `klass.__dict__`
+    """
+    if isinstance(value, (staticmethod, classmethod)):
+        value = value.__func__
+    code = getattr(inspect.unwrap(value), '__code__', None) \
+        if callable(value) else None
+    if code is None:
+        return True
+
+    module = sys.modules.get(klass.__module__)
+    filename = getattr(module, '__file__', None)
+
+    return filename is None or \
+        os.path.abspath(code.co_filename) != os.path.abspath(filename)
+
+
+class Extracted:
+    """
+    Members extracted from a class.
+
+    :param fields: Field names and their types
+    :param attrs: Other attributes consisting with name, kind and value
+    :param omitted: Number of fields not listed in `fields`
+    """
+
+    def __init__(self, fields: List[Tuple[str, str]], attrs: List,
+                 omitted: int = 0):
+        self.fields = fields
+        self.attrs = attrs
+        self.omitted = omitted
+
+
+class Extractor:
+    """
+    Base class of extractors.
+
+    Subclasses implement `match` and `fields`, and list members generated
+    from the fields in `generated`.
+    """
+
+    generated: Set[str] = set()
+
+    def match(self, klass: type) -> bool:
+        raise NotImplementedError()
+
+    def skipped(self, klass: type) -> Set[str]:
+        """
+        Return the names in `generated` which `klass` didn't define by
+        itself.
+        """
+        return {name for name in self.generated
+                if name in klass.__dict__
+                and is_generated(klass, klass.__dict__[name])}
+
+    def fields(self, klass: type) -> List[Tuple[str, str]]:
+        """
+        Return names and types of the fields defined by `klass` itself.
+        """
+        raise NotImplementedError()
+
+    def extract(self, klass: type) -> Extracted:
+        fields = self.fields(klass)
+        skip = self.skipped(klass) | {name for name, _ in fields}
+
+        return Extracted(fields, classify_own_attrs(klass, skip))
+
+
+def _own_annotations(klass: type) -> Dict[str, Any]:
+    return klass.__dict__.get('__annotations__', {})
+
+
+class DataclassExtractor(Extractor):
+
+    generated = GENERATED_METHODS | {
+        '__dataclass_fields__', '__dataclass_params__'}
+
+    def match(self, klass: type) -> bool:
+        return dataclasses is not None and \
+            '__dataclass_fields__' in klass.__dict__
+
+    def fields(self, klass: type) -> List[Tuple[str, str]]:
+        own = _own_annotations(klass)
+        # `dataclasses.fields` omits ClassVar and InitVar pseudo-fields.
+        return [(field.name, type_name(field.type))
+                for field in dataclasses.fields(klass) if field.name in own]
+
+
+class AttrsExtractor(Extractor):
+
+    generated = GENERATED_METHODS | {
+        '__attrs_attrs__', '__attrs_own_setattr__'}
+
+    def match(self, klass: type) -> bool:
+        return '__attrs_attrs__' in klass.__dict__
+
+    def fields(self, klass: type) -> List[Tuple[str, str]]:
+        return [(attribute.name, type_name(attribute.type))
+                for attribute in klass.__attrs_attrs__
+                if not getattr(attribute, 'inherited', False)]
+
+
+class NamedTupleExtractor(Extractor):
+
+    generated = {
+        '__new__', '__repr__', '__getnewargs__', '__slots__',
+        '__match_args__', '__orig_bases__',
+        '_fields', '_field_defaults', '_make', '_replace', '_asdict',
+        '_source',
+    }
+
+    def match(self, klass: type) -> bool:
+        return issubclass(klass, tuple) and '_fields' in klass.__dict__
+
+    def fields(self, klass: type) -> List[Tuple[str, str]]:
+        annotations = _own_annotations(klass)
+        return [(name, type_name(annotations.get(name)))
+                for name in klass._fields]
+
+
+class EnumExtractor(Extractor):
+    """
+    List enum members as fields typed by their value type.  Members over
+    `max_members` are summarised as the omitted count.
+    """
+
+    generated = {
+        '__new__', '_generate_next_value_', '_new_member_', '_use_args_',
+        '_member_names_', '_member_map_', '_value2member_map_',
+        '_unhashable_values_', '_member_type_', '_value_repr_',
+    }
+
+    def __init__(self, max_members: int = 50):
+        self.max_members = max_members
+
+    def match(self, klass: type) -> bool:
+        # Base enums without members are inspected as usual classes.
+        return isinstance(klass, enum.EnumMeta) and bool(klass.__members__)
+
+    def fields(self, klass: type) -> List[Tuple[str, str]]:
+        return [(name, type(member.value).__name__)
+                for name, member in klass.__members__.items()]
+
+    def extract(self, klass: type) -> Extracted:
+        fields = self.fields(klass)
+        skip = self.skipped(klass) | {name for name, _ in fields}
+        attrs = classify_own_attrs(klass, skip)
+
+        omitted = max(len(fields) - self.max_members, 0)
+        if omitted:
+            fields = fields[:self.max_members]
+
+        return Extracted(fields, attrs, omitted)
+
+
+class PydanticExtractor(Extractor):
+    """
+    Extract fields of pydantic models, version 2 (`model_fields`) or
+    version 1 (`__fields__`).
+    """
+
+    generated = {
+        '__fields__', '__fields_set__', '__validators__', '__config__',
+        '__class_vars__', '__private_attributes__', '__signature__',
+        '__abstractmethods__', '_abc_impl', '__hash__', '__schema_cache__',
+        '__json_encoder__', '__exclude_fields__', '__include_fields__',
+        '__custom_root_type__', '__pre_root_validators__',
+        '__post_root_validators__',
+    }
+
+    def match(self, klass: type) -> bool:
+        return isinstance(klass.__dict__.get('__pydantic_fields__',
+                                             klass.__dict__.get('__fields__')),
+                          dict)
+
+    def fields(self, klass: type) -> List[Tuple[str, str]]:
+        own = _own_annotations(klass)
+        fields = klass.__dict__.get('__pydantic_fields__',
+                                    klass.__dict__.get('__fields__'))
+        return [(name, type_name(getattr(field, 'annotation',
+                                         getattr(field, 'outer_type_', None))))
+                for name, field in fields.items() if name in own]
+
+    def extract(self, klass: type) -> Extracted:
+        fields = self.fields(klass)
+        skip = self.skipped(klass) | {name for name, _ in fields}
+        # Pydantic keeps its metadata in names with these prefixes.
+        skip |= {name for name in klass.__dict__
+                 if name.startswith(('__pydantic_', 'model_'))}
+
+        return Extracted(fields, classify_own_attrs(klass, skip))
+
+
+EXTRACTORS: List[Extractor] = [
+    DataclassExtractor(),
+    AttrsExtractor(),
+    NamedTupleExtractor(),
+    EnumExtractor(),
+    PydanticExtractor(),
+]
+
+
+def find_extractor(klass: type) -> Optional[Extractor]:
+    """
+    Return the first extractor in `EXTRACTORS` matching `klass`.
+    """
+    for extractor in EXTRACTORS:
+        try:
+            if extractor.match(klass):
+                return extractor
+        except Exception:
+            # Classes may have unusual `__dict__` or metaclasses.
+            continue
+
+    return None
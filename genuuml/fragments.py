@@ -0,0 +1,175 @@
+"""
+Rendered fragment cache
+
+Class diagram builders render each class into a fragment, which depends
+only on the inspected content of the class and the builder options.
+`FragmentCache` keeps those fragments keyed by a digest of both, so builds
+of unchanged classes with the same options concatenate cached fragments
+instead of formatting members and signatures again.
+
+Keys are computed without looking signatures up.  Those are identified by
+the digest of the source file of the class instead, or the interpreter
+version for builtin classes, and the stub file they may be looked up in.
+
+The cache is an in-memory LRU, which can be persisted into a JSON file to
+be shared by later builds.
+"""
+
+import hashlib
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, Iterable, Optional, Tuple
+
+from .inspectors import ClassInspector
+from .outputs import file_digest, write_if_changed
+
+if TYPE_CHECKING:
+    from .stubs import StubIndex
+
+
+# Bump when rendered fragments change to invalidate persisted caches.
+CACHE_VERSION = 2
+
+
+class FragmentCache:
+    """
+    LRU cache of rendered fragments.
+
+    :param max_size: Maximum number of fragments kept
+    :param path: JSON file to load fragments from and save them into.
+                 Fragments are kept only in memory if None.
+    """
+
+    def __init__(self, max_size: int = 4096, path: Optional[str] = None):
+        self.max_size = max_size
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._fragments: 'OrderedDict[str, str]' = OrderedDict()
+        # Digests by path, with the mtime and size they were computed at
+        self._digests: Dict[str, Tuple[int, int, str]] = {}
+        self._stubs: Dict[Tuple['StubIndex', str], Optional[str]] = {}
+        self._lock = threading.Lock()
+
+        if path is not None:
+            self.load()
+
+    def key(self, builder: str, options: Iterable, klass: ClassInspector,
+            stub_index: Optional['StubIndex'] = None) -> str:
+        """
+        Return a digest of the content of `klass` and the options.
+
+        :param builder: Name of the builder
+        :param options: Builder options and other values the fragment
+                        depends on
+        :param klass: ClassInspector or SnapshotClass object
+        :param stub_index: StubIndex object to look signatures up
+        :return: Hex digest
+        """
+        stub = None
+        if stub_index is not None:
+            stub = self._stub_digest(stub_index, klass.module_path)
+
+        content = [
+            CACHE_VERSION, builder, list(options),
+            klass.class_path, klass.name,
+            [[field, klass.field_type(field)] for field in klass.fields],
+            klass.omitted_fields,
+            klass.data, klass.data_descriptors, klass.properties,
+            klass.static_methods, klass.class_methods, klass.methods,
+            self._digest(klass.file_path) or sys.version, stub,
+        ]
+
+        return hashlib.sha256(json.dumps(content).encode('utf-8')).hexdigest()
+
+    def _digest(self, path: Optional[str]) -> Optional[str]:
+        """
+        Return digest of the file at `path`, computed again only if its
+        mtime or size changed.  None if the file doesn't exist.
+        """
+        if not path:
+            return None
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+
+        entry = self._digests.get(path)
+        if entry is None or entry[:2] != (stat.st_mtime_ns, stat.st_size):
+            entry = (stat.st_mtime_ns, stat.st_size, file_digest(path))
+            self._digests[path] = entry
+
+        return entry[2]
+
+    def _stub_digest(self, stub_index: 'StubIndex',
+                     module_path: str) -> Optional[str]:
+        key = (stub_index, module_path)
+        if key not in self._stubs:
+            self._stubs[key] = stub_index.find_stub(module_path)
+
+        return self._digest(self._stubs[key])
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            fragment = self._fragments.get(key)
+            if fragment is None:
+                self.misses += 1
+                return None
+
+            self._fragments.move_to_end(key)
+            self.hits += 1
+
+            return fragment
+
+    def put(self, key: str, fragment: str):
+        with self._lock:
+            self._fragments[key] = fragment
+            self._fragments.move_to_end(key)
+            while len(self._fragments) > self.max_size:
+                self._fragments.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._fragments)
+
+    def load(self) -> bool:
+        """
+        Load fragments from `path`.  Fragments of other cache version are
+        ignored.
+
+        :return: False if there is no valid cache file
+        """
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                cached = json.load(f)
+            if cached['version'] != CACHE_VERSION:
+                return False
+            fragments = cached['fragments']
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+
+        with self._lock:
+            # Saved from the least recently used.
+            for key, fragment in fragments:
+                self._fragments[key] = fragment
+            while len(self._fragments) > self.max_size:
+                self._fragments.popitem(last=False)
+
+        return True
+
+    def save(self):
+        """
+        Save fragments into `path`, if the content changed.
+        """
+        if self.path is None:
+            return
+
+        with self._lock:
+            fragments = list(self._fragments.items())
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        write_if_changed(self.path, json.dumps(
+            {'version': CACHE_VERSION, 'fragments': fragments}))
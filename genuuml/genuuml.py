@@ -2,14 +2,31 @@
 Genuuml Application module
 """
 
-from typing import List
+from contextlib import ExitStack
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator, List, Mapping, Optional, Sequence, Union
 from importlib import import_module
 
 import click
 
-from .inspectors import ClassRegistry, ClassNotFoundError
+from .inspectors import ClassRegistry, ClassNotFoundError, StreamingRegistry
+from .imports import ModuleGraph, find_modules, tree_modules
+from .query import Query, select
+from .checkpoint import Checkpoint
+from .budget import Budget, inspect_breadth_first
+from .memory import MemoryReport, phase
+from .snapshot import SnapshotRegistry
+from .sources import (
+    GitRevisionTree,
+    is_archive_path,
+    open_archive,
+    mount,
+)
 from .builders import (
+    Builder,
     PlantUMLBuilder,
+    DotBuilder,
+    MermaidBuilder,
     AsciiTreeBuilder,
     FilepathListBuilder
 )
@@ -33,7 +50,7 @@ def module_path_to_class_path(paths: List[str]) -> List[str]:
             for member in dir(module):
                 # check members
                 klass = getattr(module, member)
-                if type(klass) == type:
+                if isinstance(klass, type):
                     # Collect class path if the member is a class.
                     class_path = klass.__module__ + '.' + klass.__name__
                     class_paths.append(class_path)
@@ -46,24 +63,298 @@ def module_path_to_class_path(paths: List[str]) -> List[str]:
     return class_paths
 
 
-def build_registry(class_paths: List[str]) -> List:
+def build_registry(class_paths: Iterable[str],
+                   rev: Optional[str] = None,
+                   repo: str = '.',
+                   query: Union[str, Query, None] = None,
+                   checkpoint: Union[str, Checkpoint, None] = None,
+                   checkpoint_interval: float = 60.0,
+                   stream: bool = False,
+                   budget: Optional[Budget] = None,
+                   memory_report: Optional[MemoryReport] = None,
+                   snapshot: Union[str, SnapshotRegistry, None] = None) -> List:
     """
     Helper function.
     Build and return ClassRegistry instance.
 
-    :param class_paths: Class path list.
+    Paths of wheel, zip or tar archives are replaced into the classes defined
+    in the archive, which are imported from the archive directly.
+
+    :param class_paths: Class path list, or iterable of class paths read
+                        lazily.
+    :param rev: Git revision to import modules of `repo` from, instead of
+                the working tree or installed packages.
+    :param repo: Local git repository
+    :param query: Selection query of the classes to be registered.
+                  See `genuuml.query`.
+    :param checkpoint: Directory to save the progress into periodically.
+                       The run resumes from the checkpoint saved by the
+                       interrupted run.  See `genuuml.checkpoint`.  Paths
+                       read lazily are read at once to identify the run.
+    :param checkpoint_interval: Seconds between saves of the checkpoint
+    :param stream: Return StreamingRegistry, which inspects `class_paths`
+                   while being iterated.  Ignored if `query`, `checkpoint`,
+                   `budget` or `memory_report` is given, as those need all
+                   classes.
+                   Not found paths are known after the iteration.
+    :param budget: Budget object limiting classes to be inspected.  Classes
+                   are inspected in priority order, and those not inspected
+                   are recorded in `budget.truncated`.  See `genuuml.budget`.
+    :param memory_report: MemoryReport object to record allocations of
+                          inspecting and selecting classes into, and bytes
+                          retained by the inspectors.  Implies eager build.
+    :param snapshot: Registry snapshot, or path of it, to select the classes
+                     from instead of importing and inspecting those.  Module
+                     paths select the classes of the module recorded in the
+                     snapshot.  Implies eager build.
     :return: list consisting with ClassRegistry object and not found path list
     """
-    class_paths = module_path_to_class_path(class_paths)
-    registry = ClassRegistry()
+    if budget is not None and checkpoint is not None:
+        raise ValueError("Checkpoint can't be combined with budget.")
+    if snapshot is not None and (rev is not None or checkpoint is not None or
+                                 budget is not None):
+        raise ValueError(
+            "Snapshot can't be combined with rev, checkpoint or budget.")
+
+    if isinstance(query, str):
+        # Parse before inspecting to report syntax errors early.
+        query = Query(query)
+
+    # Checkpoints are saved by iterating the registry, which can't be done
+    # while the registry is being fed.
+    eager = query is not None or checkpoint is not None or \
+        budget is not None or memory_report is not None
     not_founds = []
+    if snapshot is not None:
+        if isinstance(snapshot, str):
+            # Kept mapped as long as the classes selected refer to it.
+            snapshot = SnapshotRegistry(snapshot)
+        with phase(memory_report, 'load snapshot'):
+            registry = _select_snapshot(snapshot, class_paths, not_founds)
+    else:
+        registry = StreamingRegistry() if stream and not eager \
+            else ClassRegistry()
+        feed = _iter_inspect(registry, class_paths, not_founds, rev, repo,
+                             checkpoint, checkpoint_interval, budget)
+
+        if isinstance(registry, StreamingRegistry):
+            registry.feed(feed)
+            return [registry, not_founds]
+
+        with phase(memory_report, 'inspect'):
+            for _ in feed:
+                pass
+
+    if query is not None:
+        with phase(memory_report, 'select'):
+            registry = select(registry, query)
+
+    if memory_report is not None:
+        memory_report.measure_registry(registry)
+
+    return [registry, not_founds]
+
+
+def _select_snapshot(snapshot: SnapshotRegistry, class_paths: Iterable[str],
+                     not_founds: List[str]) -> ClassRegistry:
+    """
+    Return a registry of the classes of `snapshot` given by class paths or
+    module paths and their ancestors, in the order `build_registry`
+    registers them.  Nothing is imported.
+    """
+    registry = ClassRegistry()
+    modules = None
+
+    def visit(klass):
+        if klass.class_path in registry:
+            return
+        for parent in klass.parents:
+            visit(parent)
+        registry[klass.class_path] = klass
+
+    for path in class_paths:
+        if path in snapshot:
+            visit(snapshot[path])
+            continue
+
+        if modules is None:
+            modules = {}
+            for klass in snapshot.values():
+                modules.setdefault(klass.module_path, []).append(klass)
+        if path not in modules:
+            not_founds.append(path)
+        for klass in modules.get(path, []):
+            visit(klass)
+
+    return registry
+
+
+def _iter_inspect(registry: ClassRegistry,
+                  class_paths: Iterable[str],
+                  not_founds: List[str],
+                  rev: Optional[str],
+                  repo: str,
+                  checkpoint: Union[str, Checkpoint, None],
+                  checkpoint_interval: float,
+                  budget: Optional[Budget] = None) -> Iterator[None]:
+    """
+    Inspect given paths into `registry` one by one, yielding after each.
+    See `build_registry` for the parameters.
+    """
+    if checkpoint is not None and not isinstance(class_paths, Sequence):
+        # The checkpoint is identified by all of the paths.
+        class_paths = list(class_paths)
+
+    with ExitStack() as stack:
+        key = {'class_paths': list(class_paths)
+               if isinstance(class_paths, Sequence) else None}
+        if rev is not None:
+            tree = stack.enter_context(GitRevisionTree(rev, repo))
+            stack.enter_context(mount(tree))
+            key['rev'] = tree.commit
+
+        if budget is not None:
+            # All classes are given priorities at once, so archives are kept
+            # mounted until those are inspected.
+            budget.start()
+            requested = []
+            for path in class_paths:
+                if is_archive_path(path):
+                    archive = stack.enter_context(open_archive(path))
+                    finder = stack.enter_context(mount(archive))
+                    requested.extend(finder.class_paths(not_founds))
+                else:
+                    requested.extend(module_path_to_class_path([path]))
+            inspect_breadth_first(registry, requested, budget, not_founds)
+            yield
+            return
+
+        if isinstance(checkpoint, str):
+            checkpoint = Checkpoint(checkpoint, checkpoint_interval, key=key)
+        if checkpoint is not None and checkpoint.load(registry):
+            not_founds.extend(checkpoint.not_founds)
+
+        try:
+            for path in class_paths:
+                if checkpoint is not None and path in checkpoint.completed:
+                    continue
+
+                if is_archive_path(path):
+                    with open_archive(path) as archive, \
+                            mount(archive) as finder:
+                        _inspect_all(registry, finder.class_paths(not_founds),
+                                     not_founds)
+                else:
+                    _inspect_all(registry, module_path_to_class_path([path]),
+                                 not_founds)
+
+                if checkpoint is not None:
+                    checkpoint.complete(path, not_founds)
+                    checkpoint.save_periodically(registry)
+
+                yield
+        finally:
+            if checkpoint is not None:
+                checkpoint.save(registry)
+
+
+def _inspect_all(registry: ClassRegistry, class_paths: List[str],
+                 not_founds: List[str]):
     for path in class_paths:
         try:
             registry.inspect(path)
         except ClassNotFoundError as e:
             not_founds.append(e.args[1])
 
-    return [registry, not_founds]
+
+def build_import_graph(module_paths: List[str],
+                       rev: Optional[str] = None,
+                       repo: str = '.',
+                       include_external: bool = False,
+                       jobs: Optional[int] = None) -> List:
+    """
+    Helper function.
+    Build and return ModuleGraph instance of given modules and their
+    submodules.  Sources are scanned without importing those.
+
+    Paths of wheel, zip or tar archives are replaced into all modules in the
+    archive.
+
+    :param module_paths: Module path list.
+    :param rev: Git revision to read modules of `repo` from.
+    :param repo: Local git repository
+    :param include_external: Include imports of modules not scanned
+    :param jobs: Number of worker processes to scan sources
+    :return: list consisting with ModuleGraph object and not found path list
+    """
+    if rev is not None:
+        with GitRevisionTree(rev, repo) as tree:
+            modules, not_founds = tree_modules(tree, module_paths)
+    else:
+        archive_paths = [path for path in module_paths
+                         if is_archive_path(path)]
+        modules, not_founds = find_modules(
+            [path for path in module_paths if path not in archive_paths])
+        for archive_path in archive_paths:
+            with open_archive(archive_path) as tree:
+                modules.extend(tree_modules(tree)[0])
+
+    graph = ModuleGraph.scan(modules, include_external, jobs)
+
+    return [graph, not_founds]
+
+
+def build(builder: Builder, class_paths: List[str], **kwargs) -> List:
+    """
+    Helper function.
+    Build registry from given class paths and return the source chunks
+    built by `builder`.
+
+    The registry is built eagerly, while the chunks are built lazily as the
+    returned iterator is consumed.
+
+    :param builder: Builder object
+    :param class_paths: List of class paths and module paths
+    :param kwargs: Passed to `build_registry`
+    :return: Iterator of source chunks and not found path list
+    """
+    registry, not_founds = build_registry(class_paths, **kwargs)
+
+    return [builder.iter_build(registry), not_founds]
+
+
+def build_many(builders: Mapping[str, Builder], class_paths: List[str],
+               max_workers: int = 1, **kwargs) -> List:
+    """
+    Helper function.
+    Build registry from given class paths once, and return the sources
+    built by each of `builders`.
+
+    :param builders: Builder objects by name
+    :param class_paths: List of class paths and module paths
+    :param max_workers: Number of threads building the sources concurrently
+    :param kwargs: Passed to `build_registry`
+    :return: Dict of sources by name and not found path list
+    """
+    # Builders iterate the registry independently, so it can't be streamed.
+    kwargs.pop('stream', None)
+    registry, not_founds = build_registry(class_paths, **kwargs)
+    memory_report = kwargs.get('memory_report')
+
+    if max_workers > 1 and len(builders) > 1:
+        with phase(memory_report, 'build'), \
+                ThreadPoolExecutor(max_workers) as executor:
+            futures = {name: executor.submit(builder.build, registry)
+                       for name, builder in builders.items()}
+            sources = {name: future.result()
+                       for name, future in futures.items()}
+    else:
+        sources = {}
+        for name, builder in builders.items():
+            with phase(memory_report, 'build ' + name):
+                sources[name] = builder.build(registry)
+
+    return [sources, not_founds]
 
 
 def in_plant_uml(class_paths: List[str],
@@ -73,6 +364,8 @@ def in_plant_uml(class_paths: List[str],
                  print_full_arguments: bool,
                  max_arguments_width: int,
                  print_builtins_members: int,
+                 transitive_reduction: bool = False,
+                 collapse_object: bool = False,
                  ) -> List:
     """
     Return source in plant uml format by inspecting given class paths.
@@ -80,7 +373,6 @@ def in_plant_uml(class_paths: List[str],
     :param class_paths: List of class paths and module paths
     :return: Source in plant uml format and not found path list
     """
-    registry, not_founds = build_registry(class_paths)
     builder = PlantUMLBuilder(
         indent=indent,
         print_typehint=print_typehint,
@@ -88,8 +380,75 @@ def in_plant_uml(class_paths: List[str],
         print_full_arguments=print_full_arguments,
         max_arguments_width=max_arguments_width,
         print_builtins_members=print_builtins_members,
+        transitive_reduction=transitive_reduction,
+        collapse_object=collapse_object,
+    )
+    chunks, not_founds = build(builder, class_paths)
+    source = "".join(chunks)
+
+    return [source, not_founds]
+
+
+def in_dot(class_paths: List[str],
+           indent: int,
+           print_typehint: bool,
+           print_default_value: bool,
+           print_full_arguments: bool,
+           max_arguments_width: int,
+           print_builtins_members: int,
+           transitive_reduction: bool = False,
+           collapse_object: bool = False,
+           ) -> List:
+    """
+    Return source in Graphviz DOT format by inspecting given class paths.
+
+    :param class_paths: List of class paths and module paths
+    :return: Source in DOT format and not found path list
+    """
+    builder = DotBuilder(
+        indent=indent,
+        print_typehint=print_typehint,
+        print_default_value=print_default_value,
+        print_full_arguments=print_full_arguments,
+        max_arguments_width=max_arguments_width,
+        print_builtins_members=print_builtins_members,
+        transitive_reduction=transitive_reduction,
+        collapse_object=collapse_object,
+    )
+    chunks, not_founds = build(builder, class_paths)
+    source = "".join(chunks)
+
+    return [source, not_founds]
+
+
+def in_mermaid(class_paths: List[str],
+               indent: int,
+               print_typehint: bool,
+               print_default_value: bool,
+               print_full_arguments: bool,
+               max_arguments_width: int,
+               print_builtins_members: int,
+               transitive_reduction: bool = False,
+               collapse_object: bool = False,
+               ) -> List:
+    """
+    Return source in Mermaid format by inspecting given class paths.
+
+    :param class_paths: List of class paths and module paths
+    :return: Source in Mermaid format and not found path list
+    """
+    builder = MermaidBuilder(
+        indent=indent,
+        print_typehint=print_typehint,
+        print_default_value=print_default_value,
+        print_full_arguments=print_full_arguments,
+        max_arguments_width=max_arguments_width,
+        print_builtins_members=print_builtins_members,
+        transitive_reduction=transitive_reduction,
+        collapse_object=collapse_object,
     )
-    source = builder.build(registry)
+    chunks, not_founds = build(builder, class_paths)
+    source = "".join(chunks)
 
     return [source, not_founds]
 
@@ -101,9 +460,9 @@ def in_ascii_tree(class_paths: List[str]) -> List:
     :param class_paths: List of class paths and module paths
     :return: Source in ascii tree format and not found path list
     """
-    registry, not_founds = build_registry(class_paths)
     builder = AsciiTreeBuilder()
-    source = builder.build(registry)
+    chunks, not_founds = build(builder, class_paths)
+    source = "".join(chunks)
 
     return [source, not_founds]
 
@@ -115,8 +474,8 @@ def in_filepath_list(class_paths: List[str]) -> List:
     :param class_paths: List of class paths and module paths
     :return: Source in ascii tree format and not found path list
     """
-    registry, not_founds = build_registry(class_paths)
     builder = FilepathListBuilder()
-    source = builder.build(registry)
+    chunks, not_founds = build(builder, class_paths)
+    source = "".join(chunks)
 
     return [source, not_founds]
@@ -0,0 +1,136 @@
+"""
+Inheritance graphs
+"""
+
+from typing import Dict, Iterator, List, Mapping, Set, Tuple
+
+from .inspectors import ClassInspector
+
+
+OBJECT_CLASS_PATH = 'builtins.object'
+
+
+class InheritanceGraph:
+    """
+    Inheritance graph of the classes in a registry.
+
+    Classes are indexed by integers in registry order, and edges are held as
+    adjacency lists of those indexes, so graph algorithms don't need to hash
+    class paths nor walk `ClassInspector.parents` repeatedly.
+    Parents which are not in the registry are appended as extra nodes.
+    """
+
+    def __init__(self, registry: Mapping[str, ClassInspector]):
+        self.class_paths: List[str] = list(registry.keys())
+        self.index: Dict[str, int] = {
+            class_path: i for i, class_path in enumerate(self.class_paths)}
+        self.parents: List[List[int]] = []
+
+        for class_path in list(self.class_paths):
+            indexes = []
+            for parent in registry[class_path].parents:
+                i = self._node(parent.class_path)
+                # Dedupe edges keeping the order of bases.
+                if i not in indexes:
+                    indexes.append(i)
+            self.parents.append(indexes)
+
+        # Extra nodes have no known parents.
+        self.parents.extend(
+            [] for _ in range(len(self.class_paths) - len(self.parents)))
+
+    def __len__(self) -> int:
+        return len(self.class_paths)
+
+    def _node(self, class_path: str) -> int:
+        i = self.index.get(class_path)
+        if i is None:
+            i = len(self.class_paths)
+            self.index[class_path] = i
+            self.class_paths.append(class_path)
+
+        return i
+
+    def children(self) -> List[List[int]]:
+        """
+        Return adjacency lists from parent to children.
+        """
+        children: List[List[int]] = [[] for _ in range(len(self))]
+        for child, parents in enumerate(self.parents):
+            for parent in parents:
+                children[parent].append(child)
+
+        return children
+
+    def topological_order(self) -> List[int]:
+        """
+        Return node indexes ordered so that parents precede their children.
+        Nodes keep registry order as far as possible.
+        """
+        children = self.children()
+        pending = [len(parents) for parents in self.parents]
+        order = [i for i in range(len(self)) if not pending[i]]
+
+        # `order` is extended while iterating (Kahn's algorithm).
+        for i in order:
+            for child in children[i]:
+                pending[child] -= 1
+                if not pending[child]:
+                    order.append(child)
+
+        return order
+
+    def ancestors(self) -> List[Set[int]]:
+        """
+        Return ancestor index sets of each node.
+        """
+        ancestors: List[Set[int]] = [set() for _ in range(len(self))]
+        for i in self.topological_order():
+            for parent in self.parents[i]:
+                ancestors[i].add(parent)
+                ancestors[i] |= ancestors[parent]
+
+        return ancestors
+
+    def reduced_parents(self,
+                        transitive_reduction: bool = False,
+                        collapse_object: bool = False) -> List[List[int]]:
+        """
+        Return parent adjacency lists with redundant edges removed.
+
+        :param transitive_reduction: Drop an edge to a parent which is also
+                                     an ancestor of another parent.
+        :param collapse_object: Drop edges to `builtins.object`.
+        :return: Parent index lists of each node
+        """
+        parents = self.parents
+
+        if transitive_reduction:
+            ancestors = self.ancestors()
+            reduced = []
+            for indexes in parents:
+                if len(indexes) > 1:
+                    redundant = set().union(*(ancestors[i] for i in indexes))
+                    indexes = [i for i in indexes if i not in redundant]
+                reduced.append(indexes)
+            parents = reduced
+
+        if collapse_object:
+            obj = self.index.get(OBJECT_CLASS_PATH)
+            parents = [[i for i in indexes if i != obj] for indexes in parents]
+
+        return parents
+
+    def edges(self,
+              transitive_reduction: bool = False,
+              collapse_object: bool = False) -> Iterator[Tuple[str, str]]:
+        """
+        Yield (child class path, parent class path) of the reduced edges in
+        registry order.
+
+        See `reduced_parents` for the parameters.
+        """
+        parents = self.reduced_parents(transitive_reduction, collapse_object)
+        for child, indexes in enumerate(parents):
+            for parent in indexes:
+                yield self.class_paths[child], self.class_paths[parent]
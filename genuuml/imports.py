@@ -0,0 +1,211 @@
+"""
+Module import graphs
+
+Sources are scanned with `ast` without importing the modules, in parallel
+worker processes.
+"""
+
+import ast
+import os
+import pkgutil
+from concurrent.futures import ProcessPoolExecutor
+from importlib.util import find_spec
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from .sources import SourceTree
+
+
+# Imports found in a module.  Each one consists with the imported module
+# path and names imported from it by `from ... import ...`.
+Imports = List[Tuple[str, List[str]]]
+
+# Source of a module: module path, package flag, and file path or source.
+ModuleSource = Tuple[str, bool, Union[str, bytes]]
+
+
+def scan_imports(module_path: str, is_package: bool,
+                 source: Union[str, bytes]) -> Imports:
+    """
+    Return imports in `source`, with relative imports resolved.
+
+    >>> scan_imports('pkg.mod', False, 'import os.path\\nfrom . import sub')
+    [('os.path', []), ('pkg', ['sub'])]
+    """
+    package = module_path if is_package else module_path.rpartition('.')[0]
+    imports: Imports = []
+
+    for node in ast.walk(ast.parse(source)):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                imports.append((alias.name, []))
+
+        elif isinstance(node, ast.ImportFrom):
+            base = node.module or ""
+            if node.level:
+                parts = package.split('.')
+                if node.level > 1:
+                    parts = parts[:-(node.level - 1)]
+                base = '.'.join(parts + ([base] if base else []))
+            if base:
+                imports.append((base, [alias.name for alias in node.names]))
+
+    return imports
+
+
+def _scan(module: ModuleSource) -> Imports:
+    module_path, is_package, source = module
+    if isinstance(source, str):
+        with open(source, 'rb') as f:
+            source = f.read()
+
+    try:
+        return scan_imports(module_path, is_package, source)
+    except (SyntaxError, ValueError):
+        return []
+
+
+def find_modules(module_paths: Iterable[str]) -> Tuple[List[ModuleSource],
+                                                        List[str]]:
+    """
+    Find source files of `module_paths` and all their submodules.
+    Only parent packages are imported to find the specs.
+
+    :param module_paths: Module paths
+    :return: Module sources and not found module paths
+    """
+    modules: Dict[str, ModuleSource] = {}
+    not_founds = []
+
+    def walk(directory: str, prefix: str):
+        for info in pkgutil.iter_modules([directory], prefix):
+            name = info.name.rpartition('.')[2]
+            if info.ispkg:
+                path = os.path.join(directory, name, '__init__.py')
+            else:
+                path = os.path.join(directory, name + '.py')
+            if not os.path.isfile(path) or info.name in modules:
+                continue
+            modules[info.name] = (info.name, info.ispkg, path)
+            if info.ispkg:
+                walk(os.path.join(directory, name), info.name + '.')
+
+    for module_path in module_paths:
+        try:
+            spec = find_spec(module_path)
+        except (ImportError, ValueError):
+            spec = None
+        if spec is None or not (spec.origin or "").endswith('.py'):
+            not_founds.append(module_path)
+            continue
+
+        is_package = spec.submodule_search_locations is not None
+        modules[module_path] = (module_path, is_package, spec.origin)
+        if is_package:
+            for location in spec.submodule_search_locations:
+                walk(location, module_path + '.')
+
+    return list(modules.values()), not_founds
+
+
+def tree_modules(tree: SourceTree,
+                 module_paths: Optional[Iterable[str]] = None
+                 ) -> Tuple[List[ModuleSource], List[str]]:
+    """
+    Return sources of modules in `tree`.
+
+    :param tree: SourceTree object
+    :param module_paths: Module paths to select with their submodules.
+                         All modules are selected if None.
+    :return: Module sources and not found module paths
+    """
+    modules = tree.modules()
+    selected = list(modules)
+    not_founds = []
+    if module_paths is not None:
+        module_paths = list(module_paths)
+        not_founds = [path for path in module_paths if path not in modules]
+        selected = [name for name in modules
+                    if any(name == path or name.startswith(path + '.')
+                           for path in module_paths)]
+
+    sources = []
+    for name in selected:
+        source_path, is_package = modules[name]
+        if source_path is not None:
+            sources.append((name, is_package, tree.read(source_path)))
+
+    return sources, not_founds
+
+
+class ModuleGraph:
+    """
+    Import dependencies between modules.
+    """
+
+    def __init__(self):
+        # Module path to imported module paths, in scanned order.
+        self.imports: Dict[str, List[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self.imports)
+
+    def add(self, module_path: str, imported: List[str]):
+        self.imports[module_path] = imported
+
+    @classmethod
+    def scan(cls, modules: List[ModuleSource],
+             include_external: bool = False,
+             jobs: Optional[int] = None) -> 'ModuleGraph':
+        """
+        Scan imports of `modules` in parallel and return the graph.
+
+        :param modules: Module sources
+        :param include_external: Include imported modules not in `modules`,
+                                 collapsed into their top-level packages
+        :param jobs: Number of worker processes.  Scanned in this process if
+                     1.  Number of CPUs is used if None.
+        """
+        jobs = jobs or os.cpu_count() or 1
+        if jobs == 1 or len(modules) < jobs * 4:
+            scanned = list(map(_scan, modules))
+        else:
+            with ProcessPoolExecutor(max_workers=jobs) as executor:
+                chunksize = max(1, len(modules) // (jobs * 4))
+                scanned = list(executor.map(_scan, modules,
+                                            chunksize=chunksize))
+
+        known = {module[0] for module in modules}
+        graph = cls()
+        for (module_path, _, _), imports in zip(modules, scanned):
+            imported: List[str] = []
+            for base, names in imports:
+                targets = [base + '.' + name for name in names
+                           if base + '.' + name in known] or [base]
+                for target in targets:
+                    target = _resolve(target, known, include_external)
+                    if target is not None and target != module_path and \
+                            target not in imported:
+                        imported.append(target)
+            graph.add(module_path, imported)
+
+        return graph
+
+
+def _resolve(target: str, known: set, include_external: bool
+             ) -> Optional[str]:
+    """
+    Return the nearest known module containing `target`, or its top-level
+    package if external.
+
+    >>> _resolve('pkg.mod.attr', {'pkg', 'pkg.mod'}, False)
+    'pkg.mod'
+    >>> _resolve('os.path', {'pkg'}, True)
+    'os'
+    """
+    module_path = target
+    while module_path:
+        if module_path in known:
+            return module_path
+        module_path = module_path.rpartition('.')[0]
+
+    return target.split('.', 1)[0] if include_external else None
@@ -2,19 +2,36 @@
 Inspectors
 """
 
-import abc
 import inspect
 import re
-from types import ModuleType
+import threading
+from concurrent.futures import Future
+from types import BuiltinFunctionType, ModuleType
 from importlib import import_module
 from pydoc import locate, classify_class_attrs
-from typing import List, Union
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Union
+
+from .extractors import find_extractor
+
+if TYPE_CHECKING:
+    from .stubs import StubIndex
 
 
 class ClassNotFoundError(ImportError):
     pass
 
 
+# Types of functions implemented in C.  `types` names those other than
+# BuiltinFunctionType only from Python 3.7.
+BUILTIN_CALLABLE_TYPES = (
+    BuiltinFunctionType,
+    type(dict.__dict__['fromkeys']),  # ClassMethodDescriptorType
+    type(str.join),  # MethodDescriptorType
+    type(object().__str__),  # MethodWrapperType
+    type(object.__init__),  # WrapperDescriptorType
+)
+
+
 def resolve_type(klass: Union[type, object, str]) -> type:
     """
     Return a type instance.
@@ -30,13 +47,14 @@ def resolve_type(klass: Union[type, object, str]) -> type:
     :return: Type instance of `klass`
     """
     resolved_class = klass.__class__
-    if type(klass) in [type, abc.ABCMeta]:
+    if isinstance(klass, type):
+        # Including classes of other metaclasses, e.g. enums.
         resolved_class = klass
 
     elif type(klass) == str:
         resolved_class = locate(klass)
 
-    if not type(resolved_class) in [type, abc.ABCMeta]:
+    if not isinstance(resolved_class, type):
         raise ClassNotFoundError("Class not found. [{}]".format(klass),
                                  klass)
 
@@ -160,12 +178,33 @@ class ClassInspector:
     def data(self) -> List[str]:
         return self._data
 
+    @property
+    def fields(self) -> List[str]:
+        """
+        Field names read by the extractor, e.g. fields of dataclass
+        """
+        return self._fields
+
+    @property
+    def omitted_fields(self) -> int:
+        """
+        Number of fields not listed in `fields`, e.g. members of large enum
+        """
+        return self._omitted_fields
+
     @property
     def parents(self) -> List['ClassInspector']:
         return self._parents
 
     def __init__(self, klass: Union[type, object, str],
-                 registry: 'ClassRegistry'):
+                 registry: 'ClassRegistry',
+                 shallow: bool = False):
+        """
+        :param klass: Type instance, object or class path
+        :param registry: ClassRegistry to register parents into
+        :param shallow: Don't inspect parents.  Those are set from the
+                        registry by `link_parents` later.
+        """
         self._klass = resolve_type(klass)
         self._registry = registry
         self._module = locate(self.klass.__module__)
@@ -176,13 +215,28 @@ class ClassInspector:
         self._methods = []
         self._data_descriptors = []
         self._data = []
+        self._fields = []
+        self._field_types: Dict[str, str] = {}
+        self._omitted_fields = 0
 
         self._parents = []
 
-        for parent in self.klass.__bases__:
-            self.parents.append(self.registry.inspect(parent))
-
-        attrs = classify_class_public_attrs(self.klass)
+        if not shallow:
+            for parent in self.klass.__bases__:
+                self.parents.append(self.registry.inspect(parent))
+
+        extractor = find_extractor(self.klass)
+        if extractor is None:
+            attrs = classify_class_public_attrs(self.klass)
+        else:
+            # Fields are read from the metadata of the class, and members
+            # generated from those are skipped.
+            extracted = extractor.extract(self.klass)
+            for name, type_name in extracted.fields:
+                self._fields.append(name)
+                self._field_types[name] = type_name
+            self._omitted_fields = extracted.omitted
+            attrs = extracted.attrs
 
         for name, kind, value in attrs:
             if kind == 'class method':
@@ -205,6 +259,51 @@ class ClassInspector:
         self.data.sort()
 
 
+    def link_parents(self):
+        """
+        Set parents from the classes in the registry.  Parents not in the
+        registry are left out.
+        """
+        class_paths = [parent.__module__ + '.' + parent.__name__
+                       for parent in self.klass.__bases__]
+        self._parents = [self.registry[class_path]
+                         for class_path in class_paths
+                         if class_path in self.registry]
+
+    def field_type(self, name: str) -> str:
+        """
+        Return type name of the field `name`, or "" if not annotated.
+        """
+        return self._field_types.get(name, "")
+
+    def signature(self, name: str,
+                  stub_index: Optional['StubIndex'] = None) -> str:
+        """
+        Return signature string of the method `name`.
+
+        Builtin methods which have no `__text_signature__` are looked up in
+        `stub_index` without trying `inspect.signature`, which would fail.
+        If the signature can't be found, return "(...)".
+
+        :param name: Method name
+        :param stub_index: StubIndex object to look signatures up
+        :return: Signature string
+        """
+        method = getattr(self.klass, name)
+        if not (isinstance(method, BUILTIN_CALLABLE_TYPES) and
+                getattr(method, '__text_signature__', None) is None):
+            try:
+                return str(inspect.signature(method))
+            except ValueError:
+                pass
+
+        source = None
+        if stub_index is not None:
+            source = stub_index.signature(
+                self.module_path, self.klass.__qualname__, name)
+
+        return source or "(...)"
+
     def __str__(self) -> str:
         return self.class_path if self.class_path else "(empty)"
 
@@ -219,6 +318,19 @@ class ClassInspector:
 
 
 class ClassRegistry(dict):
+    """
+    Registry of inspected classes keyed by class path.
+
+    `inspect` is safe to call from multiple threads.  Each class is inspected
+    exactly once: a thread requesting a class being inspected by another
+    thread waits for it, and classes are registered only after they have been
+    inspected completely, so readers never observe half-built inspectors.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, Future] = {}
 
     def inspect(self, klass: Union[type, object, str]) -> ClassInspector:
         """
@@ -228,9 +340,103 @@ class ClassRegistry(dict):
         resolved_class = resolve_type(klass) 
         class_path = resolved_class.__module__ + '.' + resolved_class.__name__
 
-        if self.get(class_path, None) is None:
+        inspected_class = self.get(class_path, None)
+        if inspected_class is not None:
+            return inspected_class
+
+        with self._lock:
+            inspected_class = self.get(class_path, None)
+            if inspected_class is not None:
+                return inspected_class
+
+            future = self._in_flight.get(class_path)
+            owner = future is None
+            if owner:
+                future = self._in_flight[class_path] = Future()
+
+        if not owner:
+            # Inheritance has no cycle, so waiting for other thread can't
+            # dead lock.
+            return future.result()
+
+        try:
             inspected_class = ClassInspector(resolved_class, self)
+        except BaseException as e:
+            with self._lock:
+                del self._in_flight[class_path]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
             self[class_path] = inspected_class
+            del self._in_flight[class_path]
+        future.set_result(inspected_class)
+
+        return inspected_class
+
+
+class StreamingRegistry(ClassRegistry):
+    """
+    Registry filled while being iterated.
+
+    Iterating keys, values or items yields the classes registered so far,
+    then advances `feed`, which registers more classes into the registry,
+    and yields those newly registered, until `feed` is exhausted.  So
+    builders iterating the registry can output classes as soon as those are
+    inspected.  `len` exhausts `feed` first, while lookups only see the
+    classes registered so far.
+
+    :param feed: Iterator registering classes into this registry
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._class_paths: List[str] = list(dict.keys(self))
+        self._feed: Optional[Iterator] = None
+
+    def feed(self, feed: Iterator):
+        self._feed = feed
+
+    def __setitem__(self, class_path: str, klass):
+        if class_path not in self:
+            self._class_paths.append(class_path)
+        super().__setitem__(class_path, klass)
+
+    def update(self, *args, **kwargs):
+        for class_path, klass in dict(*args, **kwargs).items():
+            self[class_path] = klass
+
+    def _advance(self) -> bool:
+        if self._feed is None:
+            return False
+        try:
+            next(self._feed)
+        except StopIteration:
+            self._feed = None
+            return False
+
+        return True
+
+    def __iter__(self) -> Iterator[str]:
+        i = 0
+        while True:
+            while i < len(self._class_paths):
+                yield self._class_paths[i]
+                i += 1
+            if not self._advance():
+                return
+
+    def keys(self) -> Iterator[str]:
+        return iter(self)
+
+    def values(self) -> Iterator[ClassInspector]:
+        return (self[class_path] for class_path in self)
+
+    def items(self) -> Iterator:
+        return ((class_path, self[class_path]) for class_path in self)
 
-        return self.get(class_path)
+    def __len__(self) -> int:
+        while self._advance():
+            pass
 
+        return super().__len__()
@@ -0,0 +1,196 @@
+"""
+Memory reports
+
+`MemoryReport` traces allocations by `tracemalloc` during the phases of a
+run, such as inspecting classes and building the source, and records for
+each phase:
+
+    allocated   bytes allocated and still alive at the end of the phase
+    peak        peak traced bytes during the phase
+    max_rss     peak resident set size of the process at the end of the phase
+    top_sites   source lines which allocated the most
+    top_files   source files which allocated the most
+
+Bytes retained by each inspector of the registry are recorded as well,
+summed up per module.  The report is written as JSON, so reports of
+releases can be compared.
+"""
+
+import json
+import sys
+import tracemalloc
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Mapping, Optional
+
+from .version import __version__
+from .inspectors import ClassInspector
+from .outputs import write_if_changed
+
+
+REPORT_VERSION = 1
+
+# Attributes of inspectors referring objects shared with others.
+SHARED_ATTRS = {'_klass', '_registry', '_module', '_parents', '_snapshot'}
+
+_TRACEMALLOC_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__),
+)
+
+
+def max_rss() -> Optional[int]:
+    """
+    Return peak resident set size of the process in bytes, or None if not
+    available on the platform.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return rss if sys.platform == 'darwin' else rss * 1024
+
+
+def retained_size(klass: ClassInspector) -> int:
+    """
+    Return bytes retained by the inspector itself: the object, its
+    attributes and the names in its member lists.  Objects shared with
+    other inspectors, such as the class and the parents, are not counted.
+
+    :param klass: ClassInspector or SnapshotClass object
+    """
+    attrs = vars(klass)
+    size = sys.getsizeof(klass) + sys.getsizeof(attrs)
+    for name, value in attrs.items():
+        if name in SHARED_ATTRS:
+            continue
+        size += sys.getsizeof(value)
+        if isinstance(value, (list, tuple)):
+            size += sum(sys.getsizeof(item) for item in value
+                        if isinstance(item, str))
+        elif isinstance(value, dict):
+            size += sum(sys.getsizeof(key) + sys.getsizeof(item)
+                        for key, item in value.items())
+
+    return size
+
+
+def _stats(snapshot: tracemalloc.Snapshot, before: tracemalloc.Snapshot,
+           key_type: str, top: int) -> List[dict]:
+    stats = []
+    for stat in snapshot.compare_to(before, key_type)[:top]:
+        frame = stat.traceback[0]
+        entry = {'file': frame.filename}
+        if key_type == 'lineno':
+            entry['line'] = frame.lineno
+        entry.update(size=stat.size_diff, count=stat.count_diff)
+        stats.append(entry)
+
+    return stats
+
+
+class MemoryReport:
+    """
+    Memory report of the phases of a run.
+
+    :param top: Number of allocation sites, files and inspectors reported
+    """
+
+    def __init__(self, top: int = 20):
+        self.top = top
+        self.phases: List[dict] = []
+        self.inspectors: Dict = {}
+        self._started_tracing = False
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """
+        Trace allocations while the block is executed as the phase `name`.
+        Tracing starts at the first phase, if not traced yet.
+        """
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+
+        before = tracemalloc.take_snapshot().filter_traces(
+            _TRACEMALLOC_FILTERS)
+        current, _ = tracemalloc.get_traced_memory()
+        if hasattr(tracemalloc, 'reset_peak'):
+            tracemalloc.reset_peak()
+        try:
+            yield
+        finally:
+            _, peak = tracemalloc.get_traced_memory()
+            after = tracemalloc.take_snapshot().filter_traces(
+                _TRACEMALLOC_FILTERS)
+            self.phases.append({
+                'name': name,
+                'allocated': sum(stat.size_diff for stat in
+                                 after.compare_to(before, 'filename')),
+                'peak': max(peak - current, 0),
+                'max_rss': max_rss(),
+                'top_sites': _stats(after, before, 'lineno', self.top),
+                'top_files': _stats(after, before, 'filename', self.top),
+            })
+
+    def measure_registry(self, registry: Mapping[str, ClassInspector]):
+        """
+        Record bytes retained by each inspector of `registry`.
+        """
+        sizes = {class_path: retained_size(klass)
+                 for class_path, klass in registry.items()}
+        modules: Dict[str, Dict[str, int]] = {}
+        for class_path, size in sizes.items():
+            module = modules.setdefault(registry[class_path].module_path,
+                                        {'bytes': 0, 'classes': 0})
+            module['bytes'] += size
+            module['classes'] += 1
+
+        largest = sorted(sizes.items(), key=lambda item: -item[1])
+        self.inspectors = {
+            'count': len(sizes),
+            'bytes': sum(sizes.values()),
+            'top_classes': [{'class_path': class_path, 'bytes': size}
+                            for class_path, size in largest[:self.top]],
+            'top_modules': [
+                dict(module_path=module_path, **module)
+                for module_path, module in sorted(
+                    modules.items(),
+                    key=lambda item: -item[1]['bytes'])[:self.top]],
+        }
+
+    def stop(self):
+        """
+        Stop tracing if it was started by this report.
+        """
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def to_dict(self) -> dict:
+        return {
+            'version': REPORT_VERSION,
+            'genuuml': __version__,
+            'python': sys.version.split()[0],
+            'max_rss': max_rss(),
+            'phases': self.phases,
+            'inspectors': self.inspectors,
+        }
+
+    def write(self, path: str):
+        write_if_changed(path, json.dumps(self.to_dict(), indent=2))
+
+
+@contextmanager
+def phase(memory_report: Optional[MemoryReport], name: str) -> Iterator[None]:
+    """
+    Trace the block as the phase `name` of `memory_report`, if given.
+    """
+    if memory_report is None:
+        yield
+        return
+
+    with memory_report.phase(name):
+        yield
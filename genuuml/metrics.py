@@ -0,0 +1,209 @@
+"""
+Inheritance graph metrics
+
+Metrics are computed in bulk over integer indexed arrays built from the
+registry by `InheritanceGraph`.  NumPy is required, install it by
+`pip install genuuml[metrics]`.
+"""
+
+import csv
+import io
+import json
+from itertools import chain
+from typing import Dict, List, Mapping, Optional
+
+from .builders import Builder
+from .graphs import InheritanceGraph
+from .inspectors import ClassInspector
+
+
+METRICS = (
+    'depth',
+    'fan_in',
+    'fan_out',
+    'ancestors',
+    'descendants',
+    'mro_length',
+    'members',
+    'methods',
+)
+
+MEMBER_KINDS = (
+    'class_methods',
+    'static_methods',
+    'properties',
+    'methods',
+    'data_descriptors',
+    'data',
+    'fields',
+)
+METHOD_KINDS = ('class_methods', 'static_methods', 'methods')
+
+
+def _import_numpy():
+    try:
+        import numpy
+    except ImportError as e:
+        raise ImportError(
+            "NumPy is required for metrics. "
+            "Install it by `pip install genuuml[metrics]`.") from e
+
+    return numpy
+
+
+def compute_metrics(registry: Mapping[str, ClassInspector]) -> Dict:
+    """
+    Compute metrics of each class in `registry`.
+
+        depth        length of the longest inheritance path to a root class
+        fan_in       number of direct subclasses
+        fan_out      number of direct base classes
+        ancestors    number of distinct ancestor classes
+        descendants  number of distinct descendant classes
+        mro_length   length of method resolution order
+        members      number of members defined in the class
+        methods      number of methods defined in the class
+
+    :param registry: ClassRegistry or compatible mapping
+    :return: Dict consisting with metric name and array of the metric in
+             registry order
+    """
+    np = _import_numpy()
+
+    graph = InheritanceGraph(registry)
+    size = len(graph)
+    count = len(registry)
+
+    # Edge list: child index -> parent index
+    fan_out = np.fromiter((len(parents) for parents in graph.parents),
+                          dtype=np.int64, count=size)
+    children = np.repeat(np.arange(size, dtype=np.int64), fan_out)
+    parents = np.fromiter(chain.from_iterable(graph.parents),
+                          dtype=np.int64, count=int(fan_out.sum()))
+
+    fan_in = np.bincount(parents, minlength=size)
+
+    # Relax the longest path edge by edge until it converges.  It takes as
+    # many rounds as the deepest hierarchy.
+    depth = np.zeros(size, dtype=np.int64)
+    while len(parents):
+        relaxed = depth.copy()
+        np.maximum.at(relaxed, children, depth[parents] + 1)
+        if np.array_equal(relaxed, depth):
+            break
+        depth = relaxed
+
+    # Row i of `reach` is a bit set of i and its ancestors.  Parents are
+    # less deep than their children, so merging the rows of parents into
+    # children level by level completes the rows in as many rounds as the
+    # deepest hierarchy.  The number of bits set in a row counts ancestors,
+    # and in a column descendants.
+    nodes = np.arange(size, dtype=np.int64)
+    reach = np.zeros((size, (size + 7) // 8), dtype=np.uint8)
+    reach[nodes, nodes >> 3] = np.left_shift(1, nodes & 7).astype(np.uint8)
+    child_depth = depth[children]
+    for level in range(1, int(depth.max(initial=0)) + 1):
+        at_level = child_depth == level
+        np.bitwise_or.at(reach, children[at_level],
+                         reach[parents[at_level]])
+
+    ancestors = np.empty(size, dtype=np.int64)
+    descendants = np.zeros(size, dtype=np.int64)
+    # Unpack bits in chunks of rows to bound the memory to size * chunk.
+    chunk = 1024
+    for start in range(0, size, chunk):
+        bits = np.unpackbits(reach[start:start + chunk], axis=1,
+                             count=size, bitorder='little')
+        ancestors[start:start + bits.shape[0]] = \
+            bits.sum(axis=1, dtype=np.int64) - 1
+        descendants += bits.sum(axis=0, dtype=np.int64)
+    descendants -= 1
+
+    member_counts = np.array(
+        [[len(getattr(klass, kind)) for kind in MEMBER_KINDS]
+         for klass in registry.values()],
+        dtype=np.int64).reshape(count, len(MEMBER_KINDS))
+    method_columns = [MEMBER_KINDS.index(kind) for kind in METHOD_KINDS]
+
+    return {
+        'depth': depth[:count],
+        'fan_in': fan_in[:count],
+        'fan_out': fan_out[:count],
+        'ancestors': ancestors[:count],
+        'descendants': descendants[:count],
+        'mro_length': ancestors[:count] + 1,
+        'members': member_counts.sum(axis=1),
+        'methods': member_counts[:, method_columns].sum(axis=1),
+    }
+
+
+class MetricsBuilder(Builder):
+    """
+    Build table of metrics computed by `compute_metrics` in CSV or JSON.
+    """
+
+    def __init__(self,
+                 output_format: str = 'csv',
+                 sort_by: Optional[str] = None,
+                 indent: int = 2):
+        super().__init__(indent)
+        self.output_format = output_format
+        self.sort_by = sort_by
+
+    @property
+    def output_format(self) -> str:
+        """
+        Output format, `csv` or `json`
+        """
+        return self._output_format
+
+    @output_format.setter
+    def output_format(self, val: str):
+        if val not in ('csv', 'json'):
+            raise ValueError("Unknown format. [{}]".format(val), val)
+        self._output_format = val
+
+    @property
+    def sort_by(self) -> Optional[str]:
+        """
+        Metric name to sort rows in descending order.
+        Rows are in registry order if None.
+        """
+        return self._sort_by
+
+    @sort_by.setter
+    def sort_by(self, val: Optional[str]):
+        if val is not None and val not in METRICS:
+            raise ValueError("Unknown metric. [{}]".format(val), val)
+        self._sort_by = val
+
+    def build(self, registry: Mapping[str, ClassInspector]) -> str:
+        """
+        Build the metrics table and return.
+
+        :param registry: ClassRegistry object to be built.
+        """
+        np = _import_numpy()
+
+        class_paths = list(registry.keys())
+        metrics = compute_metrics(registry)
+
+        order = np.arange(len(class_paths))
+        if self.sort_by is not None:
+            order = np.argsort(-metrics[self.sort_by], kind='stable')
+
+        columns = [metrics[name][order].tolist() for name in METRICS]
+        rows = [[class_paths[i]] + list(values)
+                for i, values in zip(order.tolist(), zip(*columns))]
+
+        if self.output_format == 'json':
+            return json.dumps(
+                [dict(zip(('class_path', ) + METRICS, row)) for row in rows],
+                indent=self.indent)
+
+        source = io.StringIO()
+        writer = csv.writer(source, lineterminator="\n")
+        writer.writerow(('class_path', ) + METRICS)
+        writer.writerows(rows)
+
+        return source.getvalue()
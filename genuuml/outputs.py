@@ -0,0 +1,113 @@
+"""
+Output writers
+"""
+
+import hashlib
+import os
+import tempfile
+from typing import Iterable, List, Union
+
+
+BLOCK_SIZE = 64 * 1024
+
+
+def file_digest(path: str) -> str:
+    """
+    Return sha256 hex digest of the file at `path`.
+    The file is read block by block.
+
+    :param path: File path
+    :return: Hex digest
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(BLOCK_SIZE), b''):
+            digest.update(block)
+
+    return digest.hexdigest()
+
+
+def write_if_changed(path: str,
+                     chunks: Union[str, bytes, Iterable[Union[str, bytes]]],
+                     encoding: str = 'utf-8') -> bool:
+    """
+    Write `chunks` into `path` only when the content differs from the
+    existing file.
+
+    The chunks are hashed while being written into a temporary file placed
+    next to `path`.  The temporary file atomically replaces `path` if the
+    digest differs, otherwise it is removed and `path` is left untouched, so
+    its mtime doesn't change.
+
+    :param path: Output file path
+    :param chunks: Source or iterable of source chunks.  Bytes are written
+                   as is.
+    :param encoding: Encoding of the output file
+    :return: True if `path` was replaced
+    """
+    if isinstance(chunks, (str, bytes)):
+        chunks = [chunks]
+
+    path = os.path.abspath(path)
+    directory, basename = os.path.split(path)
+    digest = hashlib.sha256()
+    size = 0
+
+    fd, tmp_path = tempfile.mkstemp(prefix='.' + basename + '.',
+                                    suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for chunk in chunks:
+                data = chunk if isinstance(chunk, bytes) else \
+                    chunk.encode(encoding)
+                digest.update(data)
+                size += len(data)
+                f.write(data)
+
+        if os.path.isfile(path) and os.path.getsize(path) == size and \
+                file_digest(path) == digest.hexdigest():
+            os.remove(tmp_path)
+            return False
+
+        if os.path.exists(path):
+            mode = os.stat(path).st_mode & 0o777
+        else:
+            umask = os.umask(0)
+            os.umask(umask)
+            mode = 0o666 & ~umask
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return True
+
+
+class OutputSummary:
+    """
+    Collect results of `write_if_changed` to report them at once.
+    """
+
+    def __init__(self):
+        self.changed: List[str] = []
+        self.unchanged: List[str] = []
+
+    def write(self, path: str, chunks: Union[str, Iterable[str]]) -> bool:
+        """
+        Write `chunks` into `path` by using `write_if_changed` and record
+        the result.
+
+        :param path: Output file path
+        :param chunks: Source or iterable of source chunks
+        :return: True if `path` was replaced
+        """
+        changed = write_if_changed(path, chunks)
+        if changed:
+            self.changed.append(path)
+        else:
+            self.unchanged.append(path)
+
+        return changed
@@ -0,0 +1,268 @@
+"""
+Selection queries
+
+A query selects classes of a registry by predicates combined with `and`,
+`or`, `not` and parentheses, e.g.::
+
+    subclass_of:BaseModel and package:app.* and not has_method:save
+
+Predicates:
+
+    subclass_of:CLASS   CLASS and classes deriving from it.  CLASS is a class
+                        path or a class name.
+    package:PATTERN     Classes defined in modules matching the glob pattern.
+                        A pattern without wildcards also matches submodules.
+    name:PATTERN        Classes whose name matches the glob pattern.
+    has_method:PATTERN  Classes having a matching method, class method or
+                        static method.
+    has_attr:PATTERN    Classes having a matching field, property, data
+                        descriptor or data.
+
+Predicates are evaluated as sets of class paths looked up in a
+`RegistryIndex`, which is built once per registry, so selecting several
+views of a large registry doesn't walk every class for every predicate.
+"""
+
+import re
+from fnmatch import fnmatchcase
+from typing import Dict, Iterable, List, Mapping, Optional, Set, Tuple, Union
+
+from .inspectors import ClassInspector, ClassRegistry
+
+
+PREDICATES = ('subclass_of', 'package', 'name', 'has_method', 'has_attr')
+
+TOKEN_PATTERN = re.compile(r'\s*(?:([()])|([^\s()]+))')
+
+WILDCARDS = re.compile(r'[*?[]')
+
+
+class QueryError(ValueError):
+    pass
+
+
+def _add(index: Dict[str, Set[str]], key: str, class_path: str):
+    index.setdefault(key, set()).add(class_path)
+
+
+def _lookup(index: Dict[str, Set[str]], pattern: str) -> Set[str]:
+    """
+    Return the union of the sets whose key matches the glob pattern.
+
+    >>> index = {'save': {'a.A'}, 'save_all': {'a.B'}, 'load': {'a.A'}}
+    >>> sorted(_lookup(index, 'save*'))
+    ['a.A', 'a.B']
+    >>> sorted(_lookup(index, 'save'))
+    ['a.A']
+    """
+    if not WILDCARDS.search(pattern):
+        return set(index.get(pattern, ()))
+
+    return set().union(*(class_paths for key, class_paths in index.items()
+                         if fnmatchcase(key, pattern)))
+
+
+class RegistryIndex:
+    """
+    Indexes of a registry by module, class name, member name and base.
+    """
+
+    def __init__(self, registry: Mapping[str, ClassInspector]):
+        self.class_paths: List[str] = list(registry.keys())
+        self.modules: Dict[str, Set[str]] = {}
+        self.names: Dict[str, Set[str]] = {}
+        self.methods: Dict[str, Set[str]] = {}
+        self.attrs: Dict[str, Set[str]] = {}
+        self.parents: Dict[str, List[str]] = {}
+        self.children: Dict[str, List[str]] = {}
+
+        for class_path in self.class_paths:
+            klass = registry[class_path]
+            _add(self.modules, klass.module_path, class_path)
+            _add(self.names, klass.name, class_path)
+            for name in (klass.methods + klass.class_methods
+                         + klass.static_methods):
+                _add(self.methods, name, class_path)
+            for name in (klass.fields + klass.properties
+                         + klass.data_descriptors + klass.data):
+                _add(self.attrs, name, class_path)
+
+            parents = [parent.class_path for parent in klass.parents]
+            self.parents[class_path] = parents
+            for parent in parents:
+                self.children.setdefault(parent, []).append(class_path)
+
+    def subclass_of(self, klass: str) -> Set[str]:
+        roots = [klass] if klass in self.parents else self.names.get(klass, ())
+        selected = set(roots)
+        stack = list(roots)
+        while stack:
+            for child in self.children.get(stack.pop(), ()):
+                if child not in selected:
+                    selected.add(child)
+                    stack.append(child)
+
+        return selected
+
+    def package(self, pattern: str) -> Set[str]:
+        if not WILDCARDS.search(pattern):
+            pattern = [pattern, pattern + '.*']
+        else:
+            pattern = [pattern]
+
+        return set().union(*(
+            class_paths for module_path, class_paths in self.modules.items()
+            if any(fnmatchcase(module_path, p) for p in pattern)))
+
+    def name(self, pattern: str) -> Set[str]:
+        return _lookup(self.names, pattern)
+
+    def has_method(self, pattern: str) -> Set[str]:
+        return _lookup(self.methods, pattern)
+
+    def has_attr(self, pattern: str) -> Set[str]:
+        return _lookup(self.attrs, pattern)
+
+    def ancestors(self, class_paths: Iterable[str]) -> Set[str]:
+        """
+        Return given class paths and all of their ancestors in the registry.
+        """
+        selected = set(class_paths)
+        stack = list(selected)
+        while stack:
+            for parent in self.parents.get(stack.pop(), ()):
+                if parent not in selected and parent in self.parents:
+                    selected.add(parent)
+                    stack.append(parent)
+
+        return selected
+
+
+class Query:
+    """
+    Parsed selection query.
+
+    >>> Query('name:A* and not (package:x or has_attr:y)').tree
+    ('and', ('name', 'A*'), ('not', ('or', ('package', 'x'), ('has_attr', 'y'))))
+    """
+
+    def __init__(self, source: str):
+        self.source = source
+        self._tokens = self._tokenize(source)
+        self._pos = 0
+        self.tree = self._parse_or()
+        if self._pos < len(self._tokens):
+            raise QueryError(
+                "Unexpected '{}' in query: {}".format(self._peek(), source))
+
+    @staticmethod
+    def _tokenize(source: str) -> List[str]:
+        tokens = []
+        pos = 0
+        source = source.rstrip()
+        while pos < len(source):
+            match = TOKEN_PATTERN.match(source, pos)
+            tokens.append(match.group(1) or match.group(2))
+            pos = match.end()
+
+        return tokens
+
+    def _peek(self) -> Optional[str]:
+        if self._pos < len(self._tokens):
+            return self._tokens[self._pos]
+
+        return None
+
+    def _next(self) -> str:
+        token = self._peek()
+        if token is None:
+            raise QueryError("Unexpected end of query: " + self.source)
+        self._pos += 1
+
+        return token
+
+    def _parse_or(self) -> Tuple:
+        tree = self._parse_and()
+        while self._peek() == 'or':
+            self._next()
+            tree = ('or', tree, self._parse_and())
+
+        return tree
+
+    def _parse_and(self) -> Tuple:
+        tree = self._parse_not()
+        while self._peek() == 'and':
+            self._next()
+            tree = ('and', tree, self._parse_not())
+
+        return tree
+
+    def _parse_not(self) -> Tuple:
+        if self._peek() == 'not':
+            self._next()
+            return ('not', self._parse_not())
+
+        return self._parse_atom()
+
+    def _parse_atom(self) -> Tuple:
+        token = self._next()
+        if token == '(':
+            tree = self._parse_or()
+            if self._next() != ')':
+                raise QueryError("Missing ')' in query: " + self.source)
+            return tree
+
+        predicate, sep, value = token.partition(':')
+        if not sep or not value or predicate not in PREDICATES:
+            raise QueryError(
+                "Invalid predicate '{}' in query: {}".format(token, self.source))
+
+        return (predicate, value)
+
+    def evaluate(self, index: RegistryIndex) -> Set[str]:
+        """
+        Return class paths matching the query.
+        """
+        return self._evaluate(self.tree, index)
+
+    def _evaluate(self, tree: Tuple, index: RegistryIndex) -> Set[str]:
+        op = tree[0]
+        if op == 'and':
+            return self._evaluate(tree[1], index) & self._evaluate(tree[2], index)
+        if op == 'or':
+            return self._evaluate(tree[1], index) | self._evaluate(tree[2], index)
+        if op == 'not':
+            return set(index.class_paths) - self._evaluate(tree[1], index)
+
+        return getattr(index, op)(tree[1])
+
+    def __str__(self) -> str:
+        return self.source
+
+
+def select(registry: Mapping[str, ClassInspector], query: Union[str, 'Query'],
+           include_ancestors: bool = True,
+           index: Optional[RegistryIndex] = None) -> ClassRegistry:
+    """
+    Return a registry consisting with classes of `registry` matching `query`.
+
+    :param registry: ClassRegistry, SnapshotRegistry or mapping of those
+                     inspectors
+    :param query: Query string or Query object
+    :param include_ancestors: Select ancestors of the matching classes too,
+                              as the registry built from class paths does.
+    :param index: RegistryIndex of `registry`, to be shared by queries
+    :return: ClassRegistry keeping the order of `registry`
+    """
+    if not isinstance(query, Query):
+        query = Query(query)
+    if index is None:
+        index = RegistryIndex(registry)
+
+    selected = query.evaluate(index)
+    if include_ancestors:
+        selected = index.ancestors(selected)
+
+    return ClassRegistry((class_path, registry[class_path])
+                         for class_path in index.class_paths
+                         if class_path in selected)
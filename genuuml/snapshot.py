@@ -0,0 +1,387 @@
+"""
+Registry snapshots
+
+A snapshot is a compact binary image of a registry which can be written once
+and memory-mapped read-only by many processes.  All integers are unsigned
+32 bit little endian.  Layout is:
+
+    header          magic, version and counts (HEADER)
+    class records   name, module path, file path, first member, member
+                    count, first parent, parent count, omitted field count
+                    (CLASS_RECORD)
+    member records  name, kind, signature or field type (MEMBER_RECORD)
+    parents         class record indexes
+    string offsets  `string count + 1` offsets into string blob
+    string blob     utf-8 encoded strings
+
+Records refer to strings by their index in the string table.
+"""
+
+import mmap
+import struct
+from typing import (
+    TYPE_CHECKING, Dict, Iterator, List, Mapping, Optional, Union)
+
+from .inspectors import ClassInspector, ClassNotFoundError, resolve_type
+from .outputs import write_if_changed
+
+if TYPE_CHECKING:
+    from .stubs import StubIndex
+
+
+MAGIC = b'GENUUMLS'
+VERSION = 2
+
+HEADER = struct.Struct('<8sIIIII')
+CLASS_RECORD = struct.Struct('<IIIIIIII')
+MEMBER_RECORD = struct.Struct('<III')
+INDEX = struct.Struct('<I')
+
+# Member kinds in record order.  Each one is an attribute name of
+# ClassInspector.
+KINDS = (
+    'class_methods',
+    'static_methods',
+    'properties',
+    'methods',
+    'data_descriptors',
+    'data',
+    'fields',
+)
+METHOD_KINDS = {'class_methods', 'static_methods', 'methods'}
+
+
+class SnapshotError(ValueError):
+    pass
+
+
+class _StringTable:
+
+    def __init__(self):
+        self.index: Dict[str, int] = {}
+        self.strings: List[bytes] = []
+
+    def add(self, val: str) -> int:
+        i = self.index.get(val)
+        if i is None:
+            i = len(self.strings)
+            self.index[val] = i
+            self.strings.append(val.encode('utf-8'))
+
+        return i
+
+
+def iter_snapshot(registry: Mapping[str, ClassInspector],
+                  stub_index: Optional['StubIndex'] = None) -> Iterator[bytes]:
+    """
+    Build snapshot of `registry` and yield it chunk by chunk.
+
+    :param registry: ClassRegistry or compatible mapping
+    :param stub_index: StubIndex object to look signatures up
+    :return: Iterator of bytes
+    """
+    strings = _StringTable()
+    class_index = {class_path: i for i, class_path in enumerate(registry)}
+    classes = []
+    members = []
+    parents = []
+
+    for klass in registry.values():
+        member_start = len(members)
+        for kind, name in enumerate(KINDS):
+            for member in getattr(klass, name):
+                if name in METHOD_KINDS:
+                    signature = klass.signature(member, stub_index)
+                elif name == 'fields':
+                    signature = klass.field_type(member)
+                else:
+                    signature = ""
+                members.append(MEMBER_RECORD.pack(
+                    strings.add(member), kind, strings.add(signature)))
+
+        parent_start = len(parents)
+        for parent in klass.parents:
+            if parent.class_path not in class_index:
+                raise SnapshotError("Parent not in registry. [{}]".format(
+                    parent.class_path), parent.class_path)
+            parents.append(INDEX.pack(class_index[parent.class_path]))
+
+        classes.append(CLASS_RECORD.pack(
+            strings.add(klass.name),
+            strings.add(klass.module_path),
+            strings.add(klass.file_path or ""),
+            member_start, len(members) - member_start,
+            parent_start, len(parents) - parent_start,
+            klass.omitted_fields))
+
+    yield HEADER.pack(MAGIC, VERSION, len(classes), len(members),
+                      len(parents), len(strings.strings))
+    yield b''.join(classes)
+    yield b''.join(members)
+    yield b''.join(parents)
+
+    offset = 0
+    offsets = [INDEX.pack(offset)]
+    for val in strings.strings:
+        offset += len(val)
+        offsets.append(INDEX.pack(offset))
+    yield b''.join(offsets)
+    yield b''.join(strings.strings)
+
+
+def write_snapshot(registry: Mapping[str, ClassInspector], path: str,
+                   stub_index: Optional['StubIndex'] = None) -> bool:
+    """
+    Write snapshot of `registry` into `path`.
+    The file is replaced only when the content changed.
+
+    :param registry: ClassRegistry or compatible mapping
+    :param path: Output file path
+    :param stub_index: StubIndex object to look signatures up
+    :return: True if `path` was replaced
+    """
+    return write_if_changed(path, iter_snapshot(registry, stub_index))
+
+
+class SnapshotClass:
+    """
+    Read-only view of a class record, compatible with ClassInspector except
+    for the live `klass` and `module` objects.
+    """
+
+    def __init__(self, snapshot: 'SnapshotRegistry', index: int):
+        self._snapshot = snapshot
+        self._index = index
+        (self._name, self._module_path, self._file_path,
+         self._member_start, self._member_count,
+         self._parent_start, self._parent_count,
+         self._omitted_fields) = snapshot._class_record(index)
+        self._members: Optional[Dict[str, List[str]]] = None
+        self._signatures: Optional[Dict[str, str]] = None
+        self._field_types: Optional[Dict[str, str]] = None
+
+    @property
+    def klass(self):
+        """
+        Class objects are not available in snapshots.
+        """
+        return None
+
+    @property
+    def module(self):
+        """
+        Module objects are not available in snapshots.
+        """
+        return None
+
+    @property
+    def name(self) -> str:
+        return self._snapshot._string(self._name)
+
+    @property
+    def registry(self) -> 'SnapshotRegistry':
+        return self._snapshot
+
+    @property
+    def module_path(self) -> str:
+        return self._snapshot._string(self._module_path)
+
+    @property
+    def class_path(self) -> str:
+        return self.module_path + "." + self.name
+
+    @property
+    def file_path(self) -> str:
+        return self._snapshot._string(self._file_path)
+
+    @property
+    def class_methods(self) -> List[str]:
+        return list(self._load_members()['class_methods'])
+
+    @property
+    def static_methods(self) -> List[str]:
+        return list(self._load_members()['static_methods'])
+
+    @property
+    def properties(self) -> List[str]:
+        return list(self._load_members()['properties'])
+
+    @property
+    def methods(self) -> List[str]:
+        return list(self._load_members()['methods'])
+
+    @property
+    def data_descriptors(self) -> List[str]:
+        return list(self._load_members()['data_descriptors'])
+
+    @property
+    def data(self) -> List[str]:
+        return list(self._load_members()['data'])
+
+    @property
+    def fields(self) -> List[str]:
+        return list(self._load_members()['fields'])
+
+    @property
+    def omitted_fields(self) -> int:
+        return self._omitted_fields
+
+    @property
+    def parents(self) -> List['SnapshotClass']:
+        return [self._snapshot._class(i)
+                for i in self._snapshot._parent_indexes(
+                    self._parent_start, self._parent_count)]
+
+    def field_type(self, name: str) -> str:
+        """
+        Return type name of the field `name` recorded in snapshot.
+        """
+        self._load_members()
+        return self._field_types.get(name, "")
+
+    def signature(self, name: str, stub_index: Optional['StubIndex'] = None) -> str:
+        """
+        Return signature string of the method `name` recorded in snapshot.
+
+        :param name: Method name
+        :param stub_index: Ignored.  Stubs were looked up on writing.
+        :return: Signature string
+        """
+        self._load_members()
+        return self._signatures.get(name, "(...)")
+
+    def _load_members(self) -> Dict[str, List[str]]:
+        if self._members is None:
+            members: Dict[str, List[str]] = {kind: [] for kind in KINDS}
+            signatures = {}
+            field_types = {}
+            for name, kind, signature in self._snapshot._member_records(
+                    self._member_start, self._member_count):
+                name = self._snapshot._string(name)
+                members[KINDS[kind]].append(name)
+                if KINDS[kind] in METHOD_KINDS:
+                    signatures[name] = self._snapshot._string(signature)
+                elif KINDS[kind] == 'fields':
+                    field_types[name] = self._snapshot._string(signature)
+            self._members = members
+            self._signatures = signatures
+            self._field_types = field_types
+
+        return self._members
+
+    def __str__(self) -> str:
+        return self.class_path if self.class_path else "(empty)"
+
+    def __eq__(self, other: 'SnapshotClass') -> bool:
+        return hash(self) == hash(other)
+
+    def __ne__(self, other: 'SnapshotClass') -> bool:
+        return not self.class_path == other.class_path
+
+    def __hash__(self):
+        return hash(self.class_path)
+
+
+class SnapshotRegistry(Mapping):
+    """
+    Read-only, memory-mapped registry loaded from a snapshot file.
+
+    The file is mapped with `mmap`, so processes opening the same snapshot
+    share its pages.  Strings and records are decoded lazily when accessed.
+    """
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            (magic, version, self._class_count, self._member_count,
+             self._parent_count, self._string_count) = \
+                HEADER.unpack_from(self._mmap, 0)
+        except struct.error:
+            magic, version = None, None
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise SnapshotError("Not a snapshot file. [{}]".format(path), path)
+
+        self._class_offset = HEADER.size
+        self._member_offset = \
+            self._class_offset + CLASS_RECORD.size * self._class_count
+        self._parent_offset = \
+            self._member_offset + MEMBER_RECORD.size * self._member_count
+        self._string_offset = \
+            self._parent_offset + INDEX.size * self._parent_count
+        self._blob_offset = \
+            self._string_offset + INDEX.size * (self._string_count + 1)
+
+        self._classes: Dict[int, SnapshotClass] = {}
+        self._class_paths: Optional[Dict[str, int]] = None
+
+    def close(self):
+        self._mmap.close()
+
+    def __enter__(self) -> 'SnapshotRegistry':
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self) -> int:
+        return self._class_count
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(self._class_count):
+            yield self._class(i).class_path
+
+    def __getitem__(self, class_path: str) -> SnapshotClass:
+        if self._class_paths is None:
+            self._class_paths = {path: i for i, path in enumerate(self)}
+
+        return self._class(self._class_paths[class_path])
+
+    def inspect(self, klass: Union[type, object, str]) -> SnapshotClass:
+        """
+        Return the class recorded in snapshot.
+        Unlike ClassRegistry, classes not in snapshot are not inspected and
+        raise `ClassNotFoundError`.
+        """
+        if type(klass) == str:
+            class_path = klass
+        else:
+            resolved_class = resolve_type(klass)
+            class_path = resolved_class.__module__ + '.' + \
+                resolved_class.__name__
+
+        try:
+            return self[class_path]
+        except KeyError:
+            raise ClassNotFoundError(
+                "Class not found. [{}]".format(klass), klass)
+
+    def _class(self, i: int) -> SnapshotClass:
+        klass = self._classes.get(i)
+        if klass is None:
+            klass = self._classes[i] = SnapshotClass(self, i)
+
+        return klass
+
+    def _class_record(self, i: int) -> tuple:
+        return CLASS_RECORD.unpack_from(
+            self._mmap, self._class_offset + CLASS_RECORD.size * i)
+
+    def _member_records(self, start: int, count: int) -> Iterator[tuple]:
+        offset = self._member_offset + MEMBER_RECORD.size * start
+        for i in range(count):
+            yield MEMBER_RECORD.unpack_from(
+                self._mmap, offset + MEMBER_RECORD.size * i)
+
+    def _parent_indexes(self, start: int, count: int) -> List[int]:
+        offset = self._parent_offset + INDEX.size * start
+        return list(struct.unpack_from('<{}I'.format(count),
+                                       self._mmap, offset))
+
+    def _string(self, i: int) -> str:
+        begin, end = struct.unpack_from(
+            '<2I', self._mmap, self._string_offset + INDEX.size * i)
+        return self._mmap[self._blob_offset + begin:
+                          self._blob_offset + end].decode('utf-8')
@@ -0,0 +1,429 @@
+"""
+Source trees
+
+Python sources can be imported from a `SourceTree` without installing or
+extracting them, by mounting the tree on `sys.meta_path`.
+"""
+
+import abc
+import os
+import posixpath
+import subprocess
+import sys
+import tarfile
+import threading
+import zipfile
+from contextlib import contextmanager
+from importlib.abc import MetaPathFinder, SourceLoader
+from importlib.machinery import ModuleSpec
+from importlib import import_module
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+ARCHIVE_SUFFIXES = ('.whl', '.zip', '.tar.gz', '.tgz', '.tar.bz2', '.tar.xz',
+                    '.tar')
+
+# Files marking the root directory of a source distribution.
+SDIST_MARKERS = ('setup.py', 'setup.cfg', 'pyproject.toml', 'PKG-INFO')
+
+# Top-level modules which are not a part of the distributed package.
+EXCLUDED_MODULES = {'setup', 'conftest'}
+
+
+class SourceTree(abc.ABC):
+    """
+    Read-only tree of source files.
+    Paths are relative and separated by '/'.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+
+    @abc.abstractmethod
+    def paths(self) -> List[str]:
+        """
+        Return paths of all files in the tree.
+        """
+
+    @abc.abstractmethod
+    def read(self, path: str) -> bytes:
+        """
+        Return content of the file at `path`.
+        Raise `KeyError` if not found.
+        """
+
+    def close(self):
+        pass
+
+    def __enter__(self) -> 'SourceTree':
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def roots(self) -> List[str]:
+        """
+        Return directories which module paths are relative to.
+
+        A source distribution has a single top directory containing setup.py
+        or the like, and may place packages under its `src` directory.
+        A wheel may place packages under `.data/purelib` or
+        `.data/platlib` directories.
+        """
+        paths = self.paths()
+        tops = {path.split('/', 1)[0] for path in paths}
+        if len(tops) == 1:
+            top = tops.pop() + '/'
+            if any(top + marker in paths for marker in SDIST_MARKERS):
+                if any(path.startswith(top + 'src/') for path in paths):
+                    return [top + 'src/', top]
+                return [top]
+
+        roots = [""]
+        for top in sorted(tops):
+            if top.endswith('.data'):
+                for scheme in ('purelib', 'platlib'):
+                    root = top + '/' + scheme + '/'
+                    if any(path.startswith(root) for path in paths):
+                        roots.append(root)
+
+        return roots
+
+    def modules(self) -> Dict[str, Tuple[Optional[str], bool]]:
+        """
+        Return modules in the tree.
+
+        :return: Dict consisting with module path and tuple of its source
+                 path and package flag.  Source path of namespace package
+                 is None.
+        """
+        modules: Dict[str, Tuple[Optional[str], bool]] = {}
+        roots = self.roots()
+        for i, root in enumerate(roots):
+            for path in self.paths():
+                if not path.startswith(root) or not path.endswith('.py'):
+                    continue
+                # Former roots nested in this root have been scanned.
+                if any(path.startswith(former) for former in roots[:i]):
+                    continue
+
+                parts = path[len(root):-len('.py')].split('/')
+                if not all(part.isidentifier() for part in parts):
+                    continue
+
+                is_package = parts[-1] == '__init__'
+                if is_package:
+                    parts = parts[:-1]
+                if not parts or (len(parts) == 1 and
+                                 parts[0] in EXCLUDED_MODULES):
+                    continue
+
+                module_path = '.'.join(parts)
+                if modules.get(module_path, (None, ))[0] is not None:
+                    # Former root precedes.
+                    continue
+                modules[module_path] = (path, is_package)
+
+                # Directories without `__init__.py` are namespace packages.
+                for depth in range(1, len(parts)):
+                    modules.setdefault('.'.join(parts[:depth]), (None, True))
+
+        return modules
+
+
+class ZipSourceTree(SourceTree):
+    """
+    Source tree of wheel or zip archive.
+    Members are decompressed on reading.
+    """
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self._zip = zipfile.ZipFile(path)
+        self._paths = [info.filename for info in self._zip.infolist()
+                       if not info.is_dir()]
+
+    def paths(self) -> List[str]:
+        return self._paths
+
+    def read(self, path: str) -> bytes:
+        return self._zip.read(path)
+
+    def close(self):
+        self._zip.close()
+
+
+class TarSourceTree(SourceTree):
+    """
+    Source tree of tar archive such as source distribution.
+
+    The archive is read through in a single streamed pass, keeping only
+    Python sources in memory.
+    """
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self._paths: List[str] = []
+        self._sources: Dict[str, bytes] = {}
+
+        with tarfile.open(path, 'r|*') as tar:
+            for member in tar:
+                if not member.isfile():
+                    continue
+                name = posixpath.normpath(member.name)
+                self._paths.append(name)
+                if name.endswith('.py'):
+                    self._sources[name] = tar.extractfile(member).read()
+
+    def paths(self) -> List[str]:
+        return self._paths
+
+    def read(self, path: str) -> bytes:
+        return self._sources[path]
+
+
+class GitError(RuntimeError):
+    pass
+
+
+class GitRevisionTree(SourceTree):
+    """
+    Source tree of a revision in local git repository.
+
+    Blobs are read from the object store by a single long-lived
+    `git cat-file --batch` process.  When a blob is requested, Python sources
+    in the same top-level directory are fetched together in one batch, and
+    kept for later reads.
+    """
+
+    def __init__(self, rev: str, repo: str = '.'):
+        self.repo = os.path.abspath(repo)
+        self.rev = rev
+        self.commit = self._git('rev-parse', '--verify', '--quiet',
+                                rev + '^{commit}').strip()
+        super().__init__(self.repo + '@' + rev)
+
+        listing = self._git('ls-tree', '-r', '-z', '--name-only', self.commit)
+        self._paths = [path for path in listing.split('\0') if path]
+        self._path_set = set(self._paths)
+        # Python sources by top-level directory, fetched in one batch
+        self._batches: Dict[str, List[str]] = {}
+        for path in self._paths:
+            if '/' in path and path.endswith('.py'):
+                self._batches.setdefault(path.split('/', 1)[0],
+                                         []).append(path)
+        self._blobs: Dict[str, bytes] = {}
+        self._process: Optional[subprocess.Popen] = None
+
+    def _git(self, *args: str) -> str:
+        try:
+            return subprocess.run(
+                ['git', '-C', self.repo] + list(args),
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                check=True, universal_newlines=True).stdout
+        except OSError as e:
+            raise GitError("Git not runnable. [{}]".format(e), self.rev) from e
+        except subprocess.CalledProcessError as e:
+            if args[0] == 'rev-parse':
+                message = "Git revision not found. [{}]".format(self.rev)
+            else:
+                message = "Git {} failed. [{}]".format(args[0], self.rev)
+            if e.stderr.strip():
+                message += " " + e.stderr.strip()
+            raise GitError(message, self.rev) from e
+
+    def paths(self) -> List[str]:
+        return self._paths
+
+    def roots(self) -> List[str]:
+        if any(marker in self._path_set for marker in SDIST_MARKERS) and \
+                any(path.startswith('src/') for path in self._paths):
+            return ['src/', ""]
+
+        return super().roots()
+
+    def read(self, path: str) -> bytes:
+        blob = self._blobs.get(path)
+        if blob is not None:
+            return blob
+
+        if path not in self._path_set:
+            raise KeyError(path)
+
+        batch = [path]
+        if '/' in path:
+            batch += [other for other in
+                      self._batches.get(path.split('/', 1)[0], [])
+                      if other != path and other not in self._blobs]
+        self._blobs.update(self._cat_files(batch))
+
+        return self._blobs[path]
+
+    def _cat_files(self, paths: List[str]) -> Dict[str, bytes]:
+        """
+        Read blobs of `paths` from the batch process.
+        """
+        if self._process is None:
+            self._process = subprocess.Popen(
+                ['git', '-C', self.repo, 'cat-file', '--batch'],
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+
+        requests = b''.join(
+            '{}:{}\n'.format(self.commit, path).encode('utf-8')
+            for path in paths)
+
+        def write():
+            self._process.stdin.write(requests)
+            self._process.stdin.flush()
+
+        # Write requests in another thread, so that the responses filling
+        # the pipe can't block the writes.
+        writer = threading.Thread(target=write)
+        writer.start()
+
+        blobs = {}
+        stdout = self._process.stdout
+        for path in paths:
+            header = stdout.readline().split()
+            if len(header) != 3:
+                raise GitError("Blob not found. [{}]".format(path), path)
+            blobs[path] = stdout.read(int(header[2]))
+            stdout.read(1)
+        writer.join()
+
+        return blobs
+
+    def close(self):
+        if self._process is not None:
+            self._process.stdin.close()
+            self._process.wait()
+            self._process.stdout.close()
+            self._process = None
+
+
+def is_archive_path(path: str) -> bool:
+    """
+    Return True if `path` is an archive file which can be opened by
+    `open_archive`.
+    """
+    return path.lower().endswith(ARCHIVE_SUFFIXES) and os.path.isfile(path)
+
+
+def open_archive(path: str) -> SourceTree:
+    """
+    Return source tree of wheel, zip or tar archive at `path`.
+    """
+    if zipfile.is_zipfile(path):
+        return ZipSourceTree(path)
+
+    return TarSourceTree(path)
+
+
+class SourceTreeLoader(SourceLoader):
+    """
+    Load module sources from source tree.
+    """
+
+    def __init__(self, tree: SourceTree, path: str, is_package: bool):
+        self.tree = tree
+        self.path = path
+        self._is_package = is_package
+
+    def get_filename(self, fullname: str) -> str:
+        return os.path.join(self.tree.name, *self.path.split('/'))
+
+    def get_data(self, path: str) -> bytes:
+        return self.tree.read(self.path)
+
+    def is_package(self, fullname: str) -> bool:
+        return self._is_package
+
+
+class SourceTreeFinder(MetaPathFinder):
+    """
+    Find modules in source tree.
+    """
+
+    def __init__(self, tree: SourceTree):
+        self.tree = tree
+        self.modules = tree.modules()
+
+    def find_spec(self, fullname: str, path=None, target=None
+                  ) -> Optional[ModuleSpec]:
+        module = self.modules.get(fullname)
+        if module is None:
+            return None
+
+        source_path, is_package = module
+        if source_path is None:
+            spec = ModuleSpec(fullname, None, is_package=True)
+            spec.submodule_search_locations = [
+                os.path.join(self.tree.name, *fullname.split('.'))]
+            return spec
+
+        loader = SourceTreeLoader(self.tree, source_path, is_package)
+        spec = ModuleSpec(fullname, loader,
+                          origin=loader.get_filename(fullname),
+                          is_package=is_package)
+        spec.has_location = True
+        if is_package:
+            spec.submodule_search_locations = [
+                os.path.dirname(spec.origin)]
+
+        return spec
+
+    def top_level_names(self) -> List[str]:
+        return sorted({name.split('.', 1)[0] for name in self.modules})
+
+    def class_paths(self, not_founds: List[str]) -> List[str]:
+        """
+        Import all modules in the tree and return paths of classes defined in
+        those.  Modules failing to be imported are appended to `not_founds`.
+        """
+        class_paths = []
+        for module_path in sorted(self.modules):
+            try:
+                module = import_module(module_path)
+            except Exception:
+                not_founds.append(module_path)
+                continue
+
+            for member in dir(module):
+                klass = getattr(module, member)
+                if isinstance(klass, type) and \
+                        klass.__module__ == module_path:
+                    class_paths.append(
+                        klass.__module__ + '.' + klass.__name__)
+
+        return class_paths
+
+
+@contextmanager
+def mount(tree: SourceTree) -> Iterator[SourceTreeFinder]:
+    """
+    Make modules in `tree` importable while in the context.
+
+    Modules of the same top-level packages already imported are hidden while
+    in the context, and modules imported from `tree` are removed from
+    `sys.modules` afterwards, so different versions of a package can be
+    mounted one after another.
+    """
+    finder = SourceTreeFinder(tree)
+    names = finder.top_level_names()
+
+    def owned(module_path: str) -> bool:
+        return module_path.split('.', 1)[0] in names
+
+    hidden = {name: module for name, module in sys.modules.items()
+              if owned(name)}
+    for name in hidden:
+        del sys.modules[name]
+
+    sys.meta_path.insert(0, finder)
+    try:
+        yield finder
+    finally:
+        sys.meta_path.remove(finder)
+        for name in [name for name in sys.modules if owned(name)]:
+            del sys.modules[name]
+        sys.modules.update(hidden)
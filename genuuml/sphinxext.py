@@ -0,0 +1,376 @@
+"""
+Sphinx extension
+
+Add `genuuml.sphinxext` to `extensions` in conf.py, then diagrams can be
+embedded by the `genuuml` directive::
+
+    .. genuuml:: http.client.HTTPConnection http.client.HTTPResponse
+       :format: plantuml
+       :print-full-arguments:
+
+Diagrams are built in-process with one registry shared by the whole build.
+Rendered diagrams are cached in the build environment together with digests
+of the source files of their classes, so a document read again reuses the
+diagram unless one of those files changed.  The files are registered as
+dependencies of the document, so changing them makes Sphinx read it again.
+Modules changed since an earlier build in the same process, e.g. of
+sphinx-autobuild, are reloaded before rendering, with modules of their
+subclasses.
+
+PlantUML, DOT and Mermaid sources are passed to the `uml`, `graphviz` and
+`mermaid` directives when `sphinxcontrib.plantuml`, `sphinx.ext.graphviz`
+and `sphinxcontrib.mermaid` are loaded respectively, otherwise those are
+inserted as literal blocks.
+"""
+
+import importlib
+import os
+import sys
+import threading
+from typing import Dict, List, Optional, Set
+from weakref import WeakKeyDictionary
+
+from docutils import nodes
+from docutils.parsers.rst import directives
+from docutils.statemachine import StringList
+from sphinx.util.docutils import SphinxDirective
+
+from .version import __version__
+from .genuuml import module_path_to_class_path
+from .inspectors import ClassInspector, ClassRegistry, ClassNotFoundError
+from .outputs import file_digest
+from .fragments import FragmentCache
+from .query import QueryError, select
+from .builders import (
+    PlantUMLBuilder,
+    DotBuilder,
+    MermaidBuilder,
+    AsciiTreeBuilder,
+)
+
+
+BUILDERS = {
+    'plantuml': PlantUMLBuilder,
+    'dot': DotBuilder,
+    'mermaid': MermaidBuilder,
+    'ascii-tree': AsciiTreeBuilder,
+}
+
+# Format: (extension, directive, literal block language)
+DIAGRAM_DIRECTIVES = {
+    'plantuml': ('sphinxcontrib.plantuml', 'uml', 'text'),
+    'dot': ('sphinx.ext.graphviz', 'graphviz', 'dot'),
+    'mermaid': ('sphinxcontrib.mermaid', 'mermaid', 'text'),
+    'ascii-tree': (None, None, 'text'),
+}
+
+CLASS_DIAGRAM_OPTIONS = (
+    'print-typehint',
+    'print-default-value',
+    'print-full-arguments',
+    'max-arguments-width',
+    'print-builtins-members',
+    'transitive-reduction',
+    'collapse-object',
+)
+
+
+# Digests of source files each module was imported with, its own and those
+# of the ancestors of its classes, kept across builds in the process.
+_imported_digests: Dict[str, Dict[str, Optional[str]]] = {}
+
+
+class BuildState:
+    """
+    State shared by the directives during a build: the registry, the
+    digests of source files, which don't change while building, and the
+    fragments of classes rendered by other directives.
+    """
+
+    def __init__(self):
+        self.registry = ClassRegistry()
+        self.fragments = FragmentCache()
+        self._digests: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def digest(self, path: str) -> Optional[str]:
+        with self._lock:
+            if path not in self._digests:
+                self._digests[path] = file_digest(path) \
+                    if os.path.isfile(path) else None
+
+            return self._digests[path]
+
+    def stale_modules(self, registry: ClassRegistry) -> List[str]:
+        """
+        Return names of modules of classes in `registry`, which changed or
+        whose ancestors changed since those were imported by an earlier
+        build in the process.  Modules of ancestors come first.
+
+        :param registry: Registry returned by `view`
+        """
+        files: Dict[str, Dict[str, Optional[str]]] = {}
+        # Ancestors come first in the view.
+        for klass in registry.values():
+            module_files = files.setdefault(klass.module_path, {})
+            if klass.file_path:
+                module_files[klass.file_path] = self.digest(klass.file_path)
+            for parent in klass.parents:
+                module_files.update(files.get(parent.module_path, {}))
+
+        with self._lock:
+            stale = [name for name, digests in files.items()
+                     if any(_imported_digests.get(name, {}).get(path, digest)
+                            != digest for path, digest in digests.items())]
+            for name, digests in files.items():
+                _imported_digests.setdefault(name, {}).update(digests)
+
+        return stale
+
+    def refresh(self, module_names: List[str]):
+        """
+        Reload the modules and drop their classes from the registry, so
+        those are inspected again.  Subclasses of those are dropped too,
+        and their modules reloaded after the modules of their ancestors.
+        """
+        dropped: Dict[str, ClassInspector] = {}
+
+        def affected(klass) -> bool:
+            if klass.class_path not in dropped and (
+                    klass.module_path in module_names or
+                    any([affected(parent) for parent in klass.parents])):
+                dropped[klass.class_path] = klass
+
+            return klass.class_path in dropped
+
+        for klass in list(self.registry.values()):
+            affected(klass)
+
+        # Ancestors come first in `dropped`.
+        for name in dict.fromkeys(klass.module_path
+                                  for klass in dropped.values()):
+            if name in sys.modules:
+                importlib.reload(sys.modules[name])
+        for class_path in dropped:
+            del self.registry[class_path]
+
+    def view(self, class_paths: List[str],
+             not_founds: List[str]) -> ClassRegistry:
+        """
+        Return a registry of given classes and their ancestors in the order
+        `genuuml.build_registry` registers them.
+        """
+        view = ClassRegistry()
+
+        def visit(klass):
+            if klass.class_path in view:
+                return
+            for parent in klass.parents:
+                visit(parent)
+            view[klass.class_path] = klass
+
+        for class_path in module_path_to_class_path(class_paths):
+            try:
+                visit(self.registry.inspect(class_path))
+            except ClassNotFoundError as e:
+                not_founds.append(e.args[1])
+
+        return view
+
+
+_states: 'WeakKeyDictionary[object, BuildState]' = WeakKeyDictionary()
+
+
+def _state(env) -> BuildState:
+    """
+    Return the build state of the environment.  Environments loaded from
+    the previous build start with a new state.
+    """
+    state = _states.get(env)
+    if state is None:
+        state = _states[env] = BuildState()
+
+    return state
+
+
+def _diagrams(env) -> Dict[tuple, dict]:
+    """
+    Return the diagram cache of the environment, which is pickled with it.
+    Each entry consists with the rendered `source`, the digests of source
+    `files` and the `docnames` using it.
+    """
+    if not hasattr(env, 'genuuml_diagrams'):
+        env.genuuml_diagrams = {}
+
+    return env.genuuml_diagrams
+
+
+def _flag(argument: Optional[str]) -> bool:
+    """
+    Option converter of flags, which can be turned off explicitly.
+    """
+    if argument is None or not argument.strip():
+        return True
+
+    return directives.choice(argument.strip().lower(),
+                             ('yes', 'no', 'true', 'false')) in ('yes', 'true')
+
+
+class GenuumlDirective(SphinxDirective):
+    """
+    Insert a diagram of given class paths and module paths.
+    """
+
+    required_arguments = 1
+    final_argument_whitespace = True
+    option_spec = {
+        'format': lambda arg: directives.choice(arg, tuple(BUILDERS)),
+        'query': directives.unchanged_required,
+        'indent': directives.nonnegative_int,
+        'print-typehint': _flag,
+        'print-default-value': _flag,
+        'print-full-arguments': _flag,
+        'max-arguments-width': directives.nonnegative_int,
+        'print-builtins-members': _flag,
+        'transitive-reduction': _flag,
+        'collapse-object': _flag,
+    }
+
+    def run(self) -> List[nodes.Node]:
+        class_paths = self.arguments[0].split()
+        output_format = self.options.get('format', 'plantuml')
+        key = (tuple(class_paths), output_format,
+               tuple(sorted(self.options.items())))
+
+        diagrams = _diagrams(self.env)
+        state = _state(self.env)
+        entry = diagrams.get(key)
+        if entry is None or any(state.digest(path) != digest
+                                for path, digest in entry['files'].items()):
+            try:
+                entry = self._render(state, class_paths, output_format)
+            except (ClassNotFoundError, QueryError) as e:
+                return [self.state.document.reporter.warning(
+                    str(e), line=self.lineno)]
+            diagrams[key] = entry
+
+        entry['docnames'].add(self.env.docname)
+        for path in entry['files']:
+            self.env.note_dependency(path)
+
+        return self._diagram_nodes(entry['source'], output_format)
+
+    def _render(self, state: BuildState, class_paths: List[str],
+                output_format: str) -> dict:
+        registry, files = self._view(state, class_paths)
+        # Modules imported by an earlier build in the process are reloaded
+        # if those changed since.
+        stale = state.stale_modules(registry)
+        if stale:
+            state.refresh(stale)
+            registry, files = self._view(state, class_paths)
+
+        if 'query' in self.options:
+            registry = select(registry, self.options['query'])
+
+        kwargs = {name.replace('-', '_'): self.options[name]
+                  for name in CLASS_DIAGRAM_OPTIONS if name in self.options}
+        if output_format == 'ascii-tree':
+            builder = AsciiTreeBuilder()
+        else:
+            builder = BUILDERS[output_format](
+                indent=self.options.get('indent', 2),
+                fragment_cache=state.fragments, **kwargs)
+
+        return {
+            'source': builder.build(registry),
+            'files': {path: digest for path, digest in files.items()
+                      if digest is not None},
+            'docnames': set(),
+        }
+
+    def _view(self, state: BuildState, class_paths: List[str]) -> tuple:
+        """
+        Return a registry of given classes and the digests of their source
+        files.
+        """
+        not_founds: List[str] = []
+        registry = state.view(class_paths, not_founds)
+        if not_founds:
+            raise ClassNotFoundError(
+                "Class not found: " + ", ".join(not_founds), not_founds[0])
+
+        # Classes not selected by the query are also dependencies, as they
+        # may match the query once changed.
+        files = {}
+        for klass in registry.values():
+            path = klass.file_path
+            if path and path not in files:
+                files[path] = state.digest(path)
+
+        return registry, files
+
+    def _diagram_nodes(self, source: str,
+                       output_format: str) -> List[nodes.Node]:
+        extension, directive, language = DIAGRAM_DIRECTIVES[output_format]
+        if extension is None or extension not in self.config.extensions:
+            literal = nodes.literal_block(source, source, language=language)
+            self.set_source_info(literal)
+            return [literal]
+
+        lines = StringList()
+        source_path = self.get_source_info()[0]
+        lines.append(".. {}::".format(directive), source_path, self.lineno)
+        lines.append("", source_path, self.lineno)
+        for line in source.splitlines():
+            lines.append("   " + line if line else "", source_path,
+                         self.lineno)
+
+        container = nodes.container()
+        self.state.nested_parse(lines, self.content_offset, container)
+
+        return container.children
+
+
+def env_purge_doc(app, env, docname: str):
+    # Entries are kept until the end of reading, so a document read again
+    # can reuse them.
+    for entry in _diagrams(env).values():
+        entry['docnames'].discard(docname)
+
+
+def env_merge_info(app, env, docnames: Set[str], other):
+    diagrams = _diagrams(env)
+    for key, entry in _diagrams(other).items():
+        merged_docnames = entry['docnames'] & set(docnames)
+        if not merged_docnames:
+            continue
+        target = diagrams.get(key)
+        if target is None or target['files'] != entry['files']:
+            target = diagrams[key] = dict(entry, docnames=(
+                target['docnames'] if target else set()))
+        target['docnames'] |= merged_docnames
+
+
+def env_updated(app, env) -> List[str]:
+    # Drop diagrams no document uses anymore.
+    diagrams = _diagrams(env)
+    for key in [key for key, entry in diagrams.items()
+                if not entry['docnames']]:
+        del diagrams[key]
+
+    return []
+
+
+def setup(app) -> dict:
+    app.add_directive('genuuml', GenuumlDirective)
+    app.connect('env-purge-doc', env_purge_doc)
+    app.connect('env-merge-info', env_merge_info)
+    app.connect('env-updated', env_updated)
+
+    return {
+        'version': __version__,
+        'env_version': 1,
+        'parallel_read_safe': True,
+        'parallel_write_safe': True,
+    }
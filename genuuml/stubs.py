@@ -0,0 +1,321 @@
+"""
+Signatures from stub files
+
+`StubIndex` looks signatures of methods up in `.pyi` stubs.  It's used for
+C-extension and builtin classes whose signatures can't be inspected.
+
+Stubs are searched in this order:
+
+1. Given stub directories, laid out as module paths.
+2. Installed stub-only packages (PEP 561), `<package>-stubs` directories on
+   `sys.path`.
+3. Typeshed bundled with installed `mypy` or `typeshed_client`.
+
+Each stub file is parsed once, and its signatures are cached on disk keyed
+by the path, mtime and size of the stub file.
+
+Signatures are formatted back from the parsed stubs by `ast.unparse`, so
+Python 3.9 or higher is required.  Other modules import this module only
+where stubs are looked up.
+"""
+
+import ast
+import hashlib
+import json
+import os
+import sys
+from importlib.util import find_spec
+from typing import Dict, List, Optional, Tuple
+
+from .outputs import write_if_changed
+
+
+if sys.version_info < (3, 9):
+    raise ImportError(
+        "Looking signatures up in stubs requires Python 3.9 or higher.")
+
+# Package name and typeshed stdlib directory in the package.
+BUNDLED_TYPESHEDS = (
+    ('mypy', os.path.join('typeshed', 'stdlib')),
+    ('typeshed_client', os.path.join('typeshed')),
+)
+
+STUBS_SUFFIX = '-stubs'
+
+# Bump when parsed result changes to invalidate cache.
+CACHE_VERSION = 1
+
+# Methods which are class methods without decorator.
+IMPLICIT_CLASS_METHODS = {'__init_subclass__', '__class_getitem__'}
+
+
+def default_cache_dir() -> str:
+    """
+    Return default directory to cache parsed stubs.
+    """
+    cache_home = os.environ.get('XDG_CACHE_HOME') or \
+        os.path.join(os.path.expanduser('~'), '.cache')
+
+    return os.path.join(cache_home, 'genuuml', 'stubs')
+
+
+def _package_dir(package: str) -> Optional[str]:
+    """
+    Return the directory of installed `package` without importing it.
+    """
+    try:
+        spec = find_spec(package)
+    except (ImportError, ValueError):
+        return None
+    if spec is None or not spec.submodule_search_locations:
+        return None
+
+    return list(spec.submodule_search_locations)[0]
+
+
+def _eval_version_condition(test: ast.expr) -> Optional[bool]:
+    """
+    Evaluate simple `sys.version_info` comparisons used in stubs.
+    Return None if `test` is not such a comparison.
+
+    >>> _eval_version_condition(ast.parse('sys.version_info >= (3, 0)', mode='eval').body)
+    True
+    >>> _eval_version_condition(ast.parse('sys.platform == "win32"', mode='eval').body) is None
+    True
+    """
+    if not (isinstance(test, ast.Compare) and len(test.ops) == 1 and
+            ast.unparse(test.left) == 'sys.version_info'):
+        return None
+
+    try:
+        version = ast.literal_eval(test.comparators[0])
+    except ValueError:
+        return None
+
+    current = sys.version_info[:len(version)]
+    op = test.ops[0]
+    if isinstance(op, ast.GtE):
+        return current >= version
+    if isinstance(op, ast.Gt):
+        return current > version
+    if isinstance(op, ast.Lt):
+        return current < version
+    if isinstance(op, ast.LtE):
+        return current <= version
+
+    return None
+
+
+def _format_arg(arg: ast.arg, default: Optional[ast.expr] = None,
+                prefix: str = "") -> str:
+    source = prefix + arg.arg
+    if arg.annotation is not None:
+        source += ": " + ast.unparse(arg.annotation)
+
+    # Stubs don't have actual default values but `...`, which is omitted.
+    if default is not None and not (isinstance(default, ast.Constant) and
+                                    default.value is Ellipsis):
+        value = ast.unparse(default)
+        source += " = " + value if arg.annotation is not None else "=" + value
+
+    return source
+
+
+def format_signature(node: ast.FunctionDef) -> str:
+    """
+    Return signature string of function definition in a stub, formatted like
+    `str(inspect.signature(...))` of the method got from its class.
+
+    >>> tree = ast.parse('def f(cls, x: int = ..., *, y: str = "a") -> None: ...')
+    >>> print(format_signature(tree.body[0]))
+    (cls, x: int, *, y: str = 'a') -> None
+    """
+    args = node.args
+    positionals = args.posonlyargs + args.args
+    defaults = [None] * (len(positionals) - len(args.defaults)) + \
+        list(args.defaults)
+
+    decorators = {ast.unparse(decorator) for decorator in node.decorator_list}
+    if ('classmethod' in decorators or node.name in IMPLICIT_CLASS_METHODS) \
+            and positionals:
+        # `cls` is bound when the method is got from its class.
+        positionals = positionals[1:]
+        defaults = defaults[1:]
+        posonly_count = max(len(args.posonlyargs) - 1, 0)
+    else:
+        posonly_count = len(args.posonlyargs)
+
+    params: List[str] = []
+    for i, (arg, default) in enumerate(zip(positionals, defaults)):
+        params.append(_format_arg(arg, default))
+        if i + 1 == posonly_count:
+            params.append("/")
+
+    if args.vararg is not None:
+        params.append(_format_arg(args.vararg, prefix="*"))
+    elif args.kwonlyargs:
+        params.append("*")
+
+    for arg, default in zip(args.kwonlyargs, args.kw_defaults):
+        params.append(_format_arg(arg, default))
+
+    if args.kwarg is not None:
+        params.append(_format_arg(args.kwarg, prefix="**"))
+
+    source = "(" + ", ".join(params) + ")"
+    if node.returns is not None:
+        source += " -> " + ast.unparse(node.returns)
+
+    return source
+
+
+def parse_stub(source: str) -> Dict[str, str]:
+    """
+    Return signatures of methods defined in stub `source`.
+
+    :param source: Source of stub file
+    :return: Dict consisting with qualified method name and its signature
+
+    >>> parse_stub('class A:\\n    def f(self) -> int: ...')
+    {'A.f': '(self) -> int'}
+    """
+    signatures: Dict[str, str] = {}
+
+    def visit(body: List[ast.stmt], prefix: str):
+        for node in body:
+            if isinstance(node, ast.ClassDef):
+                visit(node.body, prefix + node.name + '.')
+            elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                # The first one of overloads is used.
+                if prefix and prefix + node.name not in signatures:
+                    signatures[prefix + node.name] = format_signature(node)
+            elif isinstance(node, ast.If):
+                condition = _eval_version_condition(node.test)
+                if condition is None or condition:
+                    visit(node.body, prefix)
+                if condition is None or not condition:
+                    visit(node.orelse, prefix)
+
+    visit(ast.parse(source).body, "")
+
+    return signatures
+
+
+class StubIndex:
+    """
+    Index from qualified method name to the signature found in stubs.
+    """
+
+    def __init__(self,
+                 stub_dirs: Tuple[str, ...] = (),
+                 search_installed: bool = True,
+                 cache_dir: Optional[str] = None):
+        """
+        :param stub_dirs: Local stub directories
+        :param search_installed: Search installed stub packages and typeshed
+        :param cache_dir: Directory to cache parsed stubs.  Parsed stubs are
+                          not cached on disk if empty string.
+        """
+        self.stub_dirs = list(stub_dirs)
+        self.search_installed = search_installed
+        self.cache_dir = default_cache_dir() if cache_dir is None else cache_dir
+        self._roots: Optional[List[Tuple[str, str]]] = None
+        self._modules: Dict[str, Dict[str, str]] = {}
+
+    def signature(self, module_path: str, qualname: str,
+                  name: str) -> Optional[str]:
+        """
+        Return signature of method `name` of the class, or None if not found.
+
+        :param module_path: Module path of the class
+        :param qualname: Qualified name of the class
+        :param name: Method name
+        """
+        signatures = self._modules.get(module_path)
+        if signatures is None:
+            signatures = self._modules[module_path] = \
+                self._load_module(module_path)
+
+        return signatures.get(qualname + '.' + name)
+
+    @property
+    def roots(self) -> List[Tuple[str, str]]:
+        """
+        Stub root directories and module path prefix under those, in search
+        order.
+        """
+        if self._roots is None:
+            roots = [(os.path.abspath(path), "") for path in self.stub_dirs]
+
+            if self.search_installed:
+                for entry in sys.path:
+                    if not os.path.isdir(entry or os.curdir):
+                        continue
+                    for name in sorted(os.listdir(entry or os.curdir)):
+                        if name.endswith(STUBS_SUFFIX):
+                            roots.append((os.path.join(entry, name),
+                                          name[:-len(STUBS_SUFFIX)]))
+
+                for package, stdlib in BUNDLED_TYPESHEDS:
+                    package_dir = _package_dir(package)
+                    if package_dir is not None and \
+                            os.path.isdir(os.path.join(package_dir, stdlib)):
+                        roots.append((os.path.join(package_dir, stdlib), ""))
+
+            self._roots = roots
+
+        return self._roots
+
+    def find_stub(self, module_path: str) -> Optional[str]:
+        """
+        Return path of the stub file of `module_path`, or None if not found.
+        """
+        for root, prefix in self.roots:
+            parts = module_path.split('.')
+            if prefix:
+                if parts[0] != prefix:
+                    continue
+                parts = parts[1:]
+
+            base = os.path.join(root, *parts)
+            for path in (base + '.pyi', os.path.join(base, '__init__.pyi')):
+                if os.path.isfile(path):
+                    return path
+
+        return None
+
+    def _load_module(self, module_path: str) -> Dict[str, str]:
+        path = self.find_stub(module_path)
+        if path is None:
+            return {}
+
+        stat = os.stat(path)
+        key = [CACHE_VERSION, path, stat.st_mtime_ns, stat.st_size]
+        cache_path = None
+        if self.cache_dir:
+            digest = hashlib.sha1(path.encode('utf-8')).hexdigest()
+            cache_path = os.path.join(self.cache_dir, digest + '.json')
+            try:
+                with open(cache_path, encoding='utf-8') as f:
+                    cached = json.load(f)
+                if cached['key'] == key:
+                    return cached['signatures']
+            except (OSError, ValueError, KeyError):
+                pass
+
+        with open(path, encoding='utf-8') as f:
+            try:
+                signatures = parse_stub(f.read())
+            except SyntaxError:
+                signatures = {}
+
+        if cache_path is not None:
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                write_if_changed(cache_path, json.dumps(
+                    {'key': key, 'signatures': signatures}))
+            except OSError:
+                # Cache is optional.
+                pass
+
+        return signatures
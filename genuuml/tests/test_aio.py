@@ -0,0 +1,95 @@
+"""
+Tests for genuuml.aio module
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+import genuuml.genuuml
+from genuuml import aio
+from genuuml.builders import DotBuilder
+
+
+def run_until_complete(coroutine):
+    # `asyncio.run` is new in Python 3.7.
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+def test_in_ascii_tree():
+    expected = genuuml.genuuml.in_ascii_tree(['genuuml.tests.demo.Baz'])
+    ret = run_until_complete(aio.in_ascii_tree(['genuuml.tests.demo.Baz']))
+
+    assert ret == expected
+
+
+def test_coalesce_identical_requests(monkeypatch):
+    calls = []
+    release = threading.Event()
+    build_registry = genuuml.genuuml.build_registry
+
+    def counting_build_registry(class_paths):
+        calls.append(class_paths)
+        release.wait(5)
+        return build_registry(class_paths)
+
+    monkeypatch.setattr(genuuml.genuuml, 'build_registry',
+                        counting_build_registry)
+
+    async def run():
+        paths = ['genuuml.tests.demo.Baz']
+        tasks = [asyncio.ensure_future(aio.in_filepath_list(paths))
+                 for _ in range(3)]
+        await asyncio.sleep(0.05)
+        release.set()
+        return await asyncio.gather(*tasks)
+
+    results = run_until_complete(run())
+
+    assert len(calls) == 1
+    assert results[0] == results[1] == results[2]
+    assert results[0] is not results[1]
+
+
+def test_cancel():
+    release = threading.Event()
+
+    async def run():
+        loop = asyncio.get_event_loop()
+        # Occupy the only worker so the request can't start.
+        from concurrent.futures import ThreadPoolExecutor
+        executor = ThreadPoolExecutor(max_workers=1)
+        blocker = loop.run_in_executor(executor, release.wait, 5)
+
+        task = asyncio.ensure_future(
+            aio.in_ascii_tree(['genuuml.tests.demo.Baz'], executor=executor))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        release.set()
+        await blocker
+        executor.shutdown()
+
+        return aio._in_flights.get(loop)
+
+    assert run_until_complete(run()) == {}
+
+
+def test_build():
+    async def run():
+        chunks, not_founds = await aio.build(
+            DotBuilder(), ['genuuml.tests.demo.Baz', 'wrong_class_path'])
+        return [chunk async for chunk in chunks], not_founds
+
+    chunks, not_founds = run_until_complete(run())
+
+    assert len(chunks) > 1
+    assert "".join(chunks).startswith('digraph')
+    assert not_founds == ['wrong_class_path']
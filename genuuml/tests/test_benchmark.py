@@ -0,0 +1,21 @@
+"""
+Tests for genuuml.benchmark module
+"""
+
+import pytest
+
+from genuuml.benchmark import format_results, run
+
+
+@pytest.mark.parametrize('scenario', ['api', 'cli'])
+def test_run(scenario):
+    result = run(scenario, ['genuuml.tests.demo.Baz'], iterations=3)
+
+    assert result['iterations'] == 3
+    assert 0 < result['p50'] <= result['p99']
+    assert result['throughput'] > 0
+    assert result['modules_growth'] == 0
+
+    table = format_results([result, result])
+    assert table.splitlines()[0].split() == ['genuuml'] + \
+        [result['genuuml']] * 2
@@ -0,0 +1,62 @@
+"""
+Tests for genuuml.budget module
+"""
+
+import pytest
+
+from genuuml.budget import Budget
+from genuuml.genuuml import build_registry
+
+
+FOO = 'genuuml.tests.demo.Foo'
+BAA = 'genuuml.tests.demo.Baa'
+BAZ = 'genuuml.tests.demo.Baz'
+MIXIN = 'genuuml.tests.demo.Mixin'
+MIXIN_FOO = 'genuuml.tests.demo.MixinFoo'
+
+
+def test_unlimited():
+    class_paths = [BAZ, MIXIN_FOO]
+    expected, _ = build_registry(class_paths)
+    registry, not_founds = build_registry(class_paths, budget=Budget())
+
+    assert list(registry) == list(expected)
+    assert [p.class_path for p in registry[MIXIN_FOO].parents] == \
+        [p.class_path for p in expected[MIXIN_FOO].parents]
+    assert not_founds == []
+
+
+def test_max_classes():
+    budget = Budget(max_classes=2)
+    registry, _ = build_registry([BAZ], budget=budget)
+
+    # Parents precede their children, and relations to the classes left are
+    # dropped.
+    assert list(registry) == [BAA, BAZ]
+    assert registry[BAZ].parents == [registry[BAA]]
+    assert registry[BAA].parents == []
+    assert budget.truncated == [FOO]
+
+
+def test_given_classes_first():
+    budget = Budget(max_classes=2)
+    registry, not_founds = build_registry([BAZ, 'not_found', MIXIN],
+                                          budget=budget)
+
+    assert set(registry) == {BAZ, MIXIN}
+    assert not_founds == ['not_found']
+    assert budget.truncated == [BAA, 'builtins.object']
+
+
+def test_time_budget():
+    budget = Budget(time_budget=0)
+    registry, _ = build_registry([BAZ, MIXIN], budget=budget)
+
+    assert list(registry) == []
+    assert budget.truncated == [BAZ, MIXIN]
+
+
+def test_checkpoint(tmp_path):
+    with pytest.raises(ValueError):
+        build_registry([BAZ], budget=Budget(max_classes=1),
+                       checkpoint=str(tmp_path))
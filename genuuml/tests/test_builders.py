@@ -0,0 +1,85 @@
+"""
+Tests for genuuml.builders module
+"""
+
+import pytest
+
+from genuuml.inspectors import ClassRegistry
+from genuuml.builders import (
+    PlantUMLBuilder,
+    DotBuilder,
+    MermaidBuilder,
+)
+
+from genuuml.tests.demo import (
+    Baz, MixinFoo,
+)
+
+
+class TestPlantUMLBuilder:
+
+    def setup_method(self):
+        self.registry = ClassRegistry()
+        self.registry.inspect(MixinFoo)
+
+    def test_group_by_package(self):
+        source = PlantUMLBuilder(group_by_package=True).build(self.registry)
+
+        assert 'set namespaceSeparator none\n' in source
+        assert 'package builtins {\n  class builtins.object as "object"{\n' in source
+        assert ('package genuuml {\n'
+                '  package tests {\n'
+                '    package demo {\n'
+                '      class genuuml.tests.demo.') in source
+        assert '      class genuuml.tests.demo.Foo as "Foo"{\n' in source
+        # Parents precede their children.
+        assert source.index('genuuml.tests.demo.Foo as') < \
+            source.index('genuuml.tests.demo.MixinFoo as')
+        assert 'genuuml.tests.demo.MixinFoo -up-|> genuuml.tests.demo.Foo\n' in source
+
+    def test_focus(self):
+        source = PlantUMLBuilder(focus=['genuuml.tests']).build(self.registry)
+
+        assert 'class "builtins (1 class)" as builtins <<package>>\n' in source
+        assert 'builtins.object' not in source
+        assert 'package ' not in source
+        assert 'genuuml.tests.demo.Foo -up-|> builtins\n' in source
+        assert source.count('genuuml.tests.demo.Mixin -up-|> builtins\n') == 1
+
+
+class TestDotBuilder:
+
+    def setup_method(self):
+        self.registry = ClassRegistry()
+        self.registry.inspect(MixinFoo)
+
+    def test_build(self):
+        source = DotBuilder().build(self.registry)
+
+        assert source.startswith('digraph "genuuml" {\n')
+        assert source.endswith('}\n')
+        assert '"genuuml.tests.demo.MixinFoo" -> "genuuml.tests.demo.Mixin";' in source
+        assert '"genuuml.tests.demo.MixinFoo" -> "genuuml.tests.demo.Foo";' in source
+        assert '"builtins.object" [label="{object}"];' in source
+
+    def test_iter_build_streams_per_class(self):
+        chunks = list(DotBuilder().iter_build(self.registry))
+
+        assert "".join(chunks) == DotBuilder().build(self.registry)
+        # header lines, one chunk per class and footer
+        assert len(chunks) == 5 + len(self.registry) + 1
+
+
+class TestMermaidBuilder:
+
+    def setup_method(self):
+        self.registry = ClassRegistry()
+        self.registry.inspect(Baz)
+
+    def test_build(self):
+        source = MermaidBuilder().build(self.registry)
+
+        assert source.startswith('classDiagram\n')
+        assert '  class genuuml_tests_demo_Baz["Baz"]\n' in source
+        assert '  genuuml_tests_demo_Baz : +STATIC_METHOD_BAZ(arg, kwarg)$\n' in source
+        assert '  genuuml_tests_demo_Baa <|-- genuuml_tests_demo_Baz\n' in source
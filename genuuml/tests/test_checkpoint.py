@@ -0,0 +1,136 @@
+"""
+Tests for genuuml.checkpoint module
+"""
+
+import json
+import os
+
+import pytest
+
+from genuuml import genuuml
+from genuuml.builders import PlantUMLBuilder
+from genuuml.checkpoint import Checkpoint
+from genuuml.genuuml import build_registry
+from genuuml.snapshot import SnapshotClass
+
+
+FOO = 'genuuml.tests.demo.Foo'
+BAZ = 'genuuml.tests.demo.Baz'
+
+
+@pytest.fixture
+def expanded(monkeypatch):
+    """
+    Paths expanded by build_registry
+    """
+    paths = []
+    module_path_to_class_path = genuuml.module_path_to_class_path
+
+    def recording(class_paths):
+        paths.extend(class_paths)
+        return module_path_to_class_path(class_paths)
+
+    monkeypatch.setattr(genuuml, 'module_path_to_class_path', recording)
+
+    return paths
+
+
+def test_resume(tmp_path, expanded):
+    directory = str(tmp_path / 'checkpoint')
+    class_paths = [FOO, 'not_found', BAZ]
+    checkpoint = Checkpoint(directory, 0, key={'class_paths': class_paths})
+    registry, not_founds = build_registry(class_paths[:2],
+                                          checkpoint=checkpoint)
+
+    with open(str(tmp_path / 'checkpoint' / 'state.json')) as f:
+        state = json.load(f)
+    assert state['completed'] == [FOO, 'not_found']
+    assert state['not_founds'] == ['not_found']
+
+    del expanded[:]
+    resumed, not_founds = build_registry(class_paths, checkpoint=directory)
+
+    # Only the path not completed is inspected.
+    assert expanded == [BAZ]
+    assert not_founds == ['not_found']
+    assert isinstance(resumed[FOO], SnapshotClass)
+    assert list(resumed) == list(registry) + [
+        'genuuml.tests.demo.Baa', BAZ]
+    assert [parent.class_path for parent in resumed[BAZ].parents[0].parents] \
+        == [FOO]
+
+    registry, not_founds = build_registry(class_paths)
+    assert PlantUMLBuilder().build(resumed) == \
+        PlantUMLBuilder().build(registry)
+
+
+def test_interrupted(tmp_path, monkeypatch):
+    directory = str(tmp_path / 'checkpoint')
+    inspect_all = genuuml._inspect_all
+
+    def interrupting(registry, class_paths, not_founds):
+        if class_paths == [BAZ]:
+            raise KeyboardInterrupt()
+        inspect_all(registry, class_paths, not_founds)
+
+    monkeypatch.setattr(genuuml, '_inspect_all', interrupting)
+    with pytest.raises(KeyboardInterrupt):
+        build_registry([FOO, BAZ], checkpoint=directory,
+                       checkpoint_interval=3600)
+
+    checkpoint = Checkpoint(directory, key={'class_paths': [FOO, BAZ]})
+    registry = genuuml.ClassRegistry()
+    assert checkpoint.load(registry)
+    assert checkpoint.completed == {FOO}
+    assert list(registry) == ['builtins.object', FOO]
+
+
+def test_other_run(tmp_path):
+    directory = str(tmp_path / 'checkpoint')
+    build_registry([FOO], checkpoint=directory)
+
+    registry = genuuml.ClassRegistry()
+    assert not Checkpoint(directory, key={'class_paths': [BAZ]}).load(
+        registry)
+    assert not registry
+
+
+def test_stream(tmp_path):
+    directory = str(tmp_path / 'checkpoint')
+    registry, _ = build_registry(iter([FOO]), stream=True,
+                                 checkpoint=directory)
+    assert list(registry) == ['builtins.object', FOO]
+
+    # Paths read lazily identify the run as well.
+    registry, _ = build_registry(iter(['genuuml.tests.demo.Mixin']),
+                                 stream=True, checkpoint=directory)
+    assert list(registry) == ['builtins.object', 'genuuml.tests.demo.Mixin']
+
+
+def test_save_loaded(tmp_path, monkeypatch):
+    directory = str(tmp_path / 'checkpoint')
+    build_registry([FOO], checkpoint=directory)
+
+    checkpoint = Checkpoint(directory, key={'class_paths': [FOO]})
+    registry = genuuml.ClassRegistry()
+    assert checkpoint.load(registry)
+    loaded = checkpoint.snapshot_path
+
+    # The snapshot loaded is mapped, and can't be replaced on Windows.
+    replaced = []
+    replace = os.replace
+
+    def recording(src, dst):
+        replaced.append(os.path.abspath(dst))
+        replace(src, dst)
+
+    monkeypatch.setattr(os, 'replace', recording)
+    checkpoint.save(registry)
+
+    assert os.path.abspath(loaded) not in replaced
+    assert checkpoint.snapshot_path != loaded
+    assert registry[FOO].class_path == FOO
+
+    registry = genuuml.ClassRegistry()
+    assert Checkpoint(directory, key={'class_paths': [FOO]}).load(registry)
+    assert list(registry) == ['builtins.object', FOO]
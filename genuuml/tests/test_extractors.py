@@ -0,0 +1,170 @@
+"""
+Tests for genuuml.extractors module
+"""
+
+import enum
+from typing import ClassVar, List, NamedTuple
+
+import pytest
+
+from genuuml.builders import PlantUMLBuilder
+from genuuml.extractors import EnumExtractor, find_extractor
+from genuuml.inspectors import ClassRegistry
+from genuuml.snapshot import SnapshotRegistry, write_snapshot
+
+
+dataclasses = pytest.importorskip('dataclasses')
+
+
+@dataclasses.dataclass
+class Point:
+    x: int
+    y: int = 0
+    tags: List[str] = dataclasses.field(default_factory=list)
+    origin: ClassVar['Point'] = None
+
+    def norm(self) -> float:
+        return (self.x ** 2 + self.y ** 2) ** 0.5
+
+
+@dataclasses.dataclass
+class Point3D(Point):
+    z: int = 0
+
+
+@dataclasses.dataclass(init=False, repr=False)
+class Raw:
+    value: int
+
+    def __init__(self, raw: str):
+        self.value = int(raw)
+
+    def __repr__(self) -> str:
+        return 'Raw({})'.format(self.value)
+
+
+class Pair(NamedTuple):
+    left: str
+    right: str = ''
+
+    def swap(self) -> 'Pair':
+        return Pair(self.right, self.left)
+
+
+Color = enum.Enum('Color', ['RED', 'GREEN', 'BLUE'])
+
+Large = enum.IntEnum('Large', ['M{}'.format(i) for i in range(100)])
+
+
+def inspect(klass):
+    return ClassRegistry().inspect(klass)
+
+
+def test_dataclass():
+    klass = inspect(Point)
+    assert klass.fields == ['x', 'y', 'tags']
+    assert klass.field_type('tags') == 'List[str]'
+    assert klass.methods == ['norm']
+    # ClassVar is not a field.
+    assert klass.data == ['origin']
+
+    klass = inspect(Point3D)
+    assert klass.fields == ['z']
+    assert klass.methods == []
+
+
+def test_dataclass_written_methods():
+    # Methods written by the user are kept, generated ones are not.
+    assert inspect(Raw).methods == ['__init__', '__repr__']
+
+
+def test_named_tuple():
+    klass = inspect(Pair)
+    assert klass.fields == ['left', 'right']
+    assert klass.field_type('left') == 'str'
+    assert klass.methods == ['swap']
+    assert klass.class_methods == []
+
+
+def test_enum():
+    klass = inspect(Color)
+    assert klass.fields == ['RED', 'GREEN', 'BLUE']
+    assert klass.field_type('RED') == 'int'
+    assert klass.omitted_fields == 0
+
+    klass = inspect(Large)
+    assert len(klass.fields) == EnumExtractor().max_members
+    assert klass.omitted_fields == 100 - len(klass.fields)
+
+    # Enums without members are inspected as usual.
+    assert find_extractor(enum.Enum) is None
+
+
+def test_attrs():
+    attr = pytest.importorskip('attr')
+
+    @attr.s(auto_attribs=True)
+    class Base:
+        name: str
+
+        def greet(self):
+            pass
+
+    @attr.s(auto_attribs=True)
+    class Child(Base):
+        age: int = 0
+
+    @attr.s(auto_attribs=True, repr=False)
+    class Written:
+        name: str
+
+        def __repr__(self):
+            return self.name
+
+    klass = inspect(Base)
+    assert klass.fields == ['name']
+    assert klass.methods == ['greet']
+    assert inspect(Child).fields == ['age']
+    assert inspect(Written).methods == ['__repr__']
+
+
+def test_pydantic():
+    pydantic = pytest.importorskip('pydantic')
+
+    class Model(pydantic.BaseModel):
+        name: str
+        size: int = 0
+
+        def save(self):
+            pass
+
+    klass = inspect(Model)
+    assert klass.fields == ['name', 'size']
+    assert klass.field_type('size') == 'int'
+    assert klass.methods == ['save']
+
+
+def test_build():
+    registry = ClassRegistry()
+    registry.inspect(Point)
+    registry.inspect(Large)
+    source = PlantUMLBuilder(print_typehint=True).build(registry)
+
+    assert '  +x: int\n  +y: int\n  +tags: List[str]\n  +origin\n' in source
+    assert '  +M49: int\n  +... 50 more\n' in source
+
+
+def test_snapshot(tmp_path):
+    registry = ClassRegistry()
+    registry.inspect(Point)
+    registry.inspect(Large)
+    path = str(tmp_path / 'snapshot')
+    write_snapshot(registry, path)
+
+    with SnapshotRegistry(path) as snapshot:
+        for class_path, klass in registry.items():
+            loaded = snapshot[class_path]
+            assert loaded.fields == klass.fields
+            assert loaded.omitted_fields == klass.omitted_fields
+            for field in klass.fields:
+                assert loaded.field_type(field) == klass.field_type(field)
@@ -0,0 +1,105 @@
+"""
+Tests for genuuml.fragments module
+"""
+
+import pytest
+
+from genuuml.builders import DotBuilder, PlantUMLBuilder
+from genuuml.fragments import FragmentCache
+from genuuml.inspectors import ClassInspector, ClassRegistry
+
+from genuuml.tests.demo import Baz, MixinFoo
+
+
+@pytest.fixture
+def registry():
+    registry = ClassRegistry()
+    registry.inspect(Baz)
+    registry.inspect(MixinFoo)
+
+    return registry
+
+
+def test_lru():
+    cache = FragmentCache(max_size=2)
+    cache.put('a', 'A')
+    cache.put('b', 'B')
+    assert cache.get('a') == 'A'
+    cache.put('c', 'C')
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 'A'
+    assert cache.get('c') == 'C'
+    assert (cache.hits, cache.misses) == (3, 1)
+
+
+def test_save_and_load(tmp_path):
+    path = str(tmp_path / 'fragments.json')
+    cache = FragmentCache(path=path)
+    cache.put('a', 'A')
+    cache.save()
+
+    assert FragmentCache(path=path).get('a') == 'A'
+    assert len(FragmentCache(path=str(tmp_path / 'missing.json'))) == 0
+
+
+def test_key_depends_on_options(registry):
+    cache = FragmentCache()
+    klass = registry['genuuml.tests.demo.Baz']
+
+    assert cache.key('PlantUMLBuilder', [False], klass) == \
+        cache.key('PlantUMLBuilder', [False], klass)
+    assert cache.key('PlantUMLBuilder', [False], klass) != \
+        cache.key('PlantUMLBuilder', [True], klass)
+    assert cache.key('PlantUMLBuilder', [False], klass) != \
+        cache.key('DotBuilder', [False], klass)
+
+
+def test_key_depends_on_source_file(registry, tmp_path, monkeypatch):
+    cache = FragmentCache()
+    klass = registry['genuuml.tests.demo.Baz']
+    key = cache.key('PlantUMLBuilder', [], klass)
+
+    source = tmp_path / 'demo.py'
+    source.write_text('class Baz: pass\n')
+    monkeypatch.setattr(ClassInspector, 'file_path',
+                        property(lambda self: str(source)))
+    changed = cache.key('PlantUMLBuilder', [], klass)
+    assert changed != key
+
+    source.write_text('class Baz:\n    pass\n')
+    assert cache.key('PlantUMLBuilder', [], klass) != changed
+
+
+def test_warm_cache_skips_signatures(registry, monkeypatch):
+    cache = FragmentCache()
+    PlantUMLBuilder(fragment_cache=cache).build(registry)
+
+    called = []
+    signature = ClassInspector.signature
+
+    def recording(self, *args, **kwargs):
+        called.append(self.class_path)
+        return signature(self, *args, **kwargs)
+
+    monkeypatch.setattr(ClassInspector, 'signature', recording)
+    PlantUMLBuilder(fragment_cache=cache).build(registry)
+
+    assert cache.hits == len(registry)
+    assert called == []
+
+
+@pytest.mark.parametrize('builder_class', [PlantUMLBuilder, DotBuilder])
+def test_builder(registry, builder_class):
+    cache = FragmentCache()
+    expected = builder_class().build(registry)
+
+    assert builder_class(fragment_cache=cache).build(registry) == expected
+    assert cache.hits == 0
+    assert builder_class(fragment_cache=cache).build(registry) == expected
+    assert cache.hits == len(registry)
+
+    typed = builder_class(print_typehint=True, fragment_cache=cache)
+    assert typed.build(registry) == \
+        builder_class(print_typehint=True).build(registry)
+    assert cache.hits == len(registry)
@@ -2,11 +2,17 @@
 Tests for genuuml.cli module
 """
 
+import click
 import pytest
+from click.testing import CliRunner
 
+from genuuml.builders import AsciiTreeBuilder, DotBuilder, PlantUMLBuilder
+from genuuml.cli import _parse_formats, main
+from genuuml.fragments import FragmentCache
 from genuuml.genuuml import (
     module_path_to_class_path,
     build_registry,
+    build_many,
 )
 
 
@@ -45,3 +51,102 @@ def test_build_registry():
     regi, not_founds = build_registry(['wrong_class_path'])
     assert set(regi.keys()) == set([])
 
+
+def test_build_registry_stream():
+    read = []
+
+    def paths():
+        for path in ['genuuml.tests.demo.Foo', 'wrong_class_path',
+                     'genuuml.tests.demo.Baa']:
+            read.append(path)
+            yield path
+
+    regi, not_founds = build_registry(paths(), stream=True)
+    assert read == []
+
+    # Paths are read and inspected while iterating the registry.
+    class_paths = iter(regi.keys())
+    assert next(class_paths) == 'builtins.object'
+    assert read == ['genuuml.tests.demo.Foo']
+    assert list(class_paths) == ['genuuml.tests.demo.Foo',
+                                 'genuuml.tests.demo.Baa']
+    assert not_founds == ['wrong_class_path']
+
+    regi, not_founds = build_registry(iter(['genuuml.tests.demo.Baa']),
+                                      stream=True)
+    assert len(regi) == 3
+    assert list(regi.keys()) == list(build_registry(
+        ['genuuml.tests.demo.Baa'])[0].keys())
+
+
+@pytest.mark.parametrize('max_workers', [1, 2])
+def test_build_many(max_workers):
+    class_paths = ['genuuml.tests.demo.Baz', 'wrong_class_path']
+    builders = {'plantuml': PlantUMLBuilder(), 'tree': AsciiTreeBuilder()}
+    registry, _ = build_registry(class_paths)
+
+    sources, not_founds = build_many(builders, class_paths,
+                                     max_workers=max_workers)
+    assert sources == {'plantuml': PlantUMLBuilder().build(registry),
+                       'tree': AsciiTreeBuilder().build(registry)}
+    assert not_founds == ['wrong_class_path']
+
+
+@pytest.mark.parametrize('values, expected', [
+    (['plantuml=a.puml', 'tree=a.txt', 'files=b.txt'],
+     [('plantuml', 'a.puml'), ('ascii-tree', 'a.txt'),
+      ('filepath-list', 'b.txt')]),
+    (['puml=a.puml', 'metrics=a.csv', 'metrics-json=a.json'],
+     [('plantuml', 'a.puml'), ('metrics-csv', 'a.csv'),
+      ('metrics-json', 'a.json')]),
+])
+def test_parse_formats(values, expected):
+    assert _parse_formats(None, None, values) == expected
+
+
+@pytest.mark.parametrize('values, message', [
+    (['plantuml'], 'Expected NAME=PATH'),
+    (['plantuml='], 'Expected NAME=PATH'),
+    (['svg=a.svg'], "Unknown format 'svg'"),
+    (['plantuml=a.txt', 'tree=a.txt'], 'Path given twice: a.txt'),
+])
+def test_parse_formats_error(values, message):
+    with pytest.raises(click.BadParameter, match=message):
+        _parse_formats(None, None, values)
+
+
+@pytest.mark.parametrize('concurrent', ['--no-concurrent', '--concurrent'])
+def test_in_formats(tmp_path, concurrent):
+    class_paths = ['genuuml.tests.demo.Baz', 'genuuml.tests.demo.MixinFoo']
+    registry, _ = build_registry(class_paths)
+    cache_path = str(tmp_path / 'fragments.json')
+    args = ['in-formats', concurrent, '--fragment-cache', cache_path,
+            '-f', 'plantuml=' + str(tmp_path / 'out.puml'),
+            '-f', 'dot=' + str(tmp_path / 'out.dot'),
+            '-f', 'tree=' + str(tmp_path / 'out.txt')] + class_paths
+
+    result = CliRunner().invoke(main, args)
+    assert result.exit_code == 0, result.output
+    assert (tmp_path / 'out.puml').read_text() == \
+        PlantUMLBuilder().build(registry)
+    assert (tmp_path / 'out.dot').read_text() == DotBuilder().build(registry)
+    assert (tmp_path / 'out.txt').read_text() == \
+        AsciiTreeBuilder().build(registry)
+
+    # Both class diagrams share the cache, saved on exit.
+    cache = FragmentCache(path=cache_path)
+    assert len(cache) == 2 * len(registry)
+
+    (tmp_path / 'out.puml').unlink()
+    result = CliRunner().invoke(main, args)
+    assert result.exit_code == 0, result.output
+    assert (tmp_path / 'out.puml').read_text() == \
+        PlantUMLBuilder().build(registry)
+    assert len(FragmentCache(path=cache_path)) == len(cache)
+
+
+def test_in_formats_error():
+    result = CliRunner().invoke(main, ['in-formats', '-f', 'svg=a.svg',
+                                       'genuuml.tests.demo.Baz'])
+    assert result.exit_code == 2
+    assert "Unknown format 'svg'" in result.output
@@ -0,0 +1,54 @@
+"""
+Tests for genuuml.graphs module
+"""
+
+import pytest
+
+from genuuml.inspectors import ClassRegistry
+from genuuml.graphs import InheritanceGraph
+
+from genuuml.tests.demo import (
+    Foo, Baa, MixinFoo,
+)
+
+
+class Redundant(Baa, Foo):
+    pass
+
+
+REDUNDANT = Redundant.__module__ + '.Redundant'
+
+
+class TestInheritanceGraph:
+
+    def setup_method(self):
+        self.registry = ClassRegistry()
+        self.registry.inspect(Redundant)
+        self.registry.inspect(MixinFoo)
+        self.graph = InheritanceGraph(self.registry)
+
+    def test_topological_order(self):
+        order = [self.graph.class_paths[i]
+                 for i in self.graph.topological_order()]
+
+        assert len(order) == len(self.registry)
+        for class_path, klass in self.registry.items():
+            for parent in klass.parents:
+                assert order.index(parent.class_path) < order.index(class_path)
+
+    def test_edges(self):
+        edges = set(self.graph.edges())
+        assert (REDUNDANT, 'genuuml.tests.demo.Foo') in edges
+        assert ('genuuml.tests.demo.Foo', 'builtins.object') in edges
+
+    def test_edges_with_transitive_reduction(self):
+        edges = set(self.graph.edges(transitive_reduction=True))
+        assert (REDUNDANT, 'genuuml.tests.demo.Baa') in edges
+        assert (REDUNDANT, 'genuuml.tests.demo.Foo') not in edges
+        # MixinFoo has no redundant parent.
+        assert ('genuuml.tests.demo.MixinFoo', 'genuuml.tests.demo.Foo') in edges
+        assert ('genuuml.tests.demo.MixinFoo', 'genuuml.tests.demo.Mixin') in edges
+
+    def test_edges_with_collapse_object(self):
+        edges = set(self.graph.edges(collapse_object=True))
+        assert all(parent != 'builtins.object' for child, parent in edges)
@@ -0,0 +1,66 @@
+"""
+Tests for genuuml.imports module
+"""
+
+import pytest
+
+from genuuml.imports import (
+    find_modules,
+    ModuleGraph,
+)
+from genuuml.builders import (
+    ComponentBuilder,
+    ImportTreeBuilder,
+)
+
+
+@pytest.fixture
+def package(tmp_path, monkeypatch):
+    root = tmp_path / "imports_demo"
+    (root / "sub").mkdir(parents=True)
+    (root / "__init__.py").write_text("from .core import Core\n")
+    (root / "core.py").write_text("import os\nfrom imports_demo.sub import helper\n")
+    (root / "sub" / "__init__.py").write_text("")
+    (root / "sub" / "helper.py").write_text("from ..core import Core\nimport json\n")
+    for i in range(8):
+        (root / "sub" / "leaf{}.py".format(i)).write_text("from . import helper\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    return 'imports_demo'
+
+
+def test_find_modules(package):
+    modules, not_founds = find_modules([package, 'not_a_module'])
+
+    names = [name for name, is_package, path in modules]
+    assert names[:4] == ['imports_demo', 'imports_demo.core',
+                         'imports_demo.sub', 'imports_demo.sub.helper']
+    assert len(names) == 12
+    assert not_founds == ['not_a_module']
+
+
+@pytest.mark.parametrize('jobs', [1, 2])
+def test_scan(package, jobs):
+    modules, not_founds = find_modules([package])
+    graph = ModuleGraph.scan(modules, jobs=jobs)
+
+    assert graph.imports['imports_demo'] == ['imports_demo.core']
+    assert graph.imports['imports_demo.core'] == ['imports_demo.sub.helper']
+    assert graph.imports['imports_demo.sub.helper'] == ['imports_demo.core']
+    assert graph.imports['imports_demo.sub.leaf0'] == ['imports_demo.sub.helper']
+
+    graph = ModuleGraph.scan(modules, include_external=True, jobs=jobs)
+    assert graph.imports['imports_demo.core'] == ['os', 'imports_demo.sub.helper']
+
+
+def test_builders(package):
+    modules, not_founds = find_modules([package])
+    graph = ModuleGraph.scan(modules, jobs=1)
+
+    source = ComponentBuilder().build(graph)
+    assert source.startswith('@startuml\n')
+    assert '[imports_demo.core] --> [imports_demo.sub.helper]\n' in source
+
+    source = ImportTreeBuilder().build(graph)
+    assert source.splitlines()[0] == 'imports_demo'
+    assert 'imports_demo.core ...' in source
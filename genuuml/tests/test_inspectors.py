@@ -2,6 +2,9 @@
 Tests for genuuml.inspectors module
 """
 
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from types import (
     ModuleType,
 )
@@ -9,6 +12,7 @@ from pydoc import locate
 
 import pytest
 
+import genuuml.inspectors
 from genuuml.inspectors import (
     ClassNotFoundError,
     resolve_type,
@@ -103,6 +107,31 @@ class TestClassRegistry:
 
         assert id(a) == id(b)
 
+    def test_inspect_concurrently(self, monkeypatch):
+        counts = Counter()
+        classify = genuuml.inspectors.classify_class_public_attrs
+
+        def slow_classify(klass):
+            counts[klass] += 1
+            time.sleep(0.01)
+            return classify(klass)
+
+        monkeypatch.setattr(genuuml.inspectors, 'classify_class_public_attrs',
+                            slow_classify)
+
+        classes = [Baz, MixinFoo, Baa, Foo, Mixin] * 4
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(self.registry.inspect, classes))
+
+        # Each class is inspected exactly once.
+        assert set(counts.values()) == {1}
+        assert set(self.registry.keys()) == set([
+            'builtins.object', 'genuuml.tests.demo.Foo',
+            'genuuml.tests.demo.Baa', 'genuuml.tests.demo.Baz',
+            'genuuml.tests.demo.Mixin', 'genuuml.tests.demo.MixinFoo'])
+        for klass, inspected in zip(classes, results):
+            assert inspected is self.registry.inspect(klass)
+
 
 class TestClassInspector:
 
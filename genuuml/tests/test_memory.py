@@ -0,0 +1,92 @@
+"""
+Tests for genuuml.memory module
+"""
+
+import json
+import sys
+import tracemalloc
+
+import pytest
+from click.testing import CliRunner
+
+from genuuml.cli import main
+from genuuml.genuuml import build_registry
+from genuuml.inspectors import ClassRegistry
+from genuuml.memory import MemoryReport, phase, retained_size
+
+from genuuml.tests.demo import Baz
+
+
+def test_phase():
+    report = MemoryReport(top=3)
+    with report.phase('allocate'):
+        data = [str(i) * 10 for i in range(10000)]
+    report.stop()
+
+    phase, = report.phases
+    assert phase['name'] == 'allocate'
+    assert phase['allocated'] >= 10000 * 50
+    assert phase['peak'] > 0
+    assert len(phase['top_sites']) <= 3
+    assert phase['top_sites'][0]['file'] == __file__
+    assert not tracemalloc.is_tracing()
+    del data
+
+
+def test_phase_without_report():
+    with phase(None, 'allocate'):
+        pass
+
+    report = MemoryReport()
+    with phase(report, 'allocate'):
+        pass
+    report.stop()
+    assert [entry['name'] for entry in report.phases] == ['allocate']
+
+
+def test_build_registry(tmp_path):
+    report = MemoryReport()
+    registry, _ = build_registry(['genuuml.tests.demo.Baz',
+                                  'genuuml.tests.demo.MixinFoo'],
+                                 query='name:Baz', memory_report=report)
+    report.stop()
+
+    assert [phase['name'] for phase in report.phases] == ['inspect', 'select']
+    assert report.inspectors['count'] == len(registry)
+    assert report.inspectors['top_classes'][0]['bytes'] > 0
+    assert report.inspectors['top_modules'][0]['module_path'] == \
+        'genuuml.tests.demo'
+
+    path = str(tmp_path / 'report.json')
+    report.write(path)
+    with open(path) as f:
+        assert json.load(f)['inspectors'] == report.inspectors
+
+
+def test_retained_size():
+    registry = ClassRegistry()
+    baz = registry.inspect(Baz)
+    size = retained_size(baz)
+
+    assert size > sys.getsizeof(baz)
+    # Parents are not counted.
+    baz._parents = baz.parents * 100
+    assert retained_size(baz) == size
+
+
+@pytest.mark.parametrize('args, phases', [
+    (['in-plant-uml'], ['inspect', 'build PlantUMLBuilder']),
+    (['in-dot'], ['inspect', 'build DotBuilder']),
+    (['in-snapshot', '-o', 'registry.snapshot'], ['inspect', 'write snapshot']),
+])
+def test_cli(tmp_path, monkeypatch, args, phases):
+    monkeypatch.chdir(tmp_path)
+    result = CliRunner().invoke(main, args + [
+        '--memory-report', 'report.json', 'genuuml.tests.demo.Baz'])
+    assert result.exit_code == 0, result.output
+
+    with open('report.json') as f:
+        report = json.load(f)
+
+    assert [phase['name'] for phase in report['phases']] == phases
+    assert report['inspectors']['count'] > 0
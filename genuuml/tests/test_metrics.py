@@ -0,0 +1,94 @@
+"""
+Tests for genuuml.metrics module
+"""
+
+import io
+import json
+
+import pytest
+
+from genuuml.graphs import InheritanceGraph
+from genuuml.inspectors import ClassRegistry
+from genuuml.metrics import (
+    compute_metrics,
+    MetricsBuilder,
+)
+
+from genuuml.tests.demo import (
+    Baz, MixinFoo,
+)
+
+
+np = pytest.importorskip('numpy')
+
+
+class TestComputeMetrics:
+
+    def setup_method(self):
+        self.registry = ClassRegistry()
+        self.registry.inspect(Baz)
+        self.registry.inspect(MixinFoo)
+        self.class_paths = list(self.registry.keys())
+
+    def metric(self, metrics, name, class_path):
+        return metrics[name][self.class_paths.index(class_path)]
+
+    def test_compute_metrics(self):
+        metrics = compute_metrics(self.registry)
+
+        assert self.metric(metrics, 'depth', 'builtins.object') == 0
+        assert self.metric(metrics, 'depth', 'genuuml.tests.demo.Baz') == 3
+        assert self.metric(metrics, 'depth', 'genuuml.tests.demo.MixinFoo') == 2
+        assert self.metric(metrics, 'fan_in', 'genuuml.tests.demo.Foo') == 2
+        assert self.metric(metrics, 'fan_out', 'genuuml.tests.demo.MixinFoo') == 2
+        # Baa, Baz and MixinFoo
+        assert self.metric(metrics, 'descendants', 'genuuml.tests.demo.Foo') == 3
+        assert self.metric(metrics, 'descendants', 'builtins.object') == 5
+        assert self.metric(metrics, 'mro_length', 'genuuml.tests.demo.MixinFoo') == \
+            len(MixinFoo.__mro__)
+        assert self.metric(metrics, 'methods', 'genuuml.tests.demo.Baz') == 6
+
+    def test_ancestors_match_graph(self):
+        # Diamonds and classes sharing ancestors
+        registry = ClassRegistry()
+        for klass in (Baz, MixinFoo, io.BufferedRandom, io.TextIOWrapper,
+                      ConnectionResetError, bool):
+            registry.inspect(klass)
+        metrics = compute_metrics(registry)
+
+        graph = InheritanceGraph(registry)
+        ancestor_sets = graph.ancestors()[:len(registry)]
+        descendants = [0] * len(graph)
+        for ancestors in graph.ancestors():
+            for i in ancestors:
+                descendants[i] += 1
+
+        assert metrics['ancestors'].tolist() == \
+            [len(ancestors) for ancestors in ancestor_sets]
+        assert metrics['descendants'].tolist() == descendants[:len(registry)]
+
+
+class TestMetricsBuilder:
+
+    def setup_method(self):
+        self.registry = ClassRegistry()
+        self.registry.inspect(Baz)
+
+    def test_build_csv(self):
+        source = MetricsBuilder().build(self.registry)
+        lines = source.splitlines()
+
+        assert lines[0].startswith('class_path,depth,')
+        assert lines[1].startswith('builtins.object,0,')
+        assert len(lines) == 1 + len(self.registry)
+
+    def test_build_json_sorted(self):
+        source = MetricsBuilder('json', sort_by='depth').build(self.registry)
+        rows = json.loads(source)
+
+        assert [row['class_path'] for row in rows] == [
+            'genuuml.tests.demo.Baz',
+            'genuuml.tests.demo.Baa',
+            'genuuml.tests.demo.Foo',
+            'builtins.object',
+        ]
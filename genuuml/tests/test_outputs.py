@@ -0,0 +1,47 @@
+"""
+Tests for genuuml.outputs module
+"""
+
+import os
+
+import pytest
+
+from genuuml.outputs import (
+    write_if_changed,
+    OutputSummary,
+)
+
+
+def test_write_if_changed(tmp_path):
+    path = str(tmp_path / "out.puml")
+
+    # New file is written.
+    assert write_if_changed(path, ["@startuml\n", "@enduml\n"])
+    with open(path) as f:
+        assert f.read() == "@startuml\n@enduml\n"
+
+    # Same content leaves the file as is.
+    os.utime(path, (0, 0))
+    assert not write_if_changed(path, "@startuml\n@enduml\n")
+    assert os.stat(path).st_mtime == 0
+
+    # Different content replaces the file.
+    assert write_if_changed(path, ["@startuml\n"])
+    with open(path) as f:
+        assert f.read() == "@startuml\n"
+
+    # No temporary file is left.
+    assert os.listdir(str(tmp_path)) == ["out.puml"]
+
+
+def test_output_summary(tmp_path):
+    summary = OutputSummary()
+    a = str(tmp_path / "a.txt")
+    b = str(tmp_path / "b.txt")
+    write_if_changed(b, "b")
+
+    summary.write(a, "a")
+    summary.write(b, "b")
+
+    assert summary.changed == [a]
+    assert summary.unchanged == [b]
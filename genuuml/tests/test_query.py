@@ -0,0 +1,61 @@
+"""
+Tests for genuuml.query module
+"""
+
+import pytest
+
+from genuuml.inspectors import ClassRegistry
+from genuuml.query import Query, QueryError, RegistryIndex, select
+
+from genuuml.tests.demo import (
+    Baz, MixinFoo,
+)
+
+
+DEMO = 'genuuml.tests.demo.'
+
+
+class TestSelect:
+
+    def setup_method(self):
+        self.registry = ClassRegistry()
+        self.registry.inspect(Baz)
+        self.registry.inspect(MixinFoo)
+        self.index = RegistryIndex(self.registry)
+
+    def select(self, query, include_ancestors=False):
+        return list(select(self.registry, query, include_ancestors,
+                           self.index))
+
+    @pytest.mark.parametrize('query, expected', [
+        ('subclass_of:Baa', ['Baa', 'Baz']),
+        ('subclass_of:' + DEMO + 'Mixin', ['Mixin', 'MixinFoo']),
+        ('name:Mixin*', ['Mixin', 'MixinFoo']),
+        ('has_method:object_method_baa', ['Baa']),
+        ('has_method:CLASS_METHOD_* and not subclass_of:Foo', ['Mixin']),
+        ('subclass_of:Foo and (name:Baz or has_method:*_mixinfoo)',
+         ['Baz', 'MixinFoo']),
+    ])
+    def test_select(self, query, expected):
+        assert self.select(query) == [DEMO + name for name in expected]
+
+    def test_package(self):
+        assert self.select('package:genuuml.tests') == \
+            self.select('package:genuuml.tests.demo')
+        assert self.select('package:genuuml') == \
+            self.select('package:genuuml.*.demo')
+        assert self.select('package:builtins') == ['builtins.object']
+
+    def test_include_ancestors(self):
+        selected = self.select('name:Baz', include_ancestors=True)
+
+        assert selected == ['builtins.object', DEMO + 'Foo', DEMO + 'Baa',
+                            DEMO + 'Baz']
+
+    @pytest.mark.parametrize('query', [
+        '', 'name', 'unknown:x', 'name:x and', '(name:x', 'name:x)',
+        'name:x name:y',
+    ])
+    def test_syntax_error(self, query):
+        with pytest.raises(QueryError):
+            Query(query)
@@ -0,0 +1,105 @@
+"""
+Tests for genuuml.snapshot module
+"""
+
+import pytest
+from click.testing import CliRunner
+
+from genuuml.cli import main
+from genuuml.genuuml import build_registry
+from genuuml.inspectors import ClassRegistry, ClassNotFoundError
+from genuuml.builders import PlantUMLBuilder, AsciiTreeBuilder
+from genuuml.snapshot import (
+    SnapshotError,
+    SnapshotRegistry,
+    write_snapshot,
+)
+
+from genuuml.tests.demo import (
+    Baz, MixinFoo,
+)
+
+
+class TestSnapshotRegistry:
+
+    def setup_method(self):
+        self.registry = ClassRegistry()
+        self.registry.inspect(Baz)
+        self.registry.inspect(MixinFoo)
+
+    def test_round_trip(self, tmp_path):
+        path = str(tmp_path / "registry.snapshot")
+        assert write_snapshot(self.registry, path)
+        # Same registry leaves the file as is.
+        assert not write_snapshot(self.registry, path)
+
+        with SnapshotRegistry(path) as snapshot:
+            assert list(snapshot.keys()) == list(self.registry.keys())
+
+            obj = snapshot['genuuml.tests.demo.Baz']
+            expected = self.registry['genuuml.tests.demo.Baz']
+            assert obj.class_path == expected.class_path
+            assert obj.file_path == expected.file_path
+            assert obj.class_methods == expected.class_methods
+            assert obj.methods == expected.methods
+            assert obj.data_descriptors == expected.data_descriptors
+            assert obj.parents == [snapshot['genuuml.tests.demo.Baa']]
+            assert obj.signature('get_baz') == expected.signature('get_baz')
+            assert snapshot.inspect(Baz) is obj
+
+            with pytest.raises(ClassNotFoundError):
+                snapshot.inspect('genuuml.tests.demo.Nothing')
+
+            for builder in (PlantUMLBuilder(), AsciiTreeBuilder()):
+                assert builder.build(snapshot) == builder.build(self.registry)
+
+    def test_not_snapshot(self, tmp_path):
+        path = tmp_path / "registry.snapshot"
+        path.write_bytes(b"@startuml\n")
+
+        with pytest.raises(SnapshotError):
+            SnapshotRegistry(str(path))
+
+    def test_build_registry(self, tmp_path, monkeypatch):
+        path = str(tmp_path / "registry.snapshot")
+        write_snapshot(self.registry, path)
+        expected, _ = build_registry(['genuuml.tests.demo.Baz'])
+        # Classes are selected without inspecting those.
+        monkeypatch.setattr(ClassRegistry, 'inspect', None)
+
+        registry, not_founds = build_registry(
+            ['genuuml.tests.demo.Baz', 'genuuml.tests.demo.Nothing'],
+            snapshot=path)
+        assert list(registry.keys()) == list(expected.keys())
+        assert not_founds == ['genuuml.tests.demo.Nothing']
+
+        # Module paths select the classes of the module in the snapshot.
+        with SnapshotRegistry(path) as snapshot:
+            registry, not_founds = build_registry(
+                ['genuuml.tests.demo'], query='has_method:get_baz',
+                snapshot=snapshot)
+            assert list(registry.keys()) == list(expected.keys())
+            assert not_founds == []
+
+        with pytest.raises(ValueError):
+            build_registry(['genuuml.tests.demo.Baz'], rev='HEAD',
+                           snapshot=path)
+
+
+def test_cli(tmp_path):
+    path = str(tmp_path / "registry.snapshot")
+    runner = CliRunner()
+    result = runner.invoke(main, ['in-snapshot', '-o', path,
+                                  'genuuml.tests.demo'])
+    assert result.exit_code == 0, result.output
+
+    args = ['in-plant-uml', '-q', 'subclass_of:genuuml.tests.demo.Foo',
+            'genuuml.tests.demo']
+    result = runner.invoke(main, args + ['--snapshot', path])
+    assert result.exit_code == 0, result.output
+    assert result.output == runner.invoke(main, args).output
+
+    result = runner.invoke(main, args + ['--snapshot', path,
+                                         '--max-classes', '1'])
+    assert result.exit_code == 2
+    assert "--snapshot can't be combined" in result.output
@@ -0,0 +1,144 @@
+"""
+Tests for genuuml.sources module
+"""
+
+import io
+import os
+import subprocess
+import sys
+import tarfile
+import zipfile
+
+import pytest
+
+from genuuml.genuuml import build_registry
+from genuuml.sources import (
+    GitError,
+    GitRevisionTree,
+    is_archive_path,
+    open_archive,
+    mount,
+)
+
+
+FILES = {
+    'spam/__init__.py': 'from .base import Base\n',
+    'spam/base.py': 'class Base:\n    def run(self, count): pass\n',
+    'spam/ext/eggs.py': 'from spam.base import Base\n\nclass Eggs(Base):\n    pass\n',
+    'spam/broken.py': 'import not_installed_module\n',
+}
+
+
+def make_wheel(path):
+    with zipfile.ZipFile(str(path), 'w') as f:
+        for name, source in FILES.items():
+            f.writestr(name, source)
+        f.writestr('spam-1.0.dist-info/METADATA', '')
+
+    return str(path)
+
+
+def make_sdist(path):
+    with tarfile.open(str(path), 'w:gz') as f:
+        files = dict(FILES)
+        files['setup.py'] = 'raise RuntimeError("must not be imported")\n'
+        for name, source in files.items():
+            data = source.encode('utf-8')
+            info = tarfile.TarInfo('spam-1.0/src/' + name
+                                   if name != 'setup.py' else 'spam-1.0/' + name)
+            info.size = len(data)
+            f.addfile(info, io.BytesIO(data))
+
+    return str(path)
+
+
+@pytest.mark.parametrize('make, name', [
+    (make_wheel, 'spam-1.0-py3-none-any.whl'),
+    (make_sdist, 'spam-1.0.tar.gz'),
+])
+def test_mount(tmp_path, make, name):
+    path = make(tmp_path / name)
+    assert is_archive_path(path)
+
+    with open_archive(path) as tree:
+        assert set(tree.modules()) == {
+            'spam', 'spam.base', 'spam.ext', 'spam.ext.eggs', 'spam.broken'}
+
+        with mount(tree) as finder:
+            not_founds = []
+            class_paths = finder.class_paths(not_founds)
+
+            assert class_paths == ['spam.base.Base', 'spam.ext.eggs.Eggs']
+            assert not_founds == ['spam.broken']
+            assert sys.modules['spam.base'].__file__.startswith(path)
+
+    # Imported modules are removed after unmounting.
+    assert 'spam' not in sys.modules
+
+
+def test_metaclass_built_classes(tmp_path):
+    path = str(tmp_path / 'colors.zip')
+    with zipfile.ZipFile(path, 'w') as f:
+        f.writestr('colors/__init__.py',
+                   'import enum\n\n\nclass Color(enum.Enum):\n'
+                   '    RED = 1\n\n\nclass Plain:\n    pass\n')
+
+    with open_archive(path) as tree, mount(tree) as finder:
+        not_founds = []
+        assert finder.class_paths(not_founds) == \
+            ['colors.Color', 'colors.Plain']
+        assert not_founds == []
+
+
+def test_build_registry_with_archive(tmp_path):
+    path = make_wheel(tmp_path / 'spam-1.0-py3-none-any.whl')
+
+    registry, not_founds = build_registry([path, 'genuuml.tests.demo.Foo'])
+
+    assert set(registry.keys()) == {
+        'builtins.object', 'genuuml.tests.demo.Foo',
+        'spam.base.Base', 'spam.ext.eggs.Eggs'}
+    assert not_founds == ['spam.broken']
+    assert registry['spam.base.Base'].signature('run') == '(self, count)'
+
+
+def git(repo, *args):
+    subprocess.run(['git', '-C', str(repo), '-c', 'user.name=test',
+                    '-c', 'user.email=test@example.com'] + list(args),
+                   check=True, stdout=subprocess.PIPE)
+
+
+def test_git_revision_tree(tmp_path):
+    repo = tmp_path / "repo"
+    (repo / "spam").mkdir(parents=True)
+    (repo / "spam" / "__init__.py").write_text("")
+    (repo / "spam" / "base.py").write_text("class Old:\n    pass\n")
+    git(repo, 'init', '-q')
+    git(repo, 'add', '.')
+    git(repo, 'commit', '-q', '-m', 'old')
+    git(repo, 'tag', 'v1')
+    (repo / "spam" / "base.py").write_text("class New:\n    pass\n")
+    git(repo, 'commit', '-q', '-am', 'new')
+
+    with GitRevisionTree('v1', str(repo)) as tree:
+        assert set(tree.modules()) == {'spam', 'spam.base'}
+        assert tree.read('spam/base.py') == b"class Old:\n    pass\n"
+        # Blobs of the batch are kept for later reads.
+        tree._cat_files = None
+        assert tree.read('spam/__init__.py') == b""
+        assert tree.read('spam/base.py') == b"class Old:\n    pass\n"
+
+    registry, not_founds = build_registry(
+        ['spam.base.Old', 'spam.base.New'], rev='v1', repo=str(repo))
+    assert 'spam.base.Old' in registry
+    assert not_founds == ['spam.base.New']
+    assert registry['spam.base.Old'].file_path == \
+        os.path.join(str(repo) + '@v1', 'spam', 'base.py')
+
+    with pytest.raises(GitError, match=r"not found\. \[no-such-rev\]"):
+        GitRevisionTree('no-such-rev', str(repo))
+    with pytest.raises(GitError, match="not a git repository"):
+        GitRevisionTree('v1', str(tmp_path))
+    with GitRevisionTree('v1', str(repo)) as tree:
+        with pytest.raises(GitError, match=r"Git cat-file failed\. .*no-such"):
+            tree._git('cat-file', '-p', 'v1:no-such.py')
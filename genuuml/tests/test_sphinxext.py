@@ -0,0 +1,168 @@
+"""
+Tests for genuuml.sphinxext module
+"""
+
+import io
+import sys
+
+import pytest
+
+pytest.importorskip('sphinx')
+
+from sphinx.application import Sphinx
+from sphinx.util.docutils import docutils_namespace
+
+from genuuml import sphinxext
+
+
+MODULE = '''
+class Base:
+    def run(self):
+        pass
+
+
+class Child(Base):
+    pass
+'''
+
+DOCUMENT = '''
+{title}
+==========
+
+.. genuuml:: sphinx_demo.Child
+   :format: {format}
+   :print-full-arguments:
+'''
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    src = tmp_path / 'src'
+    src.mkdir()
+    (src / 'conf.py').write_text(
+        "extensions = ['genuuml.sphinxext', 'sphinx.ext.graphviz']\n")
+    (src / 'index.rst').write_text(
+        DOCUMENT.format(title='Index', format='plantuml')
+        + '\n.. toctree::\n\n' + ''.join(
+            '   page{}\n'.format(i) for i in range(6)))
+    for i in range(6):
+        (src / 'page{}.rst'.format(i)).write_text(
+            DOCUMENT.format(title='Page{}'.format(i), format='plantuml'))
+
+    (tmp_path / 'sphinx_demo.py').write_text(MODULE)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    # Imported from the project of other test
+    monkeypatch.delitem(sys.modules, 'sphinx_demo', raising=False)
+
+    return tmp_path
+
+
+def build(project, parallel=0):
+    warning = io.StringIO()
+    with docutils_namespace():
+        app = Sphinx(str(project / 'src'), str(project / 'src'),
+                     str(project / 'out'), str(project / 'doctrees'), 'html',
+                     status=None, warning=warning, parallel=parallel)
+        app.build()
+
+    return app, warning.getvalue()
+
+
+@pytest.fixture
+def renders(monkeypatch):
+    calls = []
+    render = sphinxext.GenuumlDirective._render
+
+    def counting_render(self, *args):
+        calls.append(self.env.docname)
+        return render(self, *args)
+
+    monkeypatch.setattr(sphinxext.GenuumlDirective, '_render',
+                        counting_render)
+
+    return calls
+
+
+def test_build(project, renders):
+    app, warning = build(project)
+
+    assert warning == ''
+    assert len(renders) == 1
+    html = (project / 'out' / 'index.html').read_text()
+    assert 'sphinx_demo.Child -up-|&gt; sphinx_demo.Base' in html
+    diagrams = app.env.genuuml_diagrams
+    assert len(diagrams) == 1
+    entry, = diagrams.values()
+    assert entry['docnames'] == {'index'} | {'page{}'.format(i)
+                                             for i in range(6)}
+    assert list(entry['files']) == [str(project / 'sphinx_demo.py')]
+
+
+def test_incremental_build(project, renders):
+    build(project)
+
+    # Documents read again reuse the diagram.
+    (project / 'src' / 'page0.rst').write_text(
+        DOCUMENT.format(title='Changed', format='plantuml'))
+    build(project)
+    assert len(renders) == 1
+
+    # Documents depending on the changed source are read and rendered again
+    # from the module reloaded.
+    (project / 'sphinx_demo.py').write_text(
+        MODULE + '\n    def changed(self):\n        pass\n')
+    app, warning = build(project)
+    assert len(renders) == 2
+    assert len(app.env.genuuml_diagrams) == 1
+    assert '+changed(self)' in (project / 'out' / 'page1.html').read_text()
+
+
+def test_reload_subclass_module(project, monkeypatch):
+    (project / 'sphinx_demo_child.py').write_text(
+        'from sphinx_demo import Base\n\n\nclass GrandChild(Base):\n'
+        '    pass\n')
+    monkeypatch.delitem(sys.modules, 'sphinx_demo_child', raising=False)
+    (project / 'src' / 'page0.rst').write_text(
+        '.. genuuml:: sphinx_demo_child.GrandChild\n')
+    build(project)
+
+    (project / 'sphinx_demo.py').write_text(
+        MODULE.replace('def run(self)', 'def changed(self)'))
+    build(project)
+    html = (project / 'out' / 'page0.html').read_text()
+    assert '+changed(self)' in html
+    assert '+run(self)' not in html
+    assert sys.modules['sphinx_demo_child'].GrandChild.__bases__ == \
+        (sys.modules['sphinx_demo'].Base, )
+
+
+def test_diagram_directive(project):
+    (project / 'src' / 'page0.rst').write_text(
+        DOCUMENT.format(title='Dot', format='dot'))
+    app, warning = build(project)
+
+    doctree = app.env.get_doctree('page0')
+    assert 'graphviz' in [node.tagname for node in doctree.findall()]
+    assert len(app.env.genuuml_diagrams) == 2
+
+    # The diagram no document uses anymore is dropped.
+    (project / 'src' / 'page0.rst').write_text(
+        DOCUMENT.format(title='Page0', format='plantuml'))
+    app, warning = build(project)
+    assert len(app.env.genuuml_diagrams) == 1
+
+
+def test_parallel_build(project):
+    app, warning = build(project, parallel=2)
+
+    assert 'parallel' not in warning
+    entry, = app.env.genuuml_diagrams.values()
+    assert len(entry['docnames']) == 7
+
+
+def test_not_found(project):
+    (project / 'src' / 'page0.rst').write_text(
+        '.. genuuml:: sphinx_demo.NotFound\n')
+    app, warning = build(project)
+
+    assert 'sphinx_demo.NotFound' in warning
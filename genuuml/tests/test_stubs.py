@@ -0,0 +1,78 @@
+"""
+Tests for genuuml.stubs module
+"""
+
+import pytest
+
+from genuuml.inspectors import ClassRegistry
+from genuuml.stubs import (
+    parse_stub,
+    StubIndex,
+)
+
+
+STUB = '''
+import sys
+
+class Spam:
+    def eggs(self, count: int = ..., *, sep: str = ",") -> str: ...
+    @classmethod
+    def create(cls, name: str) -> Spam: ...
+    if sys.version_info >= (3, 0):
+        def ham(self) -> None: ...
+    else:
+        def ham(self, legacy) -> None: ...
+    class Inner:
+        def bacon(self, /) -> None: ...
+'''
+
+
+def test_parse_stub():
+    signatures = parse_stub(STUB)
+
+    assert signatures == {
+        'Spam.eggs': "(self, count: int, *, sep: str = ',') -> str",
+        'Spam.create': "(name: str) -> Spam",
+        'Spam.ham': "(self) -> None",
+        'Spam.Inner.bacon': "(self, /) -> None",
+    }
+
+
+class TestStubIndex:
+
+    def test_signature(self, tmp_path):
+        stub_dir = tmp_path / "stubs"
+        (stub_dir / "pkg").mkdir(parents=True)
+        (stub_dir / "pkg" / "__init__.pyi").write_text("")
+        (stub_dir / "pkg" / "mod.pyi").write_text(STUB)
+        cache_dir = tmp_path / "cache"
+
+        index = StubIndex([str(stub_dir)], search_installed=False,
+                          cache_dir=str(cache_dir))
+        assert index.signature('pkg.mod', 'Spam', 'create') == "(name: str) -> Spam"
+        assert index.signature('pkg.mod', 'Spam', 'nothing') is None
+        assert index.signature('pkg', 'Spam', 'create') is None
+        assert index.signature('nothing', 'Spam', 'create') is None
+
+        # Parsed stub is cached.
+        assert len(list(cache_dir.iterdir())) == 2
+        index = StubIndex([str(stub_dir)], search_installed=False,
+                          cache_dir=str(cache_dir))
+        assert index.signature('pkg.mod', 'Spam.Inner', 'bacon') == "(self, /) -> None"
+
+    def test_builtin_fallback(self, tmp_path):
+        # `dict.fromkeys` has a text signature, `object.__init_subclass__`
+        # doesn't.
+        stub_dir = tmp_path / "stubs"
+        stub_dir.mkdir()
+        (stub_dir / "builtins.pyi").write_text(
+            "class object:\n"
+            "    def __init_subclass__(cls) -> None: ...\n")
+
+        registry = ClassRegistry()
+        obj = registry.inspect(object)
+        assert obj.signature('__init_subclass__') == "(...)"
+
+        index = StubIndex([str(stub_dir)], search_installed=False,
+                          cache_dir="")
+        assert obj.signature('__init_subclass__', index) == "() -> None"
@@ -18,6 +18,7 @@ setup(
     author='boarnasia',
     license='MIT',
     packages=(PACKAGE_NAME, ),
+    python_requires='>=3.6',
     entry_points={
         'console_scripts': ['genuuml = genuuml.cli:main'],
     },
@@ -57,5 +58,11 @@ setup(
         'test': [
             'pytest',
         ],
+        'metrics': [
+            'numpy',
+        ],
+        'sphinx': [
+            'sphinx',
+        ],
     }
 )